@@ -0,0 +1,167 @@
+import hashlib
+import os
+import time
+from collections import OrderedDict
+
+from dotenv import load_dotenv
+
+DEFAULT_MODEL = 'gemini-2.5-flash'
+# 같은 페이지에서 같은 질문을 다시 하면 이 시간 동안은 API를 호출하지 않고 저장된 응답을 씁니다.
+DEFAULT_CACHE_TTL = 10 * 60
+DEFAULT_CACHE_SIZE = 64
+
+_SIMPLE_ESCAPES = {'"': '"', '\\': '\\', '/': '/', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t'}
+
+
+class AiClient:
+    """PlaywrightThread마다 한 번 만드는 Gemini 클라이언트입니다.
+
+    google.generativeai 임포트, .env 로드, genai.configure(), GenerativeModel 생성은 첫 프롬프트에서
+    한 번만 합니다. (SDK 임포트만 1초 가까이 걸리므로 앱 시작 시에는 불러오지 않음)
+    API 키가 없으면 None을 반환하고, 다음 프롬프트에서 다시 시도합니다.
+    """
+
+    def __init__(self, model_name: str = DEFAULT_MODEL):
+        self.model_name = model_name
+        self._model = None
+
+    def model(self):
+        if self._model is None:
+            load_dotenv()  # .env 파일에서 환경 변수를 로드합니다.
+            api_key = os.getenv("GEMINI_API_KEY")
+            if not api_key:
+                return None
+            import google.generativeai as genai
+            genai.configure(api_key=api_key)
+            self._model = genai.GenerativeModel(self.model_name)
+        return self._model
+
+
+class ResponseCache:
+    """(프롬프트, 축약된 컨텍스트 해시)를 키로 AI 응답 원문을 보관하는 LRU + TTL 캐시입니다."""
+
+    def __init__(self, max_entries: int = DEFAULT_CACHE_SIZE, ttl: float = DEFAULT_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict[tuple[str, str], tuple[float, str]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(prompt: str, context: str) -> tuple[str, str]:
+        return prompt, hashlib.blake2b(context.encode("utf-8", "surrogatepass"), digest_size=16).hexdigest()
+
+    def get(self, key: tuple[str, str]) -> str | None:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key: tuple[str, str], response: str):
+        self._entries[key] = (time.monotonic() + self.ttl, response)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+class ResultFieldStreamer:
+    """스트리밍되는 JSON 응답에서 최상위 문자열 필드(기본: "result")의 값을 도착하는 대로 꺼냅니다.
+
+    feed()에 응답 조각을 넣으면 그 조각으로 새로 확정된 필드 텍스트를 반환합니다. 이스케이프
+    (\\n, \\", \\uXXXX와 서로게이트 쌍)가 조각 경계에서 잘려도 다음 조각에서 이어서 해석합니다.
+    첫 '{' 앞의 내용(```json 같은 코드 블록 표시)은 무시합니다.
+    """
+
+    def __init__(self, field: str = "result"):
+        self.field = field
+        self.done = False
+        self._depth = 0
+        self._in_string = False
+        self._escape: str | None = None
+        self._high_surrogate: str | None = None
+        self._key_chars: list[str] = []
+        self._last_string: str | None = None
+        self._current_key: str | None = None
+        self._after_colon = False
+        self._target = False
+
+    def feed(self, chunk: str) -> str:
+        out: list[str] = []
+        for char in chunk:
+            if self.done:
+                break
+            if self._in_string:
+                self._feed_string_char(char, out)
+            else:
+                self._feed_structure_char(char)
+        return "".join(out)
+
+    def _feed_structure_char(self, char: str):
+        if char == '"':
+            if self._depth == 0:
+                return
+            self._in_string = True
+            self._target = self._depth == 1 and self._after_colon and self._current_key == self.field
+            self._key_chars = []
+        elif char in "{[":
+            self._depth += 1
+        elif char in "}]":
+            self._depth = max(0, self._depth - 1)
+        elif char == ':':
+            if self._depth == 1:
+                self._current_key = self._last_string
+                self._after_colon = True
+                return
+        elif char.isspace():
+            return
+        self._after_colon = False
+
+    def _feed_string_char(self, char: str, out: list[str]):
+        if self._escape is not None:
+            self._escape += char
+            decoded = self._decode_escape()
+            if decoded is not None:
+                self._escape = None
+                self._emit(decoded, out)
+        elif char == '\\':
+            self._escape = ""
+        elif char == '"':
+            self._in_string = False
+            self._after_colon = False
+            if self._target:
+                self.done = True
+            else:
+                self._last_string = "".join(self._key_chars)
+        else:
+            self._emit(char, out)
+
+    def _decode_escape(self) -> str | None:
+        """모인 이스케이프를 해석합니다. 아직 덜 모였으면 None입니다."""
+        escape = self._escape
+        if escape[0] != 'u':
+            return _SIMPLE_ESCAPES.get(escape[0], escape[0])
+        if len(escape) < 5:
+            return None
+        try:
+            return chr(int(escape[1:5], 16))
+        except ValueError:
+            return ""
+
+    def _emit(self, char: str, out: list[str]):
+        # 서로게이트 쌍(😀)은 두 이스케이프를 합쳐 한 글자로 내보냅니다.
+        if "\ud800" <= char <= "\udbff":
+            self._high_surrogate = char
+            return
+        if self._high_surrogate is not None:
+            high, self._high_surrogate = self._high_surrogate, None
+            if "\udc00" <= char <= "\udfff":
+                char = (high + char).encode("utf-16", "surrogatepass").decode("utf-16")
+        if self._target:
+            out.append(char)
+        else:
+            self._key_chars.append(char)
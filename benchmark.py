@@ -0,0 +1,884 @@
+"""PongpSuite 성능 측정 스크립트입니다.
+
+사용법:
+    python benchmark.py dispatch [--commands N]
+    python benchmark.py proxy-latency [--requests N] [--concurrency N] [--gui-load 0.0~1.0]
+    python benchmark.py flow-memory [--flows N]
+    python benchmark.py dom-condense [--html FILE] [--items N] [--budget N] [--live]
+    python benchmark.py capture [--requests N] [--concurrency N] [--body-sizes 512,16384,262144]
+                                [--static-ratio R] [--blocked-ratio R] [--https-ratio R] [--seed N]
+    python benchmark.py startup [--runs N]
+
+모든 suite는 --output FILE을 받습니다. 결과는 커밋 간 비교가 가능하도록 커밋 해시와 함께 JSON으로 출력합니다.
+"""
+import argparse
+import asyncio
+import contextlib
+import gc
+import json
+import multiprocessing
+import os
+import queue
+import random
+import shutil
+import socket
+import statistics
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from dataclasses import dataclass
+
+from channel import AsyncChannel, FlowFeed
+
+
+def _summarize(samples: list[float]) -> dict:
+    """초 단위 샘플을 ms 단위 요약 통계로 변환합니다."""
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+    return {
+        "count": len(ordered),
+        "avg_ms": statistics.fmean(ordered) * 1000,
+        "p50_ms": ordered[len(ordered) // 2] * 1000,
+        "p99_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1000,
+        "max_ms": ordered[-1] * 1000,
+    }
+
+
+def _run_loop_in_thread(coro_factory) -> threading.Thread:
+    thread = threading.Thread(target=lambda: asyncio.run(coro_factory()), daemon=True)
+    thread.start()
+    return thread
+
+
+def bench_command_dispatch(commands: int = 200) -> dict:
+    """GUI 스레드 → asyncio 루프 명령 전달 지연을 기존 폴링 방식과 AsyncChannel로 비교합니다."""
+    results = {}
+
+    # 1) 기존 방식: queue.Queue + get_nowait() + asyncio.sleep(0.1)
+    legacy_queue = queue.Queue()
+    legacy_latencies = []
+    legacy_done = threading.Event()
+
+    async def legacy_consumer():
+        received = 0
+        while received < commands:
+            try:
+                sent_at = legacy_queue.get_nowait()
+                legacy_latencies.append(time.perf_counter() - sent_at)
+                received += 1
+            except queue.Empty:
+                await asyncio.sleep(0.1)
+        legacy_done.set()
+
+    _run_loop_in_thread(legacy_consumer)
+    for _ in range(commands):
+        # 사용자의 클릭처럼 불규칙한 간격으로 명령을 보냅니다.
+        time.sleep(random.uniform(0.005, 0.03))
+        legacy_queue.put(time.perf_counter())
+    legacy_done.wait()
+    results["polling_queue"] = _summarize(legacy_latencies)
+
+    # 2) AsyncChannel: call_soon_threadsafe로 루프를 즉시 깨움
+    channel = AsyncChannel(latency_samples=commands)
+    channel_done = threading.Event()
+    bound = threading.Event()
+
+    async def channel_consumer():
+        channel.bind()
+        bound.set()
+        for _ in range(commands):
+            await channel.get()
+        channel_done.set()
+
+    _run_loop_in_thread(channel_consumer)
+    bound.wait()
+    for i in range(commands):
+        time.sleep(random.uniform(0.005, 0.03))
+        channel.put(('noop', i))
+    channel_done.wait()
+    results["async_channel"] = _summarize(list(channel.dispatch_latencies))
+
+    return results
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_for_port(port: int, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.5).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise TimeoutError(f"포트 {port}가 열리지 않았습니다.")
+
+
+@contextlib.contextmanager
+def _quiet_stdout():
+    """mitmproxy가 Flow마다 출력하는 로그가 JSON 결과에 섞이지 않도록 stdout을 잠시 버립니다. (자식 프로세스 포함)"""
+    sys.stdout.flush()
+    saved_stdout = os.dup(1)
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, 1)
+    try:
+        yield
+    finally:
+        sys.stdout.flush()
+        os.dup2(saved_stdout, 1)
+        os.close(saved_stdout)
+        os.close(devnull)
+
+
+def _rss_bytes() -> int:
+    """현재 프로세스의 RSS입니다. (/proc이 없으면 최대 RSS로 대신합니다)"""
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _upstream_server(port: int):
+    """작은 JSON을 keep-alive로 돌려주는 대상 서버입니다. (별도 프로세스에서 실행)"""
+    body = b'{"ok": true}'
+    response = (b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                b"Content-Length: " + str(len(body)).encode() + b"\r\n\r\n" + body)
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while await reader.readuntil(b"\r\n\r\n"):
+                writer.write(response)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            writer.close()
+
+    async def serve():
+        server = await asyncio.start_server(handle, "127.0.0.1", port)
+        async with server:
+            await server.serve_forever()
+
+    asyncio.run(serve())
+
+
+def _load_generator(proxy_port: int, upstream_port: int, requests: int, concurrency: int, result_conn):
+    """프록시를 거쳐 요청을 보내고 요청별 왕복 시간(초)을 돌려줍니다. (별도 프로세스에서 실행)"""
+    from bulk_replay import ConnectionPool, RequestTemplate, BulkReplayJob
+
+    template = RequestTemplate(f"GET /item/§1§ HTTP/1.1\nHost: 127.0.0.1:{upstream_port}\n\n",
+                               f"http://127.0.0.1:{upstream_port}/")
+    job = BulkReplayJob(template, [[]], results=None, proxy_port=proxy_port)
+    latencies = []
+
+    async def run():
+        pool = ConnectionPool("127.0.0.1", proxy_port, "http", "127.0.0.1", upstream_port)
+        remaining = iter(range(requests))
+
+        async def worker():
+            for i in remaining:
+                method, target, headers, body = template.render([str(i)])
+                start = time.perf_counter()
+                await job._send(pool, method, target, headers, body)
+                latencies.append(time.perf_counter() - start)
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        pool.close()
+
+    asyncio.run(run())
+    result_conn.send(latencies)
+
+
+def _simulate_gui(feed: FlowFeed, stop: threading.Event, gui_load: float):
+    """GUI 스레드 대역: 들어온 Flow를 꺼내고, gui_load 비율만큼 순수 파이썬 작업(레이아웃/렌더링)으로 GIL을 잡습니다."""
+    while not stop.is_set():
+        busy_until = time.perf_counter() + 0.01 * gui_load
+        while time.perf_counter() < busy_until:
+            sum(i * i for i in range(200))
+        feed.acknowledge()
+        while not feed.empty():
+            feed.get_nowait()
+        time.sleep(0.01 * (1 - gui_load))
+
+
+def bench_proxy_latency(requests: int = 3000, concurrency: int = 20, gui_load: float = 0.5) -> dict:
+    """프록시를 GUI와 같은 프로세스(MitmThread)와 별도 프로세스(ProxyProcess)로 실행해 왕복 지연을 비교합니다."""
+    from filters import FilterEngine
+    from flow_store import FlowStore
+    from openapi import OpenApiBuilder
+    from proxy import MitmThread
+    from proxy_process import ProxyProcess, IpcCommandChannel
+
+    context = multiprocessing.get_context("spawn")
+    upstream_port = _free_port()
+    upstream = context.Process(target=_upstream_server, args=(upstream_port,), daemon=True)
+    upstream.start()
+    _wait_for_port(upstream_port)
+
+    results = {}
+    try:
+        with _quiet_stdout():
+            for mode in ("in_thread", "out_of_process"):
+                flow_store = FlowStore()
+                feed = FlowFeed()
+                proxy_port = _free_port()
+                if mode == "in_thread":
+                    proxy = MitmThread(feed, AsyncChannel(), flow_store, FilterEngine(), OpenApiBuilder(),
+                                       listen_port=proxy_port)
+                else:
+                    proxy = ProxyProcess(feed, IpcCommandChannel(context), flow_store, FilterEngine(), OpenApiBuilder(),
+                                         listen_port=proxy_port)
+                proxy.start()
+                _wait_for_port(proxy_port)
+
+                stop = threading.Event()
+                gui = threading.Thread(target=_simulate_gui, args=(feed, stop, gui_load), daemon=True)
+                gui.start()
+
+                receive_conn, send_conn = context.Pipe(duplex=False)
+                generator = context.Process(target=_load_generator,
+                                            args=(proxy_port, upstream_port, requests, concurrency, send_conn))
+                started = time.perf_counter()
+                generator.start()
+                latencies = receive_conn.recv()
+                elapsed = time.perf_counter() - started
+                generator.join()
+
+                stop.set()
+                proxy.shutdown()
+                if mode == "in_thread":
+                    proxy.join(10)
+                flow_store.close()
+
+                results[mode] = _summarize(latencies)
+                results[mode]["requests_per_second"] = len(latencies) / elapsed
+    finally:
+        upstream.terminate()
+
+    results["settings"] = {"requests": requests, "concurrency": concurrency, "gui_load": gui_load}
+    return results
+
+
+# --- capture: 합성 트래픽으로 캡처 파이프라인 전체(MitmThread + PySideAddon + 저장소 + GUI 큐) 측정 ---
+
+# 프록시 요청 단계에서 끊기는 도메인 (DEFAULT_BLOCKED_DOMAINS에 포함, DNS 조회 전에 차단되므로 외부로 나가지 않음)
+_BLOCKED_HOST = "www.google-analytics.com"
+# 정적 파일 응답 (확장자/Content-Type 필터로 History에서 제외)
+_STATIC_BODY = bytes(range(256)) * 8
+_JSON_RECORD = b'{"id": 1024, "name": "synthetic item", "tags": ["alpha", "beta"], "price": 12.5},'
+
+
+def _self_signed_cert(directory: str) -> tuple[str, str]:
+    """HTTPS 대상 서버용 자체 서명 인증서를 만듭니다. (프록시는 ssl_insecure로 검증하지 않음)"""
+    import datetime
+    import ipaddress
+    from cryptography import x509
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import ec
+    from cryptography.x509.oid import NameOID
+
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "127.0.0.1")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (x509.CertificateBuilder()
+            .subject_name(name).issuer_name(name).public_key(key.public_key())
+            .serial_number(x509.random_serial_number())
+            .not_valid_before(now - datetime.timedelta(days=1))
+            .not_valid_after(now + datetime.timedelta(days=1))
+            .add_extension(x509.SubjectAlternativeName([x509.IPAddress(ipaddress.ip_address("127.0.0.1"))]),
+                           critical=False)
+            .sign(key, hashes.SHA256()))
+    cert_path = os.path.join(directory, "origin.pem")
+    key_path = os.path.join(directory, "origin.key")
+    with open(cert_path, "wb") as f:
+        f.write(cert.public_bytes(serialization.Encoding.PEM))
+    with open(key_path, "wb") as f:
+        f.write(key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8,
+                                  serialization.NoEncryption()))
+    return cert_path, key_path
+
+
+def _origin_server(http_port: int, https_port: int, cert_path: str, key_path: str):
+    """/body/<크기>는 그 크기의 JSON을, /static/...은 PNG를 keep-alive로 돌려주는 대상 서버입니다. (별도 프로세스)"""
+    import ssl
+
+    bodies: dict[int, bytes] = {}
+
+    def response_for(path: bytes) -> bytes:
+        if path.startswith(b"/static/"):
+            content_type, body = b"image/png", _STATIC_BODY
+        else:
+            size = int(path.split(b"?", 1)[0].rsplit(b"/", 1)[1])
+            body = bodies.get(size)
+            if body is None:
+                body = bodies[size] = (b"[" + _JSON_RECORD * (size // len(_JSON_RECORD) + 1))[:size]
+            content_type = b"application/json"
+        return (b"HTTP/1.1 200 OK\r\nContent-Type: " + content_type + b"\r\nContent-Length: "
+                + str(len(body)).encode() + b"\r\n\r\n" + body)
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                writer.write(response_for(head.split(b" ", 2)[1]))
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError, ssl.SSLError):
+            writer.close()
+
+    async def serve():
+        tls = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+        tls.load_cert_chain(cert_path, key_path)
+        plain = await asyncio.start_server(handle, "127.0.0.1", http_port)
+        secure = await asyncio.start_server(handle, "127.0.0.1", https_port, ssl=tls)
+        async with plain, secure:
+            await asyncio.gather(plain.serve_forever(), secure.serve_forever())
+
+    asyncio.run(serve())
+
+
+def _traffic_plan(requests: int, body_sizes: list[int], static_ratio: float, blocked_ratio: float,
+                  https_ratio: float, seed: int) -> list[tuple[str, str]]:
+    """요청 목록 [(종류, scheme), ...]을 seed로 고정해 만듭니다. 종류는 body:<크기>, static, blocked입니다."""
+    rng = random.Random(seed)
+    plan = []
+    for _ in range(requests):
+        roll = rng.random()
+        if roll < blocked_ratio:
+            # 차단 도메인은 CONNECT 단계에서 업스트림 연결을 시도하지 않도록 평문 HTTP로만 보냅니다.
+            plan.append(("blocked", "http"))
+            continue
+        kind = "static" if roll < blocked_ratio + static_ratio else f"body:{rng.choice(body_sizes)}"
+        plan.append((kind, "https" if rng.random() < https_ratio else "http"))
+    return plan
+
+
+def _capture_client(plan: list[tuple[str, str]], ports: dict[str, int], proxy_port: int | None,
+                    concurrency: int, result_conn):
+    """plan의 요청을 프록시(또는 proxy_port가 None이면 대상 서버에 직접) keep-alive로 보냅니다. (별도 프로세스)
+
+    종류별 왕복 시간(초)과 결과 개수, 전체 소요 시간을 돌려줍니다.
+    """
+    import ssl
+
+    tls = ssl.create_default_context()
+    tls.check_hostname = False
+    tls.verify_mode = ssl.CERT_NONE
+    latencies: dict[str, list[float]] = {}
+    outcomes = {"ok": 0, "http_error": 0, "killed": 0}
+
+    async def connect(scheme: str, host: str, port: int):
+        if proxy_port is None:
+            return await asyncio.open_connection("127.0.0.1", port, ssl=tls if scheme == "https" else None)
+        reader, writer = await asyncio.open_connection("127.0.0.1", proxy_port)
+        if scheme == "https":
+            writer.write(f"CONNECT {host}:{port} HTTP/1.1\r\nHost: {host}:{port}\r\n\r\n".encode())
+            await writer.drain()
+            await reader.readuntil(b"\r\n\r\n")
+            await writer.start_tls(tls, server_hostname=host)
+        return reader, writer
+
+    async def send(connection, scheme: str, host: str, port: int, path: str) -> int:
+        reader, writer = connection
+        target = path if proxy_port is None or scheme == "https" else f"http://{host}:{port}{path}"
+        writer.write(f"GET {target} HTTP/1.1\r\nHost: {host}:{port}\r\nAccept: */*\r\n\r\n".encode())
+        await writer.drain()
+        head = await reader.readuntil(b"\r\n\r\n")
+        length = 0
+        for line in head.split(b"\r\n")[1:]:
+            name, _, value = line.partition(b":")
+            if name.strip().lower() == b"content-length":
+                length = int(value)
+        await reader.readexactly(length)
+        return int(head.split(b" ", 2)[1])
+
+    async def run():
+        pending = iter(enumerate(plan))
+
+        async def worker():
+            connections = {}
+            for index, (kind, scheme) in pending:
+                host = _BLOCKED_HOST if kind == "blocked" else "127.0.0.1"
+                port = ports[scheme]
+                if kind == "static":
+                    path = f"/static/asset_{index}.png"
+                elif kind == "blocked":
+                    path = f"/collect?v=1&tid={index}"
+                else:
+                    path = f"/body/{kind.split(':')[1]}?i={index}"
+                key = (scheme, host)
+                started = time.perf_counter()
+                try:
+                    if key not in connections:
+                        connections[key] = await connect(scheme, host, port)
+                    status = await send(connections[key], scheme, host, port, path)
+                except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+                    # 프록시가 끊은 요청(차단 도메인)은 연결을 닫고 다음 요청에서 새로 엽니다.
+                    outcomes["killed"] += 1
+                    connections.pop(key)[1].close()
+                    continue
+                if status >= 400:
+                    # 프록시의 업스트림 오류 응답(502 등)은 지연 통계에 넣지 않습니다.
+                    outcomes["http_error"] += 1
+                    continue
+                latencies.setdefault(kind, []).append(time.perf_counter() - started)
+                outcomes["ok"] += 1
+            for _, writer in connections.values():
+                writer.close()
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+    if proxy_port is None:
+        # 직접 연결 기준선에서는 차단 도메인으로 나가지 않습니다.
+        plan = [entry for entry in plan if entry[0] != "blocked"]
+    started = time.perf_counter()
+    asyncio.run(run())
+    result_conn.send({"latencies": latencies, "outcomes": outcomes, "elapsed": time.perf_counter() - started})
+
+
+class _SampleRecorder:
+    """FlowFeed의 dwell 히스토그램 자리에 넣어 큐 대기 시간 원본 샘플을 모읍니다."""
+
+    def __init__(self):
+        self.samples: list[float] = []
+
+    def observe(self, seconds: float):
+        self.samples.append(seconds)
+
+
+def _mock_gui_consumer(feed: FlowFeed, wake: threading.Event, stop: threading.Event, batch_limit: int = 5000):
+    """MainWindow.check_queue 대역: notify로 깨어나 한 번에 최대 batch_limit개씩 꺼냅니다."""
+    while not stop.is_set():
+        if not wake.wait(0.05):
+            continue
+        wake.clear()
+        feed.acknowledge()
+        drained = 0
+        try:
+            while drained < batch_limit:
+                feed.get_nowait()
+                drained += 1
+        except queue.Empty:
+            continue
+        # 한도를 넘어 남은 항목은 다음 틱(이벤트 루프 양보 후)에 이어서 꺼냅니다.
+        wake.set()
+
+
+def bench_capture(requests: int = 5000, concurrency: int = 20, body_sizes: tuple[int, ...] = (512, 16384, 262144),
+                  static_ratio: float = 0.2, blocked_ratio: float = 0.05, https_ratio: float = 0.3,
+                  seed: int = 1) -> dict:
+    """로컬 HTTP/HTTPS 대상 서버와 합성 트래픽으로 Qt 창 없이 캡처 파이프라인을 측정합니다.
+
+    같은 요청 목록을 먼저 대상 서버에 직접 보내 기준 지연을 재고, 이어서 MitmThread를 거쳐 보내
+    처리량, 프록시가 더한 지연(p50/p99), 10k Flow당 RSS 증가량, 모의 GUI까지의 큐 대기 시간을 구합니다.
+    """
+    import tempfile
+    from filters import FilterEngine
+    from flow_store import FlowStore
+    from metrics import Metrics, summarize_histogram
+    from openapi import OpenApiBuilder
+    from proxy import MitmThread
+
+    context = multiprocessing.get_context("spawn")
+    plan = _traffic_plan(requests, list(body_sizes), static_ratio, blocked_ratio, https_ratio, seed)
+    cert_dir = tempfile.mkdtemp(prefix="pongpsuite-bench-")
+    cert_path, key_path = _self_signed_cert(cert_dir)
+    ports = {"http": _free_port(), "https": _free_port()}
+    origin = context.Process(target=_origin_server, args=(ports["http"], ports["https"], cert_path, key_path),
+                             daemon=True)
+    origin.start()
+    _wait_for_port(ports["http"])
+    _wait_for_port(ports["https"])
+
+    def drive(proxy_port: int | None) -> dict:
+        receive_conn, send_conn = context.Pipe(duplex=False)
+        client = context.Process(target=_capture_client, args=(plan, ports, proxy_port, concurrency, send_conn))
+        client.start()
+        result = receive_conn.recv()
+        client.join()
+        return result
+
+    results = {}
+    try:
+        direct = drive(None)
+
+        metrics = Metrics()
+        dwell = _SampleRecorder()
+        feed = FlowFeed(dwell)
+        wake = threading.Event()
+        stop = threading.Event()
+        feed.set_notify(wake.set)
+        consumer = threading.Thread(target=_mock_gui_consumer, args=(feed, wake, stop), daemon=True)
+        consumer.start()
+
+        flow_store = FlowStore()
+        proxy_port = _free_port()
+        proxy = MitmThread(feed, AsyncChannel(), flow_store, FilterEngine(), OpenApiBuilder(),
+                           listen_port=proxy_port, metrics=metrics)
+        with _quiet_stdout():
+            proxy.start()
+            try:
+                _wait_for_port(proxy_port)
+                # 대상 서버가 자체 서명 인증서를 쓰므로 업스트림 인증서 검증을 끕니다.
+                proxy.master.options.update(ssl_insecure=True)
+                gc.collect()
+                rss_before = _rss_bytes()
+                proxied = drive(proxy_port)
+                # 모의 GUI가 큐를 다 비울 때까지 기다린 뒤 메모리를 잽니다.
+                deadline = time.monotonic() + 30
+                while not feed.empty() and time.monotonic() < deadline:
+                    time.sleep(0.01)
+                gc.collect()
+                rss_after = _rss_bytes()
+            finally:
+                proxy.shutdown()
+                proxy.join(10)
+                stop.set()
+                flow_store.close()
+    finally:
+        origin.terminate()
+        shutil.rmtree(cert_dir, ignore_errors=True)
+
+    snapshot = metrics.snapshot()
+    flows = snapshot["pongpsuite_proxy_flows_total"]["series"]
+    recorded = flows.get("recorded", 0)
+    direct_all = [sample for samples in direct["latencies"].values() for sample in samples]
+    proxied_all = [sample for samples in proxied["latencies"].values() for sample in samples]
+    # 차단 요청은 기준선이 없으므로 추가 지연 비교에서 뺍니다.
+    compared = [sample for kind, samples in proxied["latencies"].items() if kind != "blocked" for sample in samples]
+    direct_summary = _summarize(direct_all)
+    compared_summary = _summarize(compared)
+
+    results["settings"] = {
+        "requests": requests, "concurrency": concurrency, "body_sizes": list(body_sizes),
+        "static_ratio": static_ratio, "blocked_ratio": blocked_ratio, "https_ratio": https_ratio, "seed": seed,
+    }
+    results["requests_per_second"] = len(plan) / proxied["elapsed"]
+    results["direct_requests_per_second"] = len(direct_all) / direct["elapsed"]
+    results["direct"] = direct_summary
+    results["proxied"] = _summarize(proxied_all)
+    results["added_latency_ms"] = {
+        "p50": compared_summary["p50_ms"] - direct_summary["p50_ms"],
+        "p99": compared_summary["p99_ms"] - direct_summary["p99_ms"],
+    } if compared and direct_all else None
+    results["by_kind"] = {kind: _summarize(samples) for kind, samples in sorted(proxied["latencies"].items())}
+    results["direct_outcomes"] = direct["outcomes"]
+    results["client_outcomes"] = proxied["outcomes"]
+    results["flows"] = flows
+    results["hooks"] = {
+        "request": summarize_histogram(snapshot["pongpsuite_request_hook_seconds"]),
+        "response": summarize_histogram(snapshot["pongpsuite_response_hook_seconds"]),
+    }
+    results["queue_drain"] = _summarize(dwell.samples)
+    results["rss"] = {
+        "before_mb": rss_before / 2**20,
+        "after_mb": rss_after / 2**20,
+        "per_10k_flows_mb": (rss_after - rss_before) / 2**20 / recorded * 10000 if recorded else None,
+    }
+    return results
+
+
+@dataclass
+class _DictFlowData:
+    """비교용: 슬롯/intern 없는 기존 형태의 Flow 메타데이터"""
+    flow_id: str
+    method: str
+    url: str
+    path: str
+    http_version: str
+    status_code: str
+    request_size: int = 0
+    response_size: int = 0
+    content_type: str = ""
+
+
+_REQUEST_HEADERS = [
+    ("Host", "api.example.com"), ("User-Agent", "Mozilla/5.0 (X11; Linux x86_64) Chrome/120.0"),
+    ("Accept", "application/json, text/plain, */*"), ("Accept-Language", "ko-KR,ko;q=0.9,en;q=0.8"),
+    ("Accept-Encoding", "gzip, deflate, br"), ("Referer", "https://app.example.com/"),
+    ("Origin", "https://app.example.com"), ("Connection", "keep-alive"), ("Sec-Fetch-Mode", "cors"),
+]
+_RESPONSE_HEADERS = [
+    ("Content-Type", "application/json; charset=utf-8"), ("Cache-Control", "no-cache"),
+    ("Server", "nginx"), ("Vary", "Accept-Encoding"), ("Set-Cookie", "a=1; Path=/"), ("Set-Cookie", "b=2; Path=/"),
+]
+
+
+def _synthetic_flow(i: int) -> tuple:
+    """(필드 바이트들, 요청 헤더, 응답 헤더) — 실제처럼 바이트 상태에서 디코딩하도록 바이트로 만듭니다."""
+    method = "GET" if i % 4 else "POST"
+    path = f"/api/v1/items/{i}?page={i % 10}"
+    fields = (str(uuid.uuid4()), method, f"https://api.example.com{path}", path,
+              "HTTP/1.1", str(200 if i % 10 else 404), "application/json; charset=utf-8")
+    request_headers = _REQUEST_HEADERS + [("Cookie", f"session={uuid.uuid4().hex}")]
+    encode = lambda pairs: [(k.encode(), v.encode()) for k, v in pairs]
+    return [f.encode() for f in fields], encode(request_headers), encode(_RESPONSE_HEADERS)
+
+
+def _measure(build, count: int) -> float:
+    """build(i)로 count개를 만들어 보관했을 때 늘어난 메모리를 Flow당 바이트로 반환합니다."""
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    kept = [build(i) for i in range(count)]
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+    del kept
+    return used / count
+
+
+def bench_flow_memory(flows: int = 50000) -> dict:
+    """Flow 레코드, 헤더, History 모델 행의 Flow당 메모리를 기존 형태와 비교합니다."""
+    from history_model import HistoryTableModel
+    from proxy import FlowData, decode_headers
+
+    samples = [_synthetic_flow(i) for i in range(flows)]
+    results = {}
+
+    def decoded(fields: list[bytes]) -> list[str]:
+        return [f.decode() for f in fields]
+
+    def record(cls, i: int):
+        # 문자열 필드는 바이트에서 디코딩하고, 바디 크기는 정수로 채웁니다.
+        *fields, content_type = decoded(samples[i][0])
+        return cls(*fields, 120 + i % 64, 2048 + i % 512, content_type)
+
+    def dict_headers(pairs: list[tuple[bytes, bytes]]) -> dict:
+        return {k.decode(): v.decode() for k, v in pairs}
+
+    results["flow_record"] = {
+        "dict_dataclass": _measure(lambda i: record(_DictFlowData, i), flows),
+        "slotted_interned": _measure(lambda i: record(FlowData, i), flows),
+    }
+    results["headers"] = {
+        # 기존: dict(flow.request.headers) — 중복 헤더(Set-Cookie)는 사라짐
+        "dict_copy": _measure(lambda i: (dict_headers(samples[i][1]), dict_headers(samples[i][2])), flows),
+        "interned_tuples": _measure(lambda i: (decode_headers(samples[i][1]), decode_headers(samples[i][2])), flows),
+    }
+
+    # History 모델: 행마다 문자열 리스트(기존) vs array 기반 컬럼.
+    # FlowData는 테이블에 추가된 뒤 버려지므로, 컬럼이 붙잡고 있는 메모리만 남습니다.
+    def list_columns(i: int, columns=([], [], [], [], [], [])):
+        flow_data = record(FlowData, i)
+        columns[0].append(flow_data.flow_id)
+        columns[1].append(flow_data.method)
+        columns[2].append(flow_data.url)
+        columns[3].append(flow_data.status_code)
+        columns[4].append(f"{flow_data.request_size:,}")
+        columns[5].append(f"{flow_data.response_size:,}")
+
+    def array_columns(count: int) -> float:
+        model = HistoryTableModel()
+        tracemalloc.start()
+        baseline = tracemalloc.get_traced_memory()[0]
+        # 실제 GUI처럼 배치 단위로 추가합니다.
+        for start in range(0, count, 1000):
+            model.append_flows([record(FlowData, i) for i in range(start, min(count, start + 1000))])
+        gc.collect()
+        used = tracemalloc.get_traced_memory()[0] - baseline
+        tracemalloc.stop()
+        return used / count
+
+    results["history_row"] = {"list_columns": _measure(list_columns, flows),
+                              "array_columns": array_columns(flows)}
+    for values in results.values():
+        legacy, compact = values.values()
+        values["saved_ratio"] = 1 - compact / legacy if legacy else 0.0
+    results["flows"] = flows
+    return results
+
+
+def _synthetic_page(items: int) -> str:
+    """인라인 스크립트/스타일, SVG 아이콘, 반복되는 상품 카드가 있는 전형적인 앱 페이지를 만듭니다."""
+    icon = '<svg viewBox="0 0 24 24" width="24" height="24"><path d="' + "M12 2L2 7l10 5 10-5-10-5z " * 8 + '"></path></svg>'
+    parts = ['<html><head><title>Shop</title><meta charset="utf-8">',
+             '<script>' + "window.__STATE__.push({id:1,payload:'abcdefghij'});" * 4000 + '</script>',
+             '<style>' + ".card-x1{display:flex;margin:0 4px;color:#333}" * 3000 + '</style></head><body>',
+             f'<header id="top"><a href="/">Home</a>{icon}<a href="/cart" class="nav-link">Cart</a></header>',
+             '<form action="/search" role="search"><input name="q" placeholder="Search products">'
+             f'<button type="submit">{icon}Go</button></form><main><div class="grid"><div class="row">']
+    for i in range(items):
+        parts.append(
+            f'<div class="card product-card" data-track-id="{uuid.uuid4()}" style="width:240px">'
+            f'<div class="card-body"><img src="/img/{i}.jpg" alt="Product {i}"><h3 class="title">Product {i}</h3>'
+            f'<p class="desc">A reasonably long marketing description for product number {i}.</p>'
+            f'<span class="price">${i}.99</span></div>'
+            f'<button class="btn add-to-cart" onclick="addToCart({i})">{icon}Add to cart</button></div>')
+    parts.append('</div></div></main><footer><a href="/terms">Terms</a></footer></body></html>')
+    return "".join(parts)
+
+
+def bench_dom_condense(html_path: str | None = None, items: int = 300, budget: int = 16000,
+                       live: bool = False) -> dict:
+    """AI 컨텍스트용 HTML 축약 전후의 크기/토큰과 처리 시간을 측정합니다.
+
+    live이면 GEMINI_API_KEY로 원본/축약 HTML을 각각 보내 응답까지의 지연도 비교합니다.
+    """
+    from dom_condenser import DomCondenser, estimate_tokens
+
+    if html_path:
+        with open(html_path, encoding="utf-8", errors="replace") as f:
+            page = f.read()
+    else:
+        page = _synthetic_page(items)
+
+    condenser = DomCondenser(budget)
+    cold = condenser.condense(page, "https://example.test/")
+    cached_times = []
+    for _ in range(20):
+        started = time.perf_counter()
+        condenser.condense(page, "https://example.test/")
+        cached_times.append(time.perf_counter() - started)
+
+    result = {
+        "original_bytes": cold.original_bytes,
+        "condensed_bytes": cold.condensed_bytes,
+        "original_tokens": cold.original_tokens,
+        "condensed_tokens": cold.condensed_tokens,
+        "reduction_ratio": cold.original_bytes / cold.condensed_bytes if cold.condensed_bytes else 0.0,
+        "level": cold.level,
+        "truncated": cold.truncated,
+        "condense_ms": cold.elapsed_ms,
+        "cached_lookup": _summarize(cached_times),
+        "token_budget": budget,
+    }
+
+    if live:
+        from dotenv import load_dotenv
+        import google.generativeai as genai
+
+        load_dotenv()
+        api_key = os.getenv("GEMINI_API_KEY")
+        if not api_key:
+            result["live"] = "GEMINI_API_KEY가 설정되지 않아 건너뜀"
+            return result
+        genai.configure(api_key=api_key)
+        model = genai.GenerativeModel('gemini-2.5-flash')
+        prompt = "List the interactive controls on this page in one short sentence.\n\n"
+        live_result = {}
+        for name, context in (("original", page), ("condensed", cold.text)):
+            started = time.perf_counter()
+            try:
+                model.generate_content(prompt + context)
+                live_result[name] = {"latency_ms": (time.perf_counter() - started) * 1000,
+                                     "prompt_tokens": estimate_tokens(prompt + context)}
+            except Exception as e:
+                live_result[name] = {"error": str(e)}
+        result["live"] = live_result
+    return result
+
+
+def bench_startup(runs: int = 5) -> dict:
+    """main.py --measure-startup을 새 프로세스로 여러 번 실행해 창이 보일 때까지의 시간을 잽니다.
+
+    화면이 없어도 돌 수 있도록 offscreen 플랫폼을 쓰고, 메트릭 포트는 끕니다.
+    """
+    import subprocess
+    main_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+    env = dict(os.environ, QT_QPA_PLATFORM=os.environ.get("QT_QPA_PLATFORM", "offscreen"))
+    imports, visible = [], []
+    eager_modules: set[str] = set()
+    for _ in range(runs):
+        completed = subprocess.run([sys.executable, main_path, "--measure-startup", "--metrics-port", "0"],
+                                   capture_output=True, text=True, env=env, timeout=60)
+        line = next((line for line in completed.stdout.splitlines() if line.startswith("{")), None)
+        if line is None:
+            raise RuntimeError(f"시작 시간 측정 실패: {completed.stderr.strip()[-500:]}")
+        timings = json.loads(line)
+        imports.append(timings["import_ms"] / 1000)
+        visible.append(timings["window_visible_ms"] / 1000)
+        eager_modules.update(timings["eager_modules"])
+    return {
+        "runs": runs,
+        "import_ms": _summarize(imports),
+        "window_visible_ms": _summarize(visible),
+        # 시작 시 불러오면 안 되는 모듈 중 실제로 불러온 것 (비어 있어야 정상)
+        "eager_modules": sorted(eager_modules),
+    }
+
+
+def _git_commit() -> str | None:
+    import subprocess
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PongpSuite benchmark")
+    subparsers = parser.add_subparsers(dest="suite", required=True)
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--output", help="결과 JSON을 저장할 파일 (stdout 출력은 그대로)")
+
+    def add_suite(name: str, help_text: str) -> argparse.ArgumentParser:
+        return subparsers.add_parser(name, help=help_text, parents=[common])
+
+    dispatch_parser = add_suite("dispatch", "명령 전달 지연 측정")
+    dispatch_parser.add_argument("--commands", type=int, default=200)
+
+    latency_parser = add_suite("proxy-latency", "프록시 왕복 지연 (스레드 vs 별도 프로세스)")
+    latency_parser.add_argument("--requests", type=int, default=3000)
+    latency_parser.add_argument("--concurrency", type=int, default=20)
+    latency_parser.add_argument("--gui-load", type=float, default=0.5,
+                                help="GUI 스레드가 GIL을 잡고 있는 시간 비율")
+
+    memory_parser = add_suite("flow-memory", "Flow당 메모리 사용량")
+    memory_parser.add_argument("--flows", type=int, default=50000)
+
+    condense_parser = add_suite("dom-condense", "AI 컨텍스트용 HTML 축약 효과")
+    condense_parser.add_argument("--html", help="측정할 HTML 파일 (없으면 합성 페이지)")
+    condense_parser.add_argument("--items", type=int, default=300, help="합성 페이지의 반복 카드 수")
+    condense_parser.add_argument("--budget", type=int, default=16000)
+    condense_parser.add_argument("--live", action="store_true", help="Gemini 왕복 지연도 측정")
+
+    capture_parser = add_suite("capture", "합성 트래픽으로 캡처 파이프라인 처리량/지연/메모리 측정")
+    capture_parser.add_argument("--requests", type=int, default=5000)
+    capture_parser.add_argument("--concurrency", type=int, default=20)
+    capture_parser.add_argument("--body-sizes", default="512,16384,262144",
+                                help="응답 바디 크기 목록 (bytes, 쉼표 구분, 균등하게 선택)")
+    capture_parser.add_argument("--static-ratio", type=float, default=0.2, help="정적 파일(.png) 요청 비율")
+    capture_parser.add_argument("--blocked-ratio", type=float, default=0.05, help="차단 도메인 요청 비율")
+    capture_parser.add_argument("--https-ratio", type=float, default=0.3, help="HTTPS(CONNECT) 요청 비율")
+    capture_parser.add_argument("--seed", type=int, default=1, help="요청 목록을 고정하는 난수 seed")
+
+    startup_parser = add_suite("startup", "창이 보일 때까지의 시작 시간 (main.py --measure-startup)")
+    startup_parser.add_argument("--runs", type=int, default=5)
+
+    args = parser.parse_args()
+    if args.suite == "dispatch":
+        result = bench_command_dispatch(args.commands)
+    elif args.suite == "proxy-latency":
+        result = bench_proxy_latency(args.requests, args.concurrency, args.gui_load)
+    elif args.suite == "flow-memory":
+        result = bench_flow_memory(args.flows)
+    elif args.suite == "dom-condense":
+        result = bench_dom_condense(args.html, args.items, args.budget, args.live)
+    elif args.suite == "capture":
+        body_sizes = tuple(int(size) for size in args.body_sizes.split(",") if size.strip())
+        result = bench_capture(args.requests, args.concurrency, body_sizes, args.static_ratio,
+                               args.blocked_ratio, args.https_ratio, args.seed)
+    elif args.suite == "startup":
+        result = bench_startup(args.runs)
+
+    output = json.dumps({"suite": args.suite, "commit": _git_commit(), "python": sys.version.split()[0],
+                         "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"), "result": result}, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
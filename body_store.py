@@ -0,0 +1,265 @@
+import hashlib
+import io
+import os
+import sqlite3
+import threading
+import uuid
+import zlib
+
+try:
+    import zstandard
+except ImportError:  # mitmproxy 의존성으로 보통 설치되어 있지만, 없으면 zlib을 사용합니다.
+    zstandard = None
+
+CODEC_RAW = "raw"
+CODEC_ZLIB = "zlib"
+CODEC_ZSTD = "zstd"
+# 이보다 작은 바디는 압축해도 이득이 거의 없습니다.
+MIN_COMPRESS_SIZE = 256
+ZSTD_LEVEL = 3
+ZLIB_LEVEL = 6
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+class BodySpool:
+    """스트리밍되는 바디를 프록시 메모리에 쌓지 않고 디스크 파일로 흘려보내는(tee) 콜백입니다.
+
+    mitmproxy의 message.stream에 지정하면 청크마다 호출되며, 받은 청크를 그대로 반환해
+    클라이언트로 전달합니다. 쓰는 동안 해시도 함께 계산하고, 스트림 끝(b"")에서 파일을 닫습니다.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.file_name = os.path.basename(path)
+        self.size = 0
+        self._hash = hashlib.blake2b(digest_size=16)
+        self._file = open(path, 'wb')
+
+    def __call__(self, data: bytes) -> bytes:
+        if data:
+            self._file.write(data)
+            self._hash.update(data)
+            self.size += len(data)
+        else:
+            self.close()
+        return data
+
+    def hexdigest(self) -> str:
+        return self._hash.hexdigest()
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+
+class BodyStore:
+    """내용 해시로 주소를 매기는 바디 저장소입니다.
+
+    같은 바디(폴링 응답, 반복되는 오류 페이지 등)는 한 번만 압축(zstd, 없으면 zlib)해 저장하고
+    Flow는 해시만 참조합니다. 참조 수가 0이 되면 바디를 삭제합니다. 큰 바디는 DB 대신
+    해시 이름의 파일로 저장합니다. FlowStore와 같은 SQLite 연결/락을 사용하므로 트랜잭션을 함께 씁니다.
+    """
+
+    def __init__(self, conn: sqlite3.Connection, lock: threading.Lock, body_dir: str, spill_threshold: int):
+        self._conn = conn
+        self._lock = lock
+        self.body_dir = body_dir
+        self.spill_threshold = spill_threshold
+        self.codec = CODEC_ZSTD if zstandard is not None else CODEC_ZLIB
+        # zstandard 압축기는 스레드 간에 공유할 수 없으므로 스레드마다 만듭니다.
+        self._local = threading.local()
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS bodies (
+                hash TEXT PRIMARY KEY,
+                codec TEXT NOT NULL,
+                raw_size INTEGER NOT NULL,
+                stored_size INTEGER NOT NULL,
+                refcount INTEGER NOT NULL,
+                data BLOB,
+                file_name TEXT
+            )
+        """)
+
+    def _compress(self, data: bytes) -> tuple[str, bytes]:
+        if len(data) < MIN_COMPRESS_SIZE:
+            return CODEC_RAW, data
+        if self.codec == CODEC_ZSTD:
+            compressor = getattr(self._local, "compressor", None)
+            if compressor is None:
+                compressor = self._local.compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL)
+            compressed = compressor.compress(data)
+        else:
+            compressed = zlib.compress(data, ZLIB_LEVEL)
+        # 이미 압축된 바디(gzip/br 응답, 이미지)는 다시 압축해도 작아지지 않으므로 그대로 둡니다.
+        if len(compressed) >= len(data):
+            return CODEC_RAW, data
+        return self.codec, compressed
+
+    @staticmethod
+    def _decompress(codec: str, data: bytes) -> bytes:
+        if codec == CODEC_ZSTD:
+            return zstandard.ZstdDecompressor().decompress(data)
+        if codec == CODEC_ZLIB:
+            return zlib.decompress(data)
+        return data
+
+    def _add_reference(self, digest: str) -> bool:
+        """이미 저장된 바디면 참조 수를 올리고 True를 반환합니다. (lock 보유 상태에서 호출)"""
+        cursor = self._conn.execute("UPDATE bodies SET refcount = refcount + 1 WHERE hash = ?", (digest,))
+        return cursor.rowcount > 0
+
+    def put(self, data: bytes) -> str | None:
+        """바디를 저장(또는 기존 바디의 참조 수를 증가)하고 해시를 반환합니다. 빈 바디는 None입니다.
+
+        커밋은 호출한 쪽(FlowStore)의 트랜잭션에서 함께 합니다.
+        """
+        if not data:
+            return None
+        digest = content_hash(data)
+        with self._lock:
+            if self._add_reference(digest):
+                return digest
+        # 압축과 파일 쓰기는 락 밖에서 합니다. 파일은 고유한 임시 이름으로 쓰고, 락 안에서 행을 새로
+        # 만들 때만 해시 이름으로 옮깁니다. 그 사이 같은 바디(put/adopt_spool)가 먼저 등록됐으면
+        # 참조 수만 올리고 임시 파일을 지우므로, 다른 스레드가 읽거나 지우는 파일을 덮어쓰지 않습니다.
+        codec, stored = self._compress(data)
+        temp_name = None
+        if len(stored) > self.spill_threshold:
+            temp_name = f"{digest}.{uuid.uuid4().hex}.tmp"
+            with open(os.path.join(self.body_dir, temp_name), 'wb') as f:
+                f.write(stored)
+        with self._lock:
+            duplicate = self._add_reference(digest)
+            if not duplicate:
+                if temp_name:
+                    os.replace(os.path.join(self.body_dir, temp_name), os.path.join(self.body_dir, digest))
+                self._conn.execute(
+                    "INSERT INTO bodies (hash, codec, raw_size, stored_size, refcount, data, file_name) "
+                    "VALUES (?, ?, ?, ?, 1, ?, ?)",
+                    (digest, codec, len(data), len(stored), None if temp_name else stored,
+                     digest if temp_name else None)
+                )
+        if duplicate and temp_name:
+            self._remove_file(temp_name)
+        return digest
+
+    def adopt_spool(self, spool: BodySpool) -> str | None:
+        """스트리밍으로 기록된 spool 파일을 해시 이름의 바디로 등록합니다. (이미 있으면 파일을 지움)
+
+        스트리밍 바디는 보통 매우 크므로 다시 읽어 압축하지 않고 원본 그대로 둡니다.
+        """
+        spool.close()
+        if spool.size == 0:
+            self._remove_file(spool.file_name)
+            return None
+        digest = spool.hexdigest()
+        with self._lock:
+            if self._add_reference(digest):
+                duplicate = True
+            else:
+                duplicate = False
+                os.replace(spool.path, os.path.join(self.body_dir, digest))
+                self._conn.execute(
+                    "INSERT INTO bodies (hash, codec, raw_size, stored_size, refcount, data, file_name) "
+                    "VALUES (?, ?, ?, ?, 1, NULL, ?)",
+                    (digest, CODEC_RAW, spool.size, spool.size, digest)
+                )
+        if duplicate:
+            self._remove_file(spool.file_name)
+        return digest
+
+    def get(self, digest: str | None) -> bytes:
+        if not digest:
+            return b""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT codec, data, file_name FROM bodies WHERE hash = ?", (digest,)
+            ).fetchone()
+        if row is None:
+            return b""
+        codec, data, file_name = row
+        if file_name:
+            with open(os.path.join(self.body_dir, file_name), 'rb') as f:
+                data = f.read()
+        return self._decompress(codec, data or b"")
+
+    def get_prefix(self, digest: str | None, limit: int) -> bytes:
+        """저장된 바디의 앞 limit 바이트만 읽습니다. 큰 파일도 전부 읽거나 풀지 않습니다."""
+        if not digest:
+            return b""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT codec, data, file_name FROM bodies WHERE hash = ?", (digest,)
+            ).fetchone()
+        if row is None:
+            return b""
+        codec, data, file_name = row
+        if file_name:
+            source = open(os.path.join(self.body_dir, file_name), 'rb')
+        else:
+            source = io.BytesIO(data or b"")
+        with source:
+            if codec == CODEC_ZSTD:
+                reader = zstandard.ZstdDecompressor().stream_reader(source, read_across_frames=True)
+                parts = []
+                size = 0
+                while size < limit:
+                    part = reader.read(min(limit - size, 64 * 1024))
+                    if not part:
+                        break
+                    parts.append(part)
+                    size += len(part)
+                return b"".join(parts)
+            if codec == CODEC_ZLIB:
+                decompressor = zlib.decompressobj()
+                parts = []
+                size = 0
+                while size < limit and not decompressor.eof:
+                    chunk = decompressor.unconsumed_tail or source.read(64 * 1024)
+                    if not chunk:
+                        break
+                    part = decompressor.decompress(chunk, limit - size)
+                    parts.append(part)
+                    size += len(part)
+                return b"".join(parts)
+            return source.read(limit)
+
+    def release(self, digests: list[str | None]):
+        """참조 수를 줄이고 더 이상 쓰이지 않는 바디를 삭제합니다. (lock 보유 상태, 커밋은 호출한 쪽에서)"""
+        for digest in digests:
+            if not digest:
+                continue
+            row = self._conn.execute(
+                "UPDATE bodies SET refcount = refcount - 1 WHERE hash = ? RETURNING refcount, file_name", (digest,)
+            ).fetchone()
+            if row is not None and row[0] <= 0:
+                self._conn.execute("DELETE FROM bodies WHERE hash = ?", (digest,))
+                if row[1]:
+                    self._remove_file(row[1])
+
+    def _remove_file(self, file_name: str):
+        try:
+            os.remove(os.path.join(self.body_dir, file_name))
+        except OSError:
+            pass
+
+    def stats(self) -> dict:
+        """중복 제거 비율(참조된 원본 크기 / 고유 원본 크기)과 압축 비율(고유 원본 크기 / 저장 크기)을 반환합니다."""
+        with self._lock:
+            unique, references, logical, unique_raw, stored = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(refcount), 0), COALESCE(SUM(raw_size * refcount), 0), "
+                "COALESCE(SUM(raw_size), 0), COALESCE(SUM(stored_size), 0) FROM bodies"
+            ).fetchone()
+        return {
+            "unique_bodies": unique,
+            "references": references,
+            "logical_bytes": logical,
+            "unique_bytes": unique_raw,
+            "stored_bytes": stored,
+            "dedupe_ratio": logical / unique_raw if unique_raw else 1.0,
+            "compression_ratio": unique_raw / stored if stored else 1.0,
+            "total_ratio": logical / stored if stored else 1.0,
+        }
@@ -1,18 +1,34 @@
 import asyncio
-import queue
 import json
+import time
 from PySide6.QtCore import QThread
-from playwright.async_api import async_playwright
 import os
-import google.generativeai as genai
-from dotenv import load_dotenv
+
+from ai_client import AiClient, ResponseCache, ResultFieldStreamer
+from browser_pool import BrowserPool, BrowserReplayJob, DEFAULT_POOL_SIZE
+from bulk_replay import BulkReplayResult, BulkReplaySummary
+from channel import AsyncChannel
+from dom_condenser import DomCondenser, DEFAULT_TOKEN_BUDGET, estimate_tokens
+from metrics import Metrics
 
 class PlaywrightThread(QThread):
-    def __init__(self, browser_command_queue: queue.Queue, parent=None):
+    def __init__(self, browser_command_queue: AsyncChannel, parent=None,
+                 ai_token_budget: int = DEFAULT_TOKEN_BUDGET, browser_pool_size: int = DEFAULT_POOL_SIZE,
+                 metrics: Metrics | None = None):
         super().__init__(parent)
         self.command_queue = browser_command_queue
         self.page = None
-        
+        # AI 프롬프트에 넣기 전에 페이지 HTML을 줄이는 단계 (URL + DOM 해시로 캐시)
+        self.dom_condenser = DomCondenser(ai_token_budget)
+        # Gemini 클라이언트는 스레드마다 한 번만 만들고, 같은 질문의 응답은 잠시 재사용합니다.
+        self.ai_client = AiClient()
+        self.ai_cache = ResponseCache()
+        # 브라우저 쪽 리플레이/렌더링을 나눠 처리하는 컨텍스트 풀 (start_browser에서 생성)
+        self.browser_pool_size = browser_pool_size
+        self.browser_pool: BrowserPool | None = None
+        # 브라우저 리플레이 왕복 시간과 AI 호출 시간을 기록합니다.
+        self.metrics = metrics or Metrics()
+
     def run(self):
         """Playwright를 실행하여 브라우저를 엽니다."""
         try:
@@ -20,66 +36,79 @@ class PlaywrightThread(QThread):
         except Exception as e:
             print(f"Playwright 스레드 오류: {e}")
 
-    async def poll_command_queue(self):
-        """GUI로부터 오는 명령을 처리합니다."""
-        print("Playwright 명령 큐 폴링 시작...")
+    async def process_commands(self):
+        """GUI로부터 오는 명령을 채널에서 받는 즉시 처리합니다.
+
+        리플레이/렌더링은 브라우저 풀에서 백그라운드로 실행되므로 여러 건이 동시에 진행됩니다.
+        """
+        print("Playwright 명령 채널 대기 시작...")
+        self.command_queue.bind()
         while True:
+            command = await self.command_queue.get()
             try:
-                command = self.command_queue.get_nowait()
-                if command[0] == 'replay':
-                    request_text = command[1]
-                    await self.replay_in_browser(request_text)
-                elif command[0] == 'render':
+                if command[0] == 'render':
                     html_content = command[1]
-                    await self.render_in_browser(html_content)
-            except queue.Empty:
-                await asyncio.sleep(0.1)
+                    self.browser_pool.submit(self.render_in_browser(html_content))
+                elif command[0] == 'replay_batch':
+                    job = command[1]
+                    self.browser_pool.submit(self.run_browser_replay_job(job), key=job.job_id)
+                elif command[0] == 'cancel':
+                    # ('cancel',)은 전체, ('cancel', job_id)는 해당 작업만 취소합니다.
+                    key = command[1] if len(command) > 1 else None
+                    print(f"브라우저 작업 {self.browser_pool.cancel(key)}건 취소")
             except Exception as e:
                 print(f"Playwright 명령 처리 중 오류: {e}")
 
-    async def replay_in_browser(self, request_text: str):
-        """브라우저의 현재 페이지에서 fetch를 사용하여 요청을 보냅니다."""
-        if not self.page:
-            print("오류: Playwright 페이지가 준비되지 않았습니다.")
-            return
-
-        print("브라우저에서 fetch 요청 실행...")
+    async def run_browser_replay_job(self, job: BrowserReplayJob):
+        """Bulk Replay 작업(단건 Replay in Browser 포함)을 브라우저 풀에서 실행하고 결과를 작업의 피드로 보냅니다."""
+        started = time.perf_counter()
+        completed = 0
+        errors = 0
+        cancelled = False
+        # 보냈지만 아직 결과가 오지 않은 요청의 페이로드만 들고 있습니다.
+        payloads: dict[int, tuple] = {}
+
+        def requests():
+            for index, (used, request) in enumerate(job.requests):
+                payloads[index] = used
+                yield request
+
+        def on_results(chunk: list[tuple[int, dict]]):
+            nonlocal completed, errors
+            for index, result in chunk:
+                completed += 1
+                errors += 1 if result["error"] else 0
+                job.results.put(BulkReplayResult(
+                    index, payloads.pop(index), result["status"], result["length"], result["duration_ms"],
+                    result["error"], tuple(tuple(pair) for pair in result["headers"])))
+
+        print(f"브라우저 Bulk Replay 시작 (Job {job.job_id}): 동시성={job.concurrency}")
         try:
-            # 브라우저 컨텍스트에서 실행할 JavaScript 코드
-            # request_text를 파싱하여 fetch 옵션을 만듭니다.
-            js_code = f"""
-            async (rawRequest) => {{
-                const parts = rawRequest.replace(/\\r\\n/g, '\\n').split('\\n\\n');
-                const headerPart = parts[0];
-                const body = parts.length > 1 ? parts[1] : undefined;
-                const headerLines = headerPart.split('\\n');
-                const [method, path, ..._] = headerLines.shift().split(' ');
-                const headers = {{}};
-                headerLines.forEach(line => {{ const [key, value] = line.split(/:(.*)/s); if (key) headers[key.trim()] = value.trim(); }});
-                
-                const options = {{ method, headers }};
-                if (method.toUpperCase() !== 'GET' && method.toUpperCase() !== 'HEAD') {{
-                    options.body = body;
-                }}
-
-                await fetch(path, options);
-            }}
-            """
-            await self.page.evaluate(js_code, request_text)
-            print("브라우저 fetch 요청 완료.")
+            await self.browser_pool.replay_batch(requests(), job.concurrency, on_results)
+        except asyncio.CancelledError:
+            cancelled = True
         except Exception as e:
-            print(f"브라우저에서 요청 리플레이 중 오류 발생: {e}")
+            print(f"브라우저 Bulk Replay 오류: {e}")
+        finally:
+            elapsed = time.perf_counter() - started
+            job.results.put(BulkReplaySummary(job.job_id, completed, errors, elapsed,
+                                              completed / elapsed if elapsed else 0.0, cancelled))
+            print(f"브라우저 Bulk Replay 종료 (Job {job.job_id}): {completed}건, {elapsed:.2f}초")
 
     async def render_in_browser(self, html_content: str):
-        """브라우저의 현재 페이지 내용을 주어진 HTML로 설정합니다."""
-        if not self.page:
-            print("오류: Playwright 페이지가 준비되지 않았습니다.")
+        """주어진 HTML을 브라우저의 새 탭에 렌더링합니다. (작업 중인 페이지는 그대로 둠)"""
+        if not self.browser_pool:
+            print("오류: Playwright 브라우저가 준비되지 않았습니다.")
             return
         
         print("브라우저에서 응답 렌더링 실행...")
         try:
-            await self.page.set_content(html_content)
+            await self.browser_pool.render(html_content)
             print("브라우저 응답 렌더링 완료.")
+        except asyncio.TimeoutError:
+            print(f"브라우저 응답 렌더링 시간 초과 ({self.browser_pool.timeout:.0f}초)")
+        except asyncio.CancelledError:
+            print("브라우저 응답 렌더링이 취소되었습니다.")
         except Exception as e:
             print(f"브라우저에서 응답 렌더링 중 오류 발생: {e}")
 
@@ -92,6 +121,15 @@ class PlaywrightThread(QThread):
         except Exception as e:
             print(f"AI 응답 조각 전송 중 오류: {e}")
 
+    async def _stream_ai_chunk_to_browser(self, chunk: str):
+        """스트리밍 중인 result 텍스트를 현재 응답 단계에 이어 붙입니다."""
+        if not self.page:
+            return
+        try:
+            await self.page.evaluate("window.appendAiResponseChunk", chunk)
+        except Exception as e:
+            print(f"AI 응답 조각 전송 중 오류: {e}")
+
     async def _apply_html_updates_in_browser(self, updates: list):
         """AI가 생성한 HTML 수정사항을 브라우저에 적용하도록 명령합니다."""
         if not self.page or not updates:
@@ -112,8 +150,13 @@ class PlaywrightThread(QThread):
             context_info.append(f"--- Current Page URL ---\n{current_url}")
 
         if html_content:
-            print(f"[AI Prompt] HTML 콘텐츠 포함 (길이: {len(html_content)} bytes)")
-            context_info.append(f"--- Current Page HTML ---\n{html_content}")
+            # 파싱은 수십~수백 ms 걸릴 수 있으므로 Playwright 이벤트 루프 밖에서 합니다.
+            condensed = await asyncio.to_thread(self.dom_condenser.condense, html_content, current_url)
+            print(f"[AI Prompt] HTML 콘텐츠 축약: {condensed.summary()}")
+            context_info.append(
+                "--- Current Page HTML (condensed: scripts/styles/SVG removed, repeated siblings collapsed; "
+                "the `sel` attribute is a CSS selector for elements without a stable id) ---\n"
+                f"{condensed.text}")
 
         if previous_context:
             if "original_prompt" in previous_context:
@@ -151,34 +194,54 @@ IMPORTANT: Your response MUST be in the following JSON format. Your primary goal
   ]
 }"""
         final_prompt = f"{prompt}\n\n{context_str}\n\n{json_format_instruction}"
+        started = time.perf_counter()
 
         try:
-            # 1. API 키 설정 (환경 변수에서 로드)
-            load_dotenv() # .env 파일에서 환경 변수를 로드합니다.
-            api_key = os.getenv("GEMINI_API_KEY") 
-            
-            if not api_key:
-                error_message = "[AI Error] GEMINI_API_KEY 환경 변수가 설정되지 않았습니다."
-                print(error_message)
-                await self._send_ai_chunk_to_browser(error_message)
-                return
-
-            genai.configure(api_key=api_key)
+            # 같은 질문 + 같은 컨텍스트(축약된 페이지, 이전 jscode 결과)면 저장된 응답을 그대로 씁니다.
+            cache_key = self.ai_cache.key(prompt, context_str)
+            full_response = self.ai_cache.get(cache_key)
+            source = "api" if full_response is None else "cache"
+            streamed_result = False
 
-            # 2. 모델 초기화 및 스트리밍으로 프롬프트 전송
-            model = genai.GenerativeModel('gemini-2.5-flash')
-            response_stream = await model.generate_content_async(final_prompt, stream=True)
-
-            # 3. 스트리밍 결과를 실시간으로 브라우저에 전송
             # Only start a new response area if it's the first step in a chain
             if not previous_context and self.page:
                 await self.page.evaluate("window.startAiResponse()")
 
-            full_response = ""
-            async for chunk in response_stream:
-                full_response += chunk.text
-            
+            if full_response is not None:
+                print(f"[AI] 캐시된 응답 사용 (hits {self.ai_cache.hits}, misses {self.ai_cache.misses})")
+            else:
+                # 1. 한 번 만들어 둔 모델 사용 (API 키는 첫 호출 때 .env/환경 변수에서 로드)
+                model = self.ai_client.model()
+                if model is None:
+                    error_message = "[AI Error] GEMINI_API_KEY 환경 변수가 설정되지 않았습니다."
+                    print(error_message)
+                    await self._send_ai_chunk_to_browser(error_message)
+                    return
+
+                # 2. 스트리밍으로 프롬프트 전송
+                response_stream = await model.generate_content_async(final_prompt, stream=True)
+
+                # 3. 응답 JSON의 result 필드를 도착하는 대로 브라우저에 전송
+                streamer = ResultFieldStreamer()
+                parts = []
+                first_token_at = None
+                async for chunk in response_stream:
+                    parts.append(chunk.text)
+                    piece = streamer.feed(chunk.text)
+                    if piece:
+                        if first_token_at is None:
+                            first_token_at = time.perf_counter()
+                        streamed_result = True
+                        await self._stream_ai_chunk_to_browser(piece)
+                full_response = "".join(parts)
+                if first_token_at is not None:
+                    self.metrics.ai_first_token.observe(first_token_at - started)
+                    print(f"[AI] 첫 result 텍스트까지 {first_token_at - started:.2f}초")
+
+            self.metrics.ai_call.observe(time.perf_counter() - started, source)
             print(f"[AI Raw Response]\n---\n{full_response}\n---")
+            print(f"[AI] 응답 수신: {time.perf_counter() - started:.2f}초 "
+                  f"(프롬프트 ~{estimate_tokens(final_prompt):,} tokens)")
 
             # 4. JSON 파싱 및 결과 전송
             try:
@@ -186,9 +249,13 @@ IMPORTANT: Your response MUST be in the following JSON format. Your primary goal
                 json_match = re.search(r'\{.*\}', full_response, re.DOTALL)
                 if json_match:
                     json_data = json.loads(json_match.group(0))
-                    # 1. 항상 result 값을 브라우저에 표시
+                    self.ai_cache.put(cache_key, full_response)
+                    # 1. 항상 result 값을 브라우저에 표시 (스트리밍으로 이미 보냈으면 단계만 마무리)
                     result_text = json_data.get("result")
-                    if result_text:
+                    if streamed_result:
+                        if self.page:
+                            await self.page.evaluate("window.finishAiResponseStep()")
+                    elif result_text:
                         await self._send_ai_chunk_to_browser(result_text + "\n")
 
                     # 2. isOnlyAnswer가 false이고 updates가 있으면 HTML 수정/jscode 실행 적용
@@ -237,6 +304,9 @@ IMPORTANT: Your response MUST be in the following JSON format. Your primary goal
 
     async def start_browser(self):
         """사용자가 수동으로 탐색할 수 있도록 프록시가 설정된 브라우저를 실행합니다."""
+        # Playwright는 "Open Browser"를 누를 때 처음 불러옵니다. (앱 시작 시간에서 제외)
+        from playwright.async_api import async_playwright
+
         async with async_playwright() as p:
             disconnected_future = asyncio.Future()
 
@@ -256,28 +326,37 @@ IMPORTANT: Your response MUST be in the following JSON format. Your primary goal
             browser = await p.chromium.launch(headless=False, args=chromium_args)
             browser.on("disconnected", on_disconnected)
             
-            context = await browser.new_context(proxy={"server": "http://127.0.0.1:8080"}, ignore_https_errors=True)
+            proxy_server = "http://127.0.0.1:8080"
+            context = await browser.new_context(proxy={"server": proxy_server}, ignore_https_errors=True)
 
             # --- [핵심] Python 함수를 브라우저의 window 객체에 노출 ---
             await context.expose_function("handleAiPrompt", self.handle_ai_prompt)
 
-            # script.js 파일에서 스크립트를 읽어와 모든 페이지에 주입
-            script_path = os.path.join(os.path.dirname(__file__), 'script.js')
-            with open(script_path, 'r', encoding='utf-8') as f:
-                script = f.read()
-            await context.add_init_script(script)
+            # 리플레이용 fetch 헬퍼와 script.js를 읽어와 모든 페이지에 주입
+            scripts = {}
+            for name in ('replay_helper.js', 'script.js'):
+                script_path = os.path.join(os.path.dirname(__file__), name)
+                with open(script_path, 'r', encoding='utf-8') as f:
+                    scripts[name] = f.read()
+                await context.add_init_script(scripts[name])
 
             self.page = await context.new_page()
+            self.browser_pool = BrowserPool(p, context, proxy_server, scripts['replay_helper.js'],
+                                            self.browser_pool_size, launch_args=chromium_args)
             
             print(f"Playwright 브라우저가 시작되었습니다.")
             await self.page.goto("about:blank")
 
-            # 브라우저 닫힘 이벤트와 명령 큐 폴링을 동시에 대기
-            await asyncio.gather(
-                disconnected_future,
-                self.poll_command_queue()
-            )
+            # 브라우저가 닫힐 때까지 명령 채널을 처리합니다.
+            command_task = asyncio.create_task(self.process_commands())
+            try:
+                await disconnected_future
+            finally:
+                command_task.cancel()
+                self.command_queue.unbind()
+                await self.browser_pool.close()
 
             await browser.close()
             self.page = None
+            self.browser_pool = None
 import re
\ No newline at end of file
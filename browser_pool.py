@@ -0,0 +1,250 @@
+import asyncio
+import base64
+import itertools
+import uuid
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from urllib.parse import urlsplit
+
+from channel import FlowFeed
+
+DEFAULT_POOL_SIZE = 4
+DEFAULT_JOB_TIMEOUT = 30.0
+# 풀 페이지를 대상 origin의 빈 문서로 만들 때 쓰는 경로. 요청은 route에서 바로 응답하므로 서버로 나가지 않습니다.
+BLANK_PATH = "/__pongpsuite_blank__"
+
+# 한 번의 evaluate로 보내는 최대 요청 수. 큰 배치는 이 단위로 나눠 풀 컨텍스트들에 분배합니다.
+MAX_REQUESTS_PER_EVALUATE = 100
+# 조각 하나에 담는 요청 수 = 컨텍스트당 동시성 x 이 값 (MAX_REQUESTS_PER_EVALUATE 이하)
+ROUNDS_PER_EVALUATE = 4
+# 브라우저에서 직접 처리하므로 fetch에 넘기지 않는 헤더
+_SKIPPED_HEADERS = {"host", "content-length", "connection", "transfer-encoding"}
+
+# 요청 결과: {"status", "headers": [[이름, 값], ...], "length", "duration_ms", "error"}
+ReplayResult = dict
+
+
+def request_origin(request_text: str, fallback_url: str | None = None) -> str | None:
+    """요청 텍스트의 대상 origin을 구합니다. (절대 URL > Host 헤더 > 사용자가 보던 페이지)"""
+    lines = request_text.replace("\r\n", "\n").split("\n")
+    target = lines[0].split(" ")[1] if len(lines[0].split(" ")) > 1 else ""
+    if target.startswith(("http://", "https://")):
+        parts = urlsplit(target)
+        return f"{parts.scheme}://{parts.netloc}"
+
+    fallback = urlsplit(fallback_url) if fallback_url and fallback_url.startswith("http") else None
+    for line in lines[1:]:
+        if not line:
+            break
+        name, _, value = line.partition(":")
+        if name.strip().lower() == "host":
+            host = value.strip()
+            scheme = fallback.scheme if fallback and fallback.netloc == host else "https"
+            return f"{scheme}://{host}"
+    if fallback:
+        return f"{fallback.scheme}://{fallback.netloc}"
+    return None
+
+
+def parse_raw_request(request_text: str, fallback_url: str | None = None) -> dict:
+    """Raw HTTP 요청 텍스트를 fetch 헬퍼가 받는 {method, url, headers, body} 형태로 바꿉니다."""
+    origin = request_origin(request_text, fallback_url)
+    if origin is None:
+        raise ValueError("요청의 대상 origin을 알 수 없습니다. (Host 헤더 없음)")
+    parts = request_text.replace("\r\n", "\n").split("\n\n", 1)
+    header_lines = parts[0].split("\n")
+    first_line = header_lines[0].split(" ")
+    if len(first_line) < 2:
+        raise ValueError("요청 줄을 해석할 수 없습니다.")
+    headers = []
+    for line in header_lines[1:]:
+        name, separator, value = line.partition(":")
+        if separator:
+            headers.append((name.strip(), value.strip()))
+    body = parts[1].encode('utf-8') if len(parts) > 1 else b""
+    return build_request(origin, first_line[0], first_line[1], headers, body)
+
+
+def build_request(origin: str, method: str, target: str, headers: list[tuple[str, str]], body: bytes) -> dict:
+    """fetch 헬퍼가 받는 요청을 만듭니다. 바디는 바이너리도 그대로 보내도록 base64로 넘깁니다."""
+    url = target if target.startswith(("http://", "https://")) else origin + target
+    return {
+        "origin": origin,
+        "method": method,
+        "url": url,
+        "headers": {name: value for name, value in headers if name.lower() not in _SKIPPED_HEADERS},
+        "body": base64.b64encode(body).decode('ascii') if body else None,
+    }
+
+
+@dataclass
+class BrowserReplayJob:
+    """브라우저 풀에서 실행하는 Bulk Replay 작업입니다.
+
+    requests는 (사용한 페이로드, build_request 형태 요청)을 차례로 내는 이터러블이고, 브라우저 스레드가
+    조각 단위로 꺼내 쓰므로 변형을 미리 전부 만들어 두지 않습니다.
+    결과(BulkReplayResult)는 조각이 끝날 때마다 results 피드로 보내고, 끝나면 BulkReplaySummary를 보냅니다.
+    """
+    requests: Iterable[tuple[tuple, dict]]
+    results: FlowFeed
+    concurrency: int = 10
+    job_id: str = field(default_factory=lambda: uuid.uuid4().hex[:8])
+
+
+class _PoolSlot:
+    __slots__ = ("context", "page", "origin")
+
+    def __init__(self, context, page):
+        self.context = context
+        self.page = page
+        self.origin: str | None = None
+
+
+class BrowserPool:
+    """브라우저 쪽 리플레이를 병렬로 처리하는 컨텍스트/페이지 풀입니다.
+
+    사용자가 보는 브라우저와 별도로 headless 브라우저를 띄우고, 메인 컨텍스트의 쿠키와 스토리지를
+    복제한 컨텍스트 size개를 만들어 리플레이를 나눠 실행합니다. 응답 렌더링은 눈으로 봐야 하므로
+    메인 컨텍스트에 새 탭을 열어 보여줍니다. 사용자가 작업 중인 페이지는 건드리지 않습니다.
+    풀은 첫 작업이 들어올 때 만듭니다.
+    """
+
+    def __init__(self, playwright, main_context, proxy_server: str, helper_script: str,
+                 size: int = DEFAULT_POOL_SIZE, timeout: float = DEFAULT_JOB_TIMEOUT,
+                 launch_args: list[str] | None = None):
+        self._playwright = playwright
+        self._helper_script = helper_script
+        self.main_context = main_context
+        self.proxy_server = proxy_server
+        self.size = size
+        self.timeout = timeout
+        self._launch_args = launch_args or []
+        self._browser = None
+        self._idle: asyncio.Queue[_PoolSlot] = asyncio.Queue()
+        self._start_lock = asyncio.Lock()
+        self._tasks: dict[asyncio.Task, str | None] = {}
+        self.completed = 0
+        self.failed = 0
+
+    async def _ensure_started(self):
+        async with self._start_lock:
+            if self._browser is not None:
+                return
+            self._browser = await self._playwright.chromium.launch(headless=True, args=self._launch_args)
+            storage_state = await self.main_context.storage_state()
+            for _ in range(self.size):
+                context = await self._browser.new_context(
+                    proxy={"server": self.proxy_server}, ignore_https_errors=True, storage_state=storage_state)
+                await context.route(f"**{BLANK_PATH}", self._fulfill_blank)
+                # fetch 헬퍼는 컨텍스트를 만들 때 한 번만 설치합니다. (페이지 이동 후에도 유지)
+                await context.add_init_script(self._helper_script)
+                self._idle.put_nowait(_PoolSlot(context, await context.new_page()))
+            print(f"브라우저 풀 준비 완료 (컨텍스트 {self.size}개)")
+
+    @staticmethod
+    async def _fulfill_blank(route):
+        await route.fulfill(status=200, content_type="text/html", body="<!doctype html><html></html>")
+
+    def submit(self, coro, key: str | None = None) -> asyncio.Task:
+        """작업을 백그라운드 태스크로 실행합니다. cancel()로 key가 같은 작업이나 전체를 취소할 수 있습니다."""
+        task = asyncio.create_task(coro)
+        self._tasks[task] = key
+        task.add_done_callback(lambda done: self._tasks.pop(done, None))
+        return task
+
+    async def replay_batch(self, requests: Iterable[dict], concurrency: int, on_results) -> int:
+        """요청들을 조각으로 나눠 풀 컨텍스트들에서 동시에 보내고, 보낸 요청 수를 반환합니다.
+
+        requests는 컨텍스트가 빌 때마다 조각 크기만큼만 꺼내므로 제너레이터를 넘겨도 됩니다.
+        조각 안의 origin별 묶음은 evaluate 한 번으로 실행되며, 끝날 때마다
+        on_results([(인덱스, 결과), ...])를 호출합니다. (인덱스는 requests에서 꺼낸 순서)
+        """
+        await self._ensure_started()
+        iterator = iter(requests)
+        per_worker = max(1, concurrency // self.size)
+        chunk_size = min(MAX_REQUESTS_PER_EVALUATE, per_worker * ROUNDS_PER_EVALUATE)
+        taken = 0
+
+        def take() -> list[tuple[int, dict]]:
+            nonlocal taken
+            chunk = list(enumerate(itertools.islice(iterator, chunk_size), taken))
+            taken += len(chunk)
+            return chunk
+
+        async def worker():
+            while chunk := take():
+                by_origin: dict[str, list[tuple[int, dict]]] = {}
+                for index, request in chunk:
+                    by_origin.setdefault(request["origin"], []).append((index, request))
+                for origin, items in by_origin.items():
+                    results = await self._run_chunk(origin, [request for _, request in items], per_worker)
+                    on_results([(index, result) for (index, _), result in zip(items, results)])
+
+        await asyncio.gather(*(worker() for _ in range(self.size)))
+        return taken
+
+    async def _run_chunk(self, origin: str, batch: list[dict], concurrency: int) -> list[ReplayResult]:
+        slot = await self._idle.get()
+        # 개별 fetch마다 timeout을 두고, evaluate 전체는 순차로 돌 경우의 최대 시간까지 기다립니다.
+        rounds = -(-len(batch) // concurrency)
+        try:
+            results = await asyncio.wait_for(self._replay_on(slot, origin, batch, concurrency),
+                                             self.timeout * rounds + 5)
+            self.completed += len(results)
+            self.failed += sum(1 for result in results if result["error"])
+            return results
+        except BaseException:
+            # 시간 초과나 취소로 중간에 끊긴 페이지는 상태를 알 수 없으므로 새로 만듭니다.
+            self.failed += len(batch)
+            await self._reset_page(slot)
+            raise
+        finally:
+            self._idle.put_nowait(slot)
+
+    async def _replay_on(self, slot: _PoolSlot, origin: str, batch: list[dict],
+                         concurrency: int) -> list[ReplayResult]:
+        # 실행할 때마다 메인 컨텍스트의 최신 쿠키를 복사합니다. (로그인/세션 갱신 반영)
+        cookies = await self.main_context.cookies()
+        await slot.context.clear_cookies()
+        if cookies:
+            await slot.context.add_cookies(cookies)
+        if slot.origin != origin:
+            await slot.page.goto(origin + BLANK_PATH)
+            slot.origin = origin
+        return await slot.page.evaluate("window.__pongpsuiteReplay",
+                                        [batch, concurrency, int(self.timeout * 1000)])
+
+    async def _reset_page(self, slot: _PoolSlot):
+        slot.origin = None
+        try:
+            await slot.page.close()
+            slot.page = await slot.context.new_page()
+        except Exception as e:
+            print(f"브라우저 풀 페이지 재생성 오류: {e}")
+
+    async def render(self, html_content: str):
+        """응답 HTML을 메인 브라우저의 새 탭에 렌더링합니다. (사용자의 현재 페이지는 그대로 둠)"""
+        page = await self.main_context.new_page()
+        try:
+            await asyncio.wait_for(page.set_content(html_content), self.timeout)
+            await page.bring_to_front()
+        except BaseException:
+            await page.close()
+            raise
+
+    def cancel(self, key: str | None = None) -> int:
+        """진행 중이거나 대기 중인 작업(key를 주면 그 작업만)을 취소하고 취소한 개수를 반환합니다."""
+        tasks = [task for task, task_key in self._tasks.items()
+                 if not task.done() and (key is None or task_key == key)]
+        for task in tasks:
+            task.cancel()
+        return len(tasks)
+
+    async def close(self):
+        self.cancel()
+        if self._browser is not None:
+            try:
+                await self._browser.close()
+            except Exception:
+                pass
+            self._browser = None
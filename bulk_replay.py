@@ -0,0 +1,324 @@
+import asyncio
+import itertools
+import ssl
+import time
+import uuid
+from dataclasses import dataclass, field
+from urllib.parse import urlsplit
+
+import h11
+
+from channel import FlowFeed
+
+# Request 텍스트에서 페이로드 위치를 감싸는 표시 (§기본값§)
+PAYLOAD_MARKER = "§"
+ATTACK_MODES = ("sniper", "pitchfork", "cluster_bomb")
+
+
+def _split_marked(text: str) -> list[str]:
+    """'a§x§b§y§c' -> ['a', 'x', 'b', 'y', 'c'] (홀수 인덱스가 페이로드 위치의 기본값)"""
+    parts = text.split(PAYLOAD_MARKER)
+    if len(parts) % 2 == 0:
+        raise ValueError(f"페이로드 표시({PAYLOAD_MARKER})의 짝이 맞지 않습니다.")
+    return parts
+
+
+class RequestTemplate:
+    """페이로드 위치가 표시된 Raw HTTP 요청을 한 번만 파싱해 둔 템플릿입니다.
+
+    요청 줄/각 헤더 값/바디를 필드별 조각 목록으로 보관하므로, 변형마다 전체 텍스트를
+    다시 파싱하지 않고 해당 위치에 페이로드만 끼워 넣어 요청을 만듭니다.
+    """
+
+    def __init__(self, request_text: str, base_url: str):
+        parts = request_text.replace('\r\n', '\n').split('\n\n', 1)
+        header_lines = parts[0].split('\n')
+        body = parts[1] if len(parts) > 1 else ""
+
+        first_line_parts = header_lines[0].split()
+        if len(first_line_parts) < 2:
+            raise ValueError("요청 줄을 해석할 수 없습니다.")
+
+        # (필드 이름, 조각 목록) 순서대로 보관하고, 페이로드 위치에 전역 번호를 매깁니다.
+        self._fields: list[tuple[str, list[str]]] = []
+        self._fields.append(("method", _split_marked(first_line_parts[0])))
+        self._fields.append(("target", _split_marked(first_line_parts[1])))
+        for line in header_lines[1:]:
+            if ':' in line:
+                key, value = line.split(':', 1)
+                self._fields.append((f"header:{key.strip()}", _split_marked(value.strip())))
+        self._fields.append(("body", _split_marked(body)))
+
+        self.defaults: list[str] = []
+        for _, pieces in self._fields:
+            self.defaults.extend(pieces[1::2])
+
+        base = urlsplit(base_url)
+        self.scheme = base.scheme or "http"
+        self.host = base.hostname or ""
+        self.port = base.port or (443 if self.scheme == "https" else 80)
+
+    @property
+    def origin(self) -> str:
+        default_port = 443 if self.scheme == "https" else 80
+        netloc = self.host if self.port == default_port else f"{self.host}:{self.port}"
+        return f"{self.scheme}://{netloc}"
+
+    @property
+    def position_count(self) -> int:
+        return len(self.defaults)
+
+    def render(self, payloads: list[str]) -> tuple[str, str, list[tuple[str, str]], bytes]:
+        """페이로드를 채운 (method, target, headers, body)를 반환합니다."""
+        values = iter(payloads)
+        rendered = {}
+        headers = []
+        for name, pieces in self._fields:
+            text = "".join(piece if i % 2 == 0 else next(values) for i, piece in enumerate(pieces))
+            if name.startswith("header:"):
+                headers.append((name[7:], text))
+            else:
+                rendered[name] = text
+        return rendered["method"], rendered["target"], headers, rendered["body"].encode('utf-8', errors='replace')
+
+    def check_payload_lists(self, payload_lists: list[list[str]], mode: str):
+        """공격 모드에 맞는 페이로드 목록인지 확인하고, 아니면 ValueError를 발생시킵니다."""
+        if mode not in ATTACK_MODES:
+            raise ValueError(f"알 수 없는 공격 모드: {mode}")
+        if mode != "sniper" and len(payload_lists) < self.position_count:
+            raise ValueError(f"{mode} 모드는 페이로드 위치 {self.position_count}개마다 목록이 하나씩 필요합니다. "
+                             f"(현재 {len(payload_lists)}개, 목록은 '---' 줄로 구분)")
+
+    def variants(self, payload_lists: list[list[str]], mode: str):
+        """공격 모드에 따라 (사용한 페이로드, 위치별 값 목록)을 지연 생성합니다.
+
+        페이로드 목록은 첫 변형을 꺼낼 때가 아니라 호출하는 즉시 확인합니다.
+        """
+        self.check_payload_lists(payload_lists, mode)
+        return self._iter_variants(payload_lists, mode)
+
+    def _iter_variants(self, payload_lists: list[list[str]], mode: str):
+        if mode == "sniper":
+            # 페이로드 목록 하나를 위치마다 차례로 넣고 나머지 위치는 기본값을 유지합니다.
+            for position in range(self.position_count):
+                for payload in payload_lists[0]:
+                    values = list(self.defaults)
+                    values[position] = payload
+                    yield (payload,), values
+        elif mode == "pitchfork":
+            for combo in zip(*payload_lists[:self.position_count]):
+                yield combo, list(combo)
+        else:
+            for combo in itertools.product(*payload_lists[:self.position_count]):
+                yield combo, list(combo)
+
+
+class TokenBucket:
+    """초당 rate개의 토큰이 채워지는 토큰 버킷입니다. rate가 0이면 제한하지 않습니다."""
+
+    def __init__(self, rate: float, burst: int | None = None):
+        self.rate = rate
+        self.capacity = burst or max(1, int(rate))
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+
+    async def acquire(self):
+        if self.rate <= 0:
+            return
+        while True:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class _Connection:
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        self.h11 = h11.Connection(our_role=h11.CLIENT)
+
+    def close(self):
+        self.writer.close()
+
+
+class ConnectionPool:
+    """프록시를 거쳐 대상 서버로 가는 keep-alive 연결 풀입니다. (HTTPS는 CONNECT 후 TLS)"""
+
+    def __init__(self, proxy_host: str, proxy_port: int, scheme: str, host: str, port: int):
+        self.proxy_host = proxy_host
+        self.proxy_port = proxy_port
+        self.scheme = scheme
+        self.host = host
+        self.port = port
+        self._idle: list[_Connection] = []
+        # mitmproxy가 발급한 인증서를 사용하므로 검증하지 않습니다.
+        self._ssl_context = ssl.create_default_context()
+        self._ssl_context.check_hostname = False
+        self._ssl_context.verify_mode = ssl.CERT_NONE
+
+    async def acquire(self) -> _Connection:
+        while self._idle:
+            connection = self._idle.pop()
+            if not connection.writer.is_closing():
+                return connection
+        reader, writer = await asyncio.open_connection(self.proxy_host, self.proxy_port)
+        if self.scheme == "https":
+            authority = f"{self.host}:{self.port}"
+            writer.write(f"CONNECT {authority} HTTP/1.1\r\nHost: {authority}\r\n\r\n".encode())
+            await writer.drain()
+            response = await reader.readuntil(b"\r\n\r\n")
+            status_line = response.split(b"\r\n", 1)[0]
+            if b" 200" not in status_line:
+                writer.close()
+                raise ConnectionError(f"CONNECT 실패: {status_line!r}")
+            await writer.start_tls(self._ssl_context, server_hostname=self.host)
+        return _Connection(reader, writer)
+
+    def release(self, connection: _Connection):
+        if connection.h11.our_state is h11.DONE and connection.h11.their_state is h11.DONE:
+            connection.h11.start_next_cycle()
+            self._idle.append(connection)
+        else:
+            connection.close()
+
+    def close(self):
+        for connection in self._idle:
+            connection.close()
+        self._idle.clear()
+
+
+@dataclass
+class BulkReplayResult:
+    index: int
+    payloads: tuple
+    status: int | None
+    length: int
+    duration_ms: float
+    error: str = ""
+    # 응답 헤더 ((이름, 값), ...). 브라우저 엔진에서만 채워집니다.
+    headers: tuple = ()
+
+
+@dataclass
+class BulkReplaySummary:
+    job_id: str
+    completed: int
+    errors: int
+    elapsed: float
+    requests_per_second: float
+    cancelled: bool = False
+
+
+@dataclass
+class BulkReplayJob:
+    """템플릿의 변형들을 동시성/속도 제한을 두고 프록시를 통해 보내는 작업입니다.
+
+    결과(BulkReplayResult)는 완료되는 대로 results 피드로 보내고, 끝나면 BulkReplaySummary를 보냅니다.
+    """
+    template: RequestTemplate
+    payload_lists: list[list[str]]
+    results: FlowFeed
+    mode: str = "sniper"
+    concurrency: int = 10
+    rate: float = 0.0
+    proxy_host: str = "127.0.0.1"
+    proxy_port: int = 8080
+    job_id: str = field(default_factory=lambda: uuid.uuid4().hex[:8])
+
+    async def _send(self, pool: ConnectionPool, method: str, target: str,
+                    headers: list[tuple[str, str]], body: bytes) -> tuple[int, int]:
+        headers = [(k, v) for k, v in headers
+                   if k.lower() not in ('content-length', 'transfer-encoding', 'connection')]
+        if not any(k.lower() == 'host' for k, _ in headers):
+            headers.insert(0, ("Host", pool.host))
+        headers.append(("Content-Length", str(len(body))))
+        if pool.scheme == "http" and target.startswith('/'):
+            # 평문 HTTP는 프록시에 absolute-form으로 요청합니다.
+            target = f"http://{pool.host}:{pool.port}{target}"
+
+        connection = await pool.acquire()
+        try:
+            data = connection.h11.send(h11.Request(method=method, target=target, headers=headers))
+            data += connection.h11.send(h11.Data(data=body)) if body else b""
+            data += connection.h11.send(h11.EndOfMessage())
+            connection.writer.write(data)
+            await connection.writer.drain()
+
+            status = None
+            length = 0
+            while True:
+                event = connection.h11.next_event()
+                if event is h11.NEED_DATA:
+                    chunk = await connection.reader.read(65536)
+                    connection.h11.receive_data(chunk)
+                    continue
+                if isinstance(event, h11.Response):
+                    status = event.status_code
+                elif isinstance(event, h11.Data):
+                    length += len(event.data)
+                elif isinstance(event, (h11.EndOfMessage, h11.ConnectionClosed)):
+                    break
+            pool.release(connection)
+            return status, length
+        except BaseException:
+            connection.close()
+            raise
+
+    async def run(self):
+        try:
+            variants = enumerate(self.template.variants(self.payload_lists, self.mode))
+        except ValueError as e:
+            print(f"Bulk Replay 페이로드 오류 (Job {self.job_id}): {e}")
+            self.results.put(BulkReplaySummary(self.job_id, 0, 0, 0.0, 0.0, True))
+            return
+        pool = ConnectionPool(self.proxy_host, self.proxy_port,
+                              self.template.scheme, self.template.host, self.template.port)
+        bucket = TokenBucket(self.rate)
+        completed = 0
+        errors = 0
+        cancelled = False
+        started = time.perf_counter()
+
+        async def worker():
+            nonlocal completed, errors
+            # 모든 워커가 같은 제너레이터를 공유하므로 변형 목록 전체를 메모리에 만들지 않습니다.
+            for index, (payloads, values) in variants:
+                await bucket.acquire()
+                method, target, headers, body = self.template.render(values)
+                sent_at = time.perf_counter()
+                try:
+                    status, length = await self._send(pool, method, target, headers, body)
+                    result = BulkReplayResult(index, payloads, status, length,
+                                              (time.perf_counter() - sent_at) * 1000)
+                except (OSError, asyncio.IncompleteReadError, h11.ProtocolError, ValueError) as e:
+                    errors += 1
+                    result = BulkReplayResult(index, payloads, None, 0,
+                                              (time.perf_counter() - sent_at) * 1000, str(e))
+                completed += 1
+                self.results.put(result)
+
+        print(f"Bulk Replay 시작 (Job {self.job_id}): 모드={self.mode}, 동시성={self.concurrency}, 속도 제한={self.rate or '없음'}")
+        workers = [asyncio.create_task(worker()) for _ in range(max(1, self.concurrency))]
+        try:
+            await asyncio.gather(*workers)
+        except asyncio.CancelledError:
+            cancelled = True
+        except Exception as e:
+            # 예상하지 못한 오류로 워커 하나가 멈추면 작업 전체를 중단합니다.
+            cancelled = True
+            print(f"Bulk Replay 오류 (Job {self.job_id}): {e}")
+        finally:
+            # 남은 워커가 닫힌 풀로 계속 보내지 않도록 풀을 닫기 전에 모두 끝냅니다.
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            pool.close()
+            elapsed = time.perf_counter() - started
+            summary = BulkReplaySummary(self.job_id, completed, errors, elapsed,
+                                        completed / elapsed if elapsed else 0.0, cancelled)
+            self.results.put(summary)
+            print(f"Bulk Replay 종료 (Job {self.job_id}): {completed}건, {summary.requests_per_second:.1f} req/s")
@@ -0,0 +1,336 @@
+import time
+
+from PySide6.QtCore import QAbstractTableModel, QModelIndex, Qt, QTimer, Signal
+from PySide6.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QSplitter, QPlainTextEdit, QPushButton, QLabel,
+    QComboBox, QSpinBox, QTableView, QHeaderView, QAbstractItemView, QFormLayout
+)
+
+from bulk_replay import (
+    PAYLOAD_MARKER, ATTACK_MODES, RequestTemplate, BulkReplayJob, BulkReplayResult, BulkReplaySummary
+)
+from browser_pool import BrowserReplayJob, build_request, parse_raw_request
+from channel import AsyncChannel, FlowFeed
+from metrics import Metrics
+
+ENGINES = ("Proxy", "Browser")
+
+
+def _browser_requests(template: RequestTemplate, variants):
+    """변형을 (사용한 페이로드, fetch 헬퍼 요청)으로 하나씩 만듭니다. 브라우저 스레드에서 조각 단위로 소비됩니다."""
+    for used, values in variants:
+        method, target, headers, body = template.render(values)
+        yield used, build_request(template.origin, method, target, headers, body)
+
+
+class BulkResultsModel(QAbstractTableModel):
+    """Bulk Replay 결과 테이블 모델입니다. 결과는 배치로 추가됩니다."""
+
+    HEADERS = ["#", "Payloads", "Status", "Length", "Time (ms)", "Error"]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._results: list[BulkReplayResult] = []
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._results)
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.ToolTipRole and index.column() == 2:
+            # 브라우저 엔진 결과는 Status 칸에 응답 헤더를 툴팁으로 보여줍니다.
+            return "\n".join(f"{k}: {v}" for k, v in self._results[index.row()].headers) or None
+        if role != Qt.DisplayRole:
+            return None
+        result = self._results[index.row()]
+        column = index.column()
+        if column == 0:
+            return str(result.index)
+        if column == 1:
+            return ", ".join(result.payloads)
+        if column == 2:
+            return "" if result.status is None else str(result.status)
+        if column == 3:
+            return str(result.length)
+        if column == 4:
+            return f"{result.duration_ms:.1f}"
+        if column == 5:
+            return result.error
+        return None
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role: int = Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return None
+
+    def append_results(self, results: list[BulkReplayResult]):
+        if not results:
+            return
+        start = len(self._results)
+        self.beginInsertRows(QModelIndex(), start, start + len(results) - 1)
+        self._results.extend(results)
+        self.endInsertRows()
+
+    def clear(self):
+        self.beginResetModel()
+        self._results.clear()
+        self.endResetModel()
+
+
+class BulkReplayWidget(QWidget):
+    """페이로드 위치(§)가 표시된 요청을 여러 변형으로 동시에 보내는 Bulk Replay 탭입니다."""
+
+    # 프록시 스레드의 작업이 결과를 넣으면 GUI 스레드에서 drain_results가 실행됩니다.
+    results_available = Signal()
+
+    def __init__(self, command_queue: AsyncChannel, browser_command_queue: AsyncChannel | None = None,
+                 metrics: Metrics | None = None, parent=None):
+        super().__init__(parent)
+        self.command_queue = command_queue
+        self.browser_command_queue = browser_command_queue
+        self.metrics = metrics or Metrics()
+        self.current_engine = ENGINES[0]
+        # 응답 시간 지표의 engine 라벨 (단건 Replay in Browser는 "browser")
+        self.metrics_engine = ""
+        self.base_url = ""
+        self.current_job_id: str | None = None
+        self.results_feed: FlowFeed | None = None
+        self.job_started_at = 0.0
+        self.completed = 0
+
+        layout = QVBoxLayout(self)
+        splitter = QSplitter(Qt.Vertical)
+        layout.addWidget(splitter)
+
+        # --- 요청 템플릿과 페이로드 설정 ---
+        editor_widget = QWidget()
+        editor_layout = QHBoxLayout(editor_widget)
+        editor_layout.setContentsMargins(0, 0, 0, 0)
+
+        template_layout = QVBoxLayout()
+        self.target_label = QLabel("Target: (History에서 요청을 보내세요)")
+        template_layout.addWidget(self.target_label)
+        self.template_edit = QPlainTextEdit()
+        template_layout.addWidget(self.template_edit)
+        marker_layout = QHBoxLayout()
+        self.add_marker_button = QPushButton(f"Add {PAYLOAD_MARKER}")
+        self.clear_markers_button = QPushButton(f"Clear {PAYLOAD_MARKER}")
+        marker_layout.addWidget(self.add_marker_button)
+        marker_layout.addWidget(self.clear_markers_button)
+        marker_layout.addStretch()
+        template_layout.addLayout(marker_layout)
+        editor_layout.addLayout(template_layout, 3)
+
+        options_layout = QVBoxLayout()
+        form = QFormLayout()
+        self.engine_combo = QComboBox()
+        self.engine_combo.addItems(ENGINES)
+        self.engine_combo.setToolTip("Browser: Playwright 브라우저 풀에서 fetch로 보냅니다. (브라우저 쿠키 사용)")
+        self.mode_combo = QComboBox()
+        self.mode_combo.addItems(ATTACK_MODES)
+        self.concurrency_input = QSpinBox()
+        self.concurrency_input.setRange(1, 1000)
+        self.concurrency_input.setValue(20)
+        self.rate_input = QSpinBox()
+        self.rate_input.setRange(0, 100000)
+        self.rate_input.setSuffix(" req/s")
+        self.rate_input.setSpecialValueText("Unlimited")
+        form.addRow("Engine:", self.engine_combo)
+        form.addRow("Mode:", self.mode_combo)
+        form.addRow("Concurrency:", self.concurrency_input)
+        form.addRow("Rate limit:", self.rate_input)
+        options_layout.addLayout(form)
+        options_layout.addWidget(QLabel("Payloads (한 줄에 하나, 위치별 목록은 '---' 줄로 구분):"))
+        self.payloads_edit = QPlainTextEdit()
+        options_layout.addWidget(self.payloads_edit)
+        run_layout = QHBoxLayout()
+        self.start_button = QPushButton("Start")
+        self.stop_button = QPushButton("Stop")
+        self.stop_button.setEnabled(False)
+        run_layout.addWidget(self.start_button)
+        run_layout.addWidget(self.stop_button)
+        options_layout.addLayout(run_layout)
+        editor_layout.addLayout(options_layout, 2)
+        splitter.addWidget(editor_widget)
+
+        # --- 결과 테이블 ---
+        results_widget = QWidget()
+        results_layout = QVBoxLayout(results_widget)
+        results_layout.setContentsMargins(0, 0, 0, 0)
+        self.stats_label = QLabel("")
+        results_layout.addWidget(self.stats_label)
+        self.results_model = BulkResultsModel(self)
+        self.results_table = QTableView()
+        self.results_table.setModel(self.results_model)
+        self.results_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.results_table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.results_table.verticalHeader().setDefaultSectionSize(22)
+        self.results_table.horizontalHeader().setStretchLastSection(True)
+        self.results_table.setColumnWidth(1, 300)
+        results_layout.addWidget(self.results_table)
+        splitter.addWidget(results_widget)
+
+        # 진행 중에는 처리량 표시를 1초마다 갱신합니다.
+        self.stats_timer = QTimer(self)
+        self.stats_timer.setInterval(1000)
+
+        self.add_marker_button.clicked.connect(self.on_add_marker_clicked)
+        self.clear_markers_button.clicked.connect(self.on_clear_markers_clicked)
+        self.start_button.clicked.connect(self.on_start_clicked)
+        self.stop_button.clicked.connect(self.on_stop_clicked)
+        self.results_available.connect(self.drain_results)
+        self.stats_timer.timeout.connect(self.update_stats)
+        self.engine_combo.currentTextChanged.connect(self.on_engine_changed)
+
+    def load_request(self, request_text: str, url: str):
+        """History에서 선택한 요청을 템플릿으로 불러옵니다."""
+        self.template_edit.setPlainText(request_text)
+        self.base_url = url
+        self.target_label.setText(f"Target: {url}")
+
+    def on_engine_changed(self, engine: str):
+        # 브라우저 엔진은 속도 제한 없이 동시성만 적용합니다.
+        self.rate_input.setEnabled(engine == "Proxy")
+
+    def on_add_marker_clicked(self):
+        cursor = self.template_edit.textCursor()
+        cursor.insertText(f"{PAYLOAD_MARKER}{cursor.selectedText()}{PAYLOAD_MARKER}")
+
+    def on_clear_markers_clicked(self):
+        self.template_edit.setPlainText(self.template_edit.toPlainText().replace(PAYLOAD_MARKER, ""))
+
+    def _payload_lists(self) -> list[list[str]]:
+        lists = [[]]
+        for line in self.payloads_edit.toPlainText().splitlines():
+            if line.strip() == "---":
+                lists.append([])
+            elif line:
+                lists[-1].append(line)
+        return lists
+
+    def on_start_clicked(self):
+        if not self.base_url:
+            print("Bulk Replay: 대상 요청이 없습니다. History에서 요청을 보내세요.")
+            return
+        try:
+            template = RequestTemplate(self.template_edit.toPlainText(), self.base_url)
+        except ValueError as e:
+            print(f"Bulk Replay 템플릿 오류: {e}")
+            return
+        if template.position_count == 0:
+            print(f"Bulk Replay: 페이로드 위치({PAYLOAD_MARKER}...{PAYLOAD_MARKER})가 없습니다.")
+            return
+        try:
+            template.check_payload_lists(self._payload_lists(), self.mode_combo.currentText())
+        except ValueError as e:
+            self.stats_label.setText(f"페이로드 오류: {e}")
+            print(f"Bulk Replay 페이로드 오류: {e}")
+            return
+
+        engine = self.engine_combo.currentText()
+        if engine == "Browser" and self.browser_command_queue is None:
+            print("Bulk Replay: 브라우저 명령 큐가 설정되지 않았습니다.")
+            return
+
+        self.results_feed = FlowFeed()
+        self.results_feed.set_notify(self.results_available.emit)
+        if engine == "Browser":
+            job = BrowserReplayJob(
+                _browser_requests(template, template.variants(self._payload_lists(), self.mode_combo.currentText())),
+                self.results_feed, self.concurrency_input.value())
+        else:
+            job = BulkReplayJob(
+                template=template,
+                payload_lists=self._payload_lists(),
+                results=self.results_feed,
+                mode=self.mode_combo.currentText(),
+                concurrency=self.concurrency_input.value(),
+                rate=self.rate_input.value(),
+            )
+        self._start_job(job, engine, f"bulk_{engine.lower()}")
+
+    def replay_in_browser(self, request_text: str, url: str) -> bool:
+        """요청 하나를 브라우저 풀에서 보내고 결과를 이 탭의 결과 테이블에 표시합니다.
+
+        Host 헤더가 없으면 url(선택한 Flow의 URL)의 origin으로 보냅니다. 시작하지 못하면 False를 반환합니다.
+        """
+        if self.browser_command_queue is None:
+            print("Replay in Browser: 브라우저 명령 큐가 설정되지 않았습니다.")
+            return False
+        if self.current_job_id:
+            print("Replay in Browser: 진행 중인 Bulk Replay 작업이 끝난 뒤 다시 시도하세요.")
+            return False
+        try:
+            request = parse_raw_request(request_text, url)
+        except ValueError as e:
+            print(f"Replay in Browser 요청 오류: {e}")
+            return False
+        self.results_feed = FlowFeed()
+        self.results_feed.set_notify(self.results_available.emit)
+        self._start_job(BrowserReplayJob([((), request)], self.results_feed, 1), "Browser", "browser")
+        return True
+
+    def _start_job(self, job, engine: str, metrics_engine: str):
+        self.current_job_id = job.job_id
+        self.current_engine = engine
+        self.metrics_engine = metrics_engine
+        self.results_model.clear()
+        self.completed = 0
+        self.job_started_at = time.perf_counter()
+        self.start_button.setEnabled(False)
+        self.stop_button.setEnabled(True)
+        self.stats_timer.start()
+        try:
+            if engine == "Browser":
+                # 브라우저가 아직 열리지 않았으면 열릴 때 채널에 보관된 명령이 실행됩니다.
+                self.browser_command_queue.put(('replay_batch', job))
+            else:
+                self.command_queue.put(('bulk_replay', job))
+            print(f"명령 전송: Bulk Replay (Job {job.job_id}, {engine})")
+        except Exception as e:
+            print(f"Bulk Replay 명령 전송 오류: {e}")
+
+    def on_stop_clicked(self):
+        if self.current_job_id:
+            if self.current_engine == "Browser":
+                self.browser_command_queue.put(('cancel', self.current_job_id))
+            else:
+                self.command_queue.put(('bulk_replay_stop', self.current_job_id))
+
+    def drain_results(self):
+        if self.results_feed is None:
+            return
+        self.results_feed.acknowledge()
+        batch = []
+        summary = None
+        while not self.results_feed.empty():
+            item = self.results_feed.get_nowait()
+            if isinstance(item, BulkReplaySummary):
+                summary = item
+            else:
+                batch.append(item)
+        for result in batch:
+            self.metrics.replay.observe(result.duration_ms / 1000, self.metrics_engine)
+        self.completed += len(batch)
+        self.results_model.append_results(batch)
+        if summary is not None:
+            self.finish(summary)
+
+    def update_stats(self):
+        elapsed = time.perf_counter() - self.job_started_at
+        rate = self.completed / elapsed if elapsed else 0.0
+        self.stats_label.setText(f"진행 중: {self.completed:,}건 완료, {rate:.1f} req/s")
+
+    def finish(self, summary: BulkReplaySummary):
+        self.stats_timer.stop()
+        self.start_button.setEnabled(True)
+        self.stop_button.setEnabled(False)
+        self.current_job_id = None
+        state = "중단됨" if summary.cancelled else "완료"
+        self.stats_label.setText(
+            f"{state}: {summary.completed:,}건 (오류 {summary.errors:,}), {summary.elapsed:.1f}초, "
+            f"{summary.requests_per_second:.1f} req/s")
@@ -0,0 +1,93 @@
+import asyncio
+import queue
+import threading
+import time
+from collections import deque
+
+
+class AsyncChannel:
+    """다른 스레드(Qt GUI 등)에서 asyncio 루프로 명령을 보내는 thread-safe 채널입니다.
+
+    put()은 어느 스레드에서나 호출할 수 있고, loop.call_soon_threadsafe로 소비자 루프를
+    즉시 깨우므로 폴링 없이 명령이 곧바로 처리됩니다. 루프가 연결되기 전(bind 전)에
+    들어온 명령은 보관해 두었다가 연결 시점에 전달합니다.
+    """
+
+    def __init__(self, latency_samples: int = 1000):
+        self._lock = threading.Lock()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._queue: asyncio.Queue | None = None
+        self._backlog: list[tuple[float, object]] = []
+        # put()부터 get()이 명령을 돌려줄 때까지 걸린 시간(초)
+        self.dispatch_latencies: deque[float] = deque(maxlen=latency_samples)
+
+    def bind(self):
+        """현재 실행 중인 asyncio 루프를 소비자로 연결합니다. 루프 안에서 호출해야 합니다."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            for entry in self._backlog:
+                self._queue.put_nowait(entry)
+            self._backlog.clear()
+
+    def unbind(self):
+        """소비자 루프 연결을 해제합니다. 이후 명령은 다음 bind까지 보관됩니다."""
+        with self._lock:
+            self._loop = None
+            self._queue = None
+
+    def put(self, item):
+        entry = (time.perf_counter(), item)
+        with self._lock:
+            if self._loop is None:
+                self._backlog.append(entry)
+                return
+            try:
+                self._loop.call_soon_threadsafe(self._queue.put_nowait, entry)
+            except RuntimeError:
+                # 루프가 이미 닫혔으면 다음 bind를 위해 보관합니다.
+                self._backlog.append(entry)
+
+    async def get(self):
+        sent_at, item = await self._queue.get()
+        self.dispatch_latencies.append(time.perf_counter() - sent_at)
+        return item
+
+
+class FlowFeed:
+    """프록시 → GUI 데이터 전달용 큐입니다.
+
+    소비자가 비워 둔 상태에서 첫 항목이 들어올 때만 notify 콜백(Qt 시그널 emit 등)을 호출하므로,
+    타이머 폴링 없이 트래픽 폭주 중에도 깨우기 신호가 한 번으로 합쳐집니다.
+    dwell 히스토그램을 주면 항목이 큐에 머문 시간을 꺼낼 때마다 기록합니다.
+    """
+
+    def __init__(self, dwell=None):
+        self._queue = queue.SimpleQueue()
+        self._notify = None
+        self._pending = False
+        self._dwell = dwell
+
+    def set_notify(self, callback):
+        self._notify = callback
+
+    def put(self, item):
+        # 항목을 먼저 넣은 뒤 플래그를 확인해야 깨우기 신호를 놓치지 않습니다.
+        self._queue.put((time.perf_counter(), item))
+        if not self._pending and self._notify is not None:
+            self._pending = True
+            self._notify()
+
+    def acknowledge(self):
+        """소비자가 큐를 비우기 직전에 호출합니다. 이후 들어오는 항목은 다시 notify를 발생시킵니다."""
+        self._pending = False
+
+    def get_nowait(self):
+        put_at, item = self._queue.get_nowait()
+        if self._dwell is not None:
+            self._dwell.observe(time.perf_counter() - put_at)
+        return item
+
+    def empty(self) -> bool:
+        return self._queue.empty()
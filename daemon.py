@@ -0,0 +1,324 @@
+"""PongpSuite 헤드리스 캡처 데몬입니다. (Qt 없이 asyncio만으로 프록시와 리플레이를 실행)
+
+사용법:
+    python daemon.py [--listen-port 8080] [--control-port 8765 | --control-socket PATH]
+                     [--db PATH] [--max-flows N] [--scope PATTERN] [--flow-log]
+
+제어 API (JSON, localhost 또는 Unix 소켓 전용):
+    GET  /stats                      처리량, 단계별 지연, 필터/바디 저장소 통계
+    GET  /metrics                    Prometheus 텍스트
+    GET  /flows?after=SEQ&limit=N&q=URL_PART
+    GET  /flows/<flow_id>            요청 원문과 응답 헤더
+    GET  /flows/<flow_id>/diff       리플레이 Flow의 응답을 원본과 비교 (?text=1이면 JSON도 줄 단위)
+    POST /scope    {"pattern": "https://*.example.com/* -*.cdn.example.com"}   (빈 문자열이면 해제)
+    POST /filters  {"blocked_domains": [...], "blocked_extensions": [...], "blocked_content_types": [...]}
+    POST /replay   {"flow_id": "...", "request": "수정한 요청 원문 (없으면 원본)"}
+    POST /export   {"path": "/data/session.har"}   (.har / .mitm, .gz/.zst 압축 지원)
+    POST /shutdown
+"""
+import argparse
+import asyncio
+import json
+import os
+import signal
+import time
+from urllib.parse import urlsplit, parse_qs
+
+from channel import AsyncChannel
+from filters import FilterEngine, FilterRules
+from flow_store import FlowStore
+from metrics import Metrics, summarize
+from proxy import FlowData, ProxyEngine
+from response_diff import DiffCache, diff_details
+import flow_io
+
+DEFAULT_CONTROL_PORT = 8765
+DEFAULT_MAX_FLOWS = 200_000
+# 저장소 크기 상한을 확인하는 간격 (초)
+EVICT_INTERVAL = 10.0
+# 제어 API 요청 바디 상한 (필터 목록, 수정한 요청 원문 정도)
+MAX_REQUEST_BODY = 4 * 1024 * 1024
+
+
+class ApiError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class FlowCounter:
+    """데몬에서 GUI 큐 대신 PySideAddon에 넘기는 피드입니다.
+
+    Flow는 저장소에만 남기고 여기서는 개수만 세므로, 소비자가 없어도 메모리가 늘지 않습니다.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.last_flow_at = 0.0
+
+    def put(self, flow_data: FlowData):
+        self.count += 1
+        self.last_flow_at = time.time()
+
+
+def _flow_json(seq: int | None, flow_data: FlowData) -> dict:
+    return {
+        "seq": seq,
+        "flow_id": flow_data.flow_id,
+        "method": flow_data.method,
+        "url": flow_data.url,
+        "status_code": flow_data.status_code,
+        "request_size": flow_data.request_size,
+        "response_size": flow_data.response_size,
+        "content_type": flow_data.content_type,
+        "replay_of": flow_data.replay_of or None,
+    }
+
+
+class ControlApi:
+    """헤드리스 데몬을 제어하는 작은 HTTP/1.1 JSON API입니다. (요청마다 연결을 닫음)
+
+    프록시와 같은 asyncio 루프에서 동작하며, 명령은 GUI와 같은 명령 채널로 ProxyEngine에 보냅니다.
+    저장소 조회와 내보내기처럼 디스크를 읽는 작업은 워커 스레드에서 실행합니다.
+    """
+
+    def __init__(self, engine: ProxyEngine, flow_store: FlowStore, filter_engine: FilterEngine,
+                 metrics: Metrics, flow_counter: FlowCounter):
+        self.engine = engine
+        self.command_queue = engine.command_queue
+        self.flow_store = flow_store
+        self.filter_engine = filter_engine
+        self.metrics = metrics
+        self.flow_counter = flow_counter
+        self.started_at = time.time()
+        self._export_lock = asyncio.Lock()
+        self.diff_cache = DiffCache()
+
+    async def start(self, port: int | None = None, socket_path: str | None = None) -> asyncio.AbstractServer:
+        if socket_path:
+            if os.path.exists(socket_path):
+                os.unlink(socket_path)
+            server = await asyncio.start_unix_server(self._handle, socket_path)
+            # 같은 사용자만 데몬을 제어할 수 있게 합니다.
+            os.chmod(socket_path, 0o600)
+            print(f"제어 API: unix:{socket_path}")
+        else:
+            server = await asyncio.start_server(self._handle, "127.0.0.1", port)
+            print(f"제어 API: http://127.0.0.1:{port}/")
+        return server
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            try:
+                method, target, body = await self._read_request(reader)
+                status, content_type, payload = await self.dispatch(method, target, body)
+            except ApiError as e:
+                status, content_type, payload = e.status, "application/json", {"error": str(e)}
+            except (ValueError, KeyError, TypeError) as e:
+                status, content_type, payload = 400, "application/json", {"error": str(e)}
+            except Exception as e:
+                print(f"제어 API 처리 중 오류: {e}")
+                status, content_type, payload = 500, "application/json", {"error": str(e)}
+            if not isinstance(payload, str):
+                payload = json.dumps(payload, ensure_ascii=False)
+            data = payload.encode("utf-8")
+            writer.write(f"HTTP/1.1 {status} {'OK' if status < 400 else 'Error'}\r\n"
+                         f"Content-Type: {content_type}; charset=utf-8\r\n"
+                         f"Content-Length: {len(data)}\r\nConnection: close\r\n\r\n".encode("ascii") + data)
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _read_request(reader: asyncio.StreamReader) -> tuple[str, str, bytes]:
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+        except asyncio.LimitOverrunError:
+            raise ApiError(431, "요청 헤더가 너무 큽니다.")
+        request_line, *header_lines = head.decode("latin-1").split("\r\n")
+        method, target, _ = request_line.split(" ", 2)
+        length = 0
+        for line in header_lines:
+            name, _, value = line.partition(":")
+            if name.strip().lower() == "content-length":
+                length = int(value)
+        if length > MAX_REQUEST_BODY:
+            raise ApiError(413, "요청 바디가 너무 큽니다.")
+        return method.upper(), target, await reader.readexactly(length) if length else b""
+
+    async def dispatch(self, method: str, target: str, body: bytes) -> tuple[int, str, object]:
+        url = urlsplit(target)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        path = url.path.rstrip("/") or "/"
+        data = json.loads(body) if body else {}
+
+        if method == "GET" and path == "/stats":
+            return 200, "application/json", await asyncio.to_thread(self.stats)
+        if method == "GET" and path == "/metrics":
+            return 200, "text/plain; version=0.0.4", self.metrics.prometheus_text()
+        if method == "GET" and path == "/flows":
+            return 200, "application/json", await asyncio.to_thread(
+                self.list_flows, int(query.get("after", 0)), min(int(query.get("limit", 100)), 1000),
+                query.get("q", ""))
+        if method == "GET" and path.startswith("/flows/") and path.endswith("/diff"):
+            return 200, "application/json", await asyncio.to_thread(
+                self.flow_diff, path[len("/flows/"):-len("/diff")], query.get("text") != "1")
+        if method == "GET" and path.startswith("/flows/"):
+            return 200, "application/json", await asyncio.to_thread(self.flow_detail, path[len("/flows/"):])
+        if method == "POST" and path == "/scope":
+            self.command_queue.put(('set_scope', str(data.get("pattern", ""))))
+            return 200, "application/json", {"scope": data.get("pattern", "")}
+        if method == "POST" and path == "/filters":
+            rules = FilterRules(**{key: list(data[key]) for key in
+                                   ("blocked_domains", "blocked_extensions", "blocked_content_types") if key in data})
+            self.command_queue.put(('set_filters', rules))
+            return 200, "application/json", {"applied": True}
+        if method == "POST" and path == "/replay":
+            return 200, "application/json", await self.replay(data["flow_id"], data.get("request"))
+        if method == "POST" and path == "/export":
+            return 200, "application/json", await self.export(data["path"])
+        if method == "POST" and path == "/shutdown":
+            self.command_queue.put(('shutdown',))
+            return 200, "application/json", {"shutting_down": True}
+        raise ApiError(404, f"알 수 없는 API: {method} {path}")
+
+    def stats(self) -> dict:
+        filter_stats = self.filter_engine.stats()
+        return {
+            "uptime_s": time.time() - self.started_at,
+            "flows_recorded": self.flow_counter.count,
+            "flows_stored": len(self.flow_store),
+            "last_flow_at": self.flow_counter.last_flow_at or None,
+            "scope": self.engine.addon.scope.text if self.engine.addon.scope else None,
+            "metrics": summarize(self.metrics.snapshot()),
+            "filters": {
+                "hits": {f"{kind}:{rule}": hits for (kind, rule), hits in filter_stats["hits"].items() if hits},
+                "avg_cost_ns": filter_stats["avg_cost_ns"],
+            },
+            "bodies": self.flow_store.body_stats(),
+        }
+
+    def list_flows(self, after_seq: int, limit: int, url_contains: str) -> dict:
+        rows = self.flow_store.list_flows(after_seq, limit, url_contains)
+        return {
+            "flows": [_flow_json(seq, flow_data) for seq, flow_data in rows],
+            "next": rows[-1][0] if rows else after_seq,
+        }
+
+    def flow_detail(self, flow_id: str) -> dict:
+        details = self.flow_store.get_details(flow_id, cache=False)
+        if details is None:
+            raise ApiError(404, f"Flow를 찾을 수 없습니다: {flow_id}")
+        return {
+            **_flow_json(None, details.flow),
+            "request": details.get_request_display(),
+            "response_headers": [list(pair) for pair in details.response_headers],
+        }
+
+    def flow_diff(self, replay_id: str, structural: bool) -> dict:
+        replay = self.flow_store.get_details(replay_id, cache=False)
+        if replay is None:
+            raise ApiError(404, f"Flow를 찾을 수 없습니다: {replay_id}")
+        if not replay.flow.replay_of:
+            raise ApiError(400, f"리플레이로 만든 Flow가 아닙니다: {replay_id}")
+        key = (replay.flow.replay_of, replay_id, structural)
+        result = self.diff_cache.get(key)
+        if result is None:
+            original = self.flow_store.get_details(replay.flow.replay_of, cache=False)
+            if original is None:
+                raise ApiError(404, f"원본 Flow가 저장소에 없습니다: {replay.flow.replay_of}")
+            result = diff_details(original, replay, structural)
+            self.diff_cache.put(key, result)
+        return {"original": replay.flow.replay_of, "replay": replay_id, "mode": result.mode,
+                "summary": result.summary, "lines": result.lines}
+
+    async def replay(self, flow_id: str, request_text: str | None) -> dict:
+        if request_text is None:
+            details = await asyncio.to_thread(self.flow_store.get_details, flow_id, False)
+            if details is None:
+                raise ApiError(404, f"Flow를 찾을 수 없습니다: {flow_id}")
+            request_text = details.get_request_display()
+        self.command_queue.put(('replay', flow_id, request_text))
+        return {"queued": True, "flow_id": flow_id}
+
+    async def export(self, path: str) -> dict:
+        # 내보내기는 동시에 하나만 실행합니다. (디스크와 저장소 잠금을 나눠 쓰지 않도록)
+        async with self._export_lock:
+            started = time.perf_counter()
+            count = await asyncio.to_thread(flow_io.export_flows, self.flow_store, path)
+        return {"path": path, "exported": count, "elapsed_s": time.perf_counter() - started}
+
+
+async def _evict_periodically(flow_store: FlowStore, max_flows: int):
+    """저장된 Flow가 max_flows개를 넘지 않도록 오래된 Flow(와 참조가 끊긴 바디)를 지웁니다."""
+    while True:
+        await asyncio.sleep(EVICT_INTERVAL)
+        try:
+            evicted = await asyncio.to_thread(flow_store.evict_oldest, max_flows)
+            if evicted:
+                print(f"저장소 상한 초과: 오래된 Flow {len(evicted):,}건 삭제")
+        except Exception as e:
+            print(f"저장소 정리 중 오류: {e}")
+
+
+async def run_daemon(args: argparse.Namespace):
+    flow_store = FlowStore(args.db)
+    filter_engine = FilterEngine()
+    metrics = Metrics()
+    flow_counter = FlowCounter()
+    command_queue = AsyncChannel()
+    # OpenAPI 빌더와 브라우저는 GUI 전용이므로 넘기지 않습니다.
+    engine = ProxyEngine(flow_counter, command_queue, flow_store, filter_engine, None, None,
+                         args.listen_port, metrics, flow_log=args.flow_log)
+    if args.scope:
+        engine.addon.set_scope(args.scope)
+
+    api = ControlApi(engine, flow_store, filter_engine, metrics, flow_counter)
+    server = await api.start(args.control_port, args.control_socket)
+    evictor = asyncio.create_task(_evict_periodically(flow_store, args.max_flows)) if args.max_flows else None
+
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(signum, engine.shutdown)
+        except (NotImplementedError, RuntimeError):
+            pass  # Windows에서는 Ctrl+C가 KeyboardInterrupt로 전달됩니다.
+
+    print(f"헤드리스 캡처 시작: 프록시 127.0.0.1:{args.listen_port}, 저장소 {flow_store.db_path}")
+    try:
+        await engine.main_async()
+    finally:
+        if evictor is not None:
+            evictor.cancel()
+        server.close()
+        await server.wait_closed()
+        if args.control_socket and os.path.exists(args.control_socket):
+            os.unlink(args.control_socket)
+        flow_store.close()
+        print("헤드리스 캡처 종료.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PongpSuite headless capture daemon")
+    parser.add_argument("--listen-port", type=int, default=8080, help="프록시 포트 (기본: %(default)s)")
+    control = parser.add_mutually_exclusive_group()
+    control.add_argument("--control-port", type=int, default=DEFAULT_CONTROL_PORT,
+                         help="제어 API를 열 localhost 포트 (기본: %(default)s)")
+    control.add_argument("--control-socket", help="제어 API를 TCP 대신 이 Unix 소켓으로 엽니다.")
+    parser.add_argument("--db", help="Flow 저장소 SQLite 파일 (없으면 종료 시 지워지는 임시 저장소)")
+    parser.add_argument("--max-flows", type=int, default=DEFAULT_MAX_FLOWS,
+                        help="저장소에 남길 최대 Flow 수, 0이면 무제한 (기본: %(default)s)")
+    parser.add_argument("--scope", help="시작할 때 적용할 Scope 패턴, 공백으로 여러 개, '-'로 시작하면 제외 "
+                                          "(예: 'https://*.example.com/* -*.cdn.example.com')")
+    parser.add_argument("--flow-log", action="store_true", help="Flow마다 mitmproxy 로그를 콘솔에 출력합니다.")
+    args = parser.parse_args()
+    try:
+        asyncio.run(run_daemon(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+import codecs
+import json
+import queue
+import re
+import threading
+
+from PySide6.QtCore import QObject, Signal
+from PySide6.QtGui import QColor, QSyntaxHighlighter, QTextCharFormat
+
+from proxy import FlowDetails, BodyHandle
+
+# 한 번에 문서에 붙이는 양. 처음 한 조각은 바로 보이고 나머지는 스크롤할 때 이어서 붙입니다.
+RENDER_CHUNK_SIZE = 64 * 1024
+# 이보다 큰 바디는 보기 좋게 정리하지 않습니다. (전체를 파싱해야 하므로)
+PRETTY_MAX_SIZE = 4 * 1024 * 1024
+# 이보다 큰 바디는 구문 강조를 끕니다. (강조는 GUI 스레드에서 블록마다 실행됨)
+HIGHLIGHT_MAX_SIZE = 1024 * 1024
+
+
+def _syntax_of(body: BodyHandle, head: bytes) -> str | None:
+    content_type = body.content_type.lower()
+    if "json" in content_type or head.lstrip()[:1] in (b"{", b"["):
+        return "json"
+    if "html" in content_type or "xml" in content_type or head.lstrip()[:1] == b"<":
+        return "markup"
+    return None
+
+
+def _indent_markup(text: str) -> str:
+    """태그 단위로 줄을 나누고 들여쓰기합니다. (정확한 파서가 아니라 보기용 근사치)"""
+    lines = []
+    depth = 0
+    for token in re.split(r">\s*<", text.strip()):
+        if not token.startswith("<"):
+            token = "<" + token
+        if not token.endswith(">"):
+            token = token + ">"
+        closing = token.startswith("</")
+        if closing:
+            depth = max(0, depth - 1)
+        lines.append("  " * depth + token)
+        opening = not closing and not token.endswith("/>") and not token.startswith(("<!", "<?")) \
+            and "</" not in token
+        if opening and not re.match(r"<(br|hr|img|input|meta|link|area|base|col|source|wbr)\b", token, re.I):
+            depth += 1
+    return "\n".join(lines)
+
+
+def _pretty_text(text: str, syntax: str) -> str:
+    if syntax == "json":
+        return json.dumps(json.loads(text), indent=2, ensure_ascii=False)
+    return _indent_markup(text)
+
+
+class DetailRenderer(QObject):
+    """Request/Response 상세 보기를 워커 스레드에서 조각 단위로 만듭니다.
+
+    render()를 부를 때마다 대상(request/response)의 세대 번호가 올라가며, 워커는 이전 세대의
+    작업을 조각 사이에서 버립니다. 결과는 chunk_ready 시그널로 GUI 스레드에 전달됩니다.
+    """
+
+    # (대상, 세대, 텍스트, 이어 붙이기 여부, 상태 dict)
+    chunk_ready = Signal(str, int, str, bool, object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._lock = threading.Lock()
+        self._generations = {"request": 0, "response": 0}
+        self._streams: dict[str, tuple[int, object, dict]] = {}
+        self._queue = queue.SimpleQueue()
+        self._worker = threading.Thread(target=self._run, name="DetailRenderer", daemon=True)
+        self._worker.start()
+
+    def render(self, target: str, details: FlowDetails, hex_view: bool | None = None,
+               pretty: bool = False, load_all: bool = False) -> int:
+        """대상을 새로 그리도록 요청하고 세대 번호를 반환합니다. 진행 중이던 같은 대상의 작업은 취소됩니다.
+
+        load_all이면 스크롤을 기다리지 않고 끝까지 이어서 보냅니다. (편집 후 리플레이하는 Request용)
+        """
+        with self._lock:
+            self._generations[target] += 1
+            generation = self._generations[target]
+        self._queue.put(("render", target, generation, details, hex_view, pretty, load_all))
+        return generation
+
+    def request_more(self, target: str, generation: int):
+        """다음 조각을 요청합니다. (스크롤이 끝에 가까워졌을 때)"""
+        self._queue.put(("more", target, generation))
+
+    def cancel(self) -> dict[str, int]:
+        """모든 대상의 진행 중인 작업을 취소하고 새 세대 번호를 반환합니다.
+
+        이미 시그널 큐에 들어간 조각을 버리려면 받는 쪽도 이 번호로 바꿔야 합니다.
+        """
+        with self._lock:
+            for target in self._generations:
+                self._generations[target] += 1
+            return dict(self._generations)
+
+    def _is_current(self, target: str, generation: int) -> bool:
+        with self._lock:
+            return self._generations[target] == generation
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            kind, target, generation = job[:3]
+            if not self._is_current(target, generation):
+                continue
+            try:
+                if kind == "render":
+                    details, hex_view, pretty, load_all = job[3:]
+                    chunks, state = self._start(target, details, hex_view, pretty)
+                    state["load_all"] = load_all
+                    self._streams[target] = (generation, chunks, state)
+                    self._emit_next(target, generation, append=False)
+                elif kind == "more":
+                    self._emit_next(target, generation, append=True)
+            except Exception as e:
+                self._streams.pop(target, None)
+                self.chunk_ready.emit(target, generation, f"[Error] 상세 보기를 만들 수 없습니다: {e}",
+                                      False, {"done": True, "loaded": 0, "total": 0})
+
+    def _emit_next(self, target: str, generation: int, append: bool):
+        stream = self._streams.get(target)
+        if stream is None or stream[0] != generation:
+            return
+        _, chunks, state = stream
+        text, state["loaded"] = next(chunks, ("", state["total"]))
+        state["done"] = state["loaded"] >= state["total"]
+        if state["done"]:
+            self._streams.pop(target, None)
+        self.chunk_ready.emit(target, generation, text, append, dict(state))
+        if state["load_all"] and not state["done"]:
+            # 큐 뒤에 다시 넣어 그 사이에 들어온 취소/새 요청이 먼저 처리되도록 합니다.
+            self._queue.put(("more", target, generation))
+
+    def _start(self, target: str, details: FlowDetails, hex_view: bool | None, pretty: bool):
+        flow = details.flow
+        if target == "request":
+            headers = "\n".join(f"{k}: {v}" for k, v in details.request_headers)
+            prefix = f"{flow.method} {flow.path} {flow.http_version}\n{headers}\n\n"
+            body = details.request_body
+            hex_view, pretty = False, False
+        else:
+            headers = "\n".join(f"{k}: {v}" for k, v in details.response_headers)
+            prefix = f"--- HEADERS ---\n{headers}\n\n--- BODY ---\n"
+            body = details.response_body
+
+        content = body.content()
+        binary = body.is_binary()
+        if hex_view is None:
+            hex_view = binary
+        syntax = None if binary or hex_view else _syntax_of(body, content[:64])
+        state = {"total": len(content), "loaded": 0, "binary": binary, "hex_view": hex_view,
+                 "syntax": syntax, "pretty": False}
+
+        if pretty and syntax and len(content) <= PRETTY_MAX_SIZE:
+            try:
+                text = _pretty_text(self._decode_all(body, content), syntax)
+                state["pretty"] = True
+                state["total"] = len(text)
+                return self._text_chunks(prefix, text), state
+            except ValueError:
+                pass
+        if hex_view:
+            return self._hex_chunks(prefix, body, len(content)), state
+        return self._decoded_chunks(prefix, body, content), state
+
+    @staticmethod
+    def _decode_all(body: BodyHandle, content: bytes) -> str:
+        try:
+            return content.decode(body.charset, errors='replace')
+        except LookupError:
+            return content.decode('utf-8', errors='replace')
+
+    @staticmethod
+    def _text_chunks(prefix: str, text: str):
+        first = True
+        for start in range(0, max(1, len(text)), RENDER_CHUNK_SIZE):
+            chunk = text[start:start + RENDER_CHUNK_SIZE]
+            yield (prefix + chunk if first else chunk), start + len(chunk)
+            first = False
+
+    @staticmethod
+    def _hex_chunks(prefix: str, body: BodyHandle, total: int):
+        # hex dump는 바이트당 약 4글자이므로 조각의 바이트 수를 줄입니다.
+        step = RENDER_CHUNK_SIZE // 4
+        for offset in range(0, max(1, total), step):
+            dump = body.preview(offset, step, hex_view=True)
+            yield (prefix + dump if offset == 0 else "\n" + dump), min(total, offset + step)
+
+    @staticmethod
+    def _decoded_chunks(prefix: str, body: BodyHandle, content: bytes):
+        # 조각 경계에서 멀티바이트 문자가 깨지지 않도록 점진적 디코더를 사용합니다.
+        try:
+            decoder = codecs.getincrementaldecoder(body.charset)(errors='replace')
+        except LookupError:
+            decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        total = len(content)
+        for offset in range(0, max(1, total), RENDER_CHUNK_SIZE):
+            end = min(total, offset + RENDER_CHUNK_SIZE)
+            text = decoder.decode(content[offset:end], final=end >= total)
+            yield (prefix + text if offset == 0 else text), end
+
+
+class BodyHighlighter(QSyntaxHighlighter):
+    """JSON/HTML 바디용 가벼운 정규식 구문 강조입니다. mode가 None이면 아무것도 하지 않습니다."""
+
+    RULES = {
+        "json": [
+            (re.compile(r'"(?:[^"\\]|\\.)*"(?=\s*:)'), "#881391"),
+            (re.compile(r':\s*("(?:[^"\\]|\\.)*")'), "#1a1aa6"),
+            (re.compile(r'\b-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?\b'), "#098658"),
+            (re.compile(r'\b(?:true|false|null)\b'), "#0000ff"),
+        ],
+        "markup": [
+            (re.compile(r'</?[\w:-]+|/?>'), "#800000"),
+            (re.compile(r'\s([\w:-]+)(?==)'), "#e50000"),
+            (re.compile(r'"[^"]*"'), "#0000ff"),
+            (re.compile(r'<!--.*?-->'), "#008000"),
+        ],
+    }
+
+    def __init__(self, document):
+        super().__init__(document)
+        self.mode: str | None = None
+        self._formats = {}
+
+    def set_mode(self, mode: str | None):
+        if mode == self.mode:
+            return
+        self.mode = mode
+        self.rehighlight()
+
+    def _format(self, color: str) -> QTextCharFormat:
+        fmt = self._formats.get(color)
+        if fmt is None:
+            fmt = QTextCharFormat()
+            fmt.setForeground(QColor(color))
+            self._formats[color] = fmt
+        return fmt
+
+    def highlightBlock(self, text: str):
+        if self.mode is None or len(text) > 10000:
+            return
+        for pattern, color in self.RULES[self.mode]:
+            fmt = self._format(color)
+            for match in pattern.finditer(text):
+                group = 1 if pattern.groups else 0
+                start, end = match.span(group)
+                self.setFormat(start, end - start, fmt)
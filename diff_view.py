@@ -0,0 +1,152 @@
+import queue
+import threading
+
+from PySide6.QtCore import QObject, Signal, Qt
+from PySide6.QtGui import QColor, QFont, QSyntaxHighlighter, QTextCharFormat
+from PySide6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLabel, QCheckBox, QPlainTextEdit
+
+from response_diff import DiffCache, ResponseDiff, diff_details
+
+
+class DiffWorker(QObject):
+    """원본/리플레이 응답 비교를 워커 스레드에서 실행하고 결과를 쌍별로 캐시합니다.
+
+    마지막으로 요청한 쌍만 계산하며, 그 사이에 쌓인 이전 요청은 버립니다.
+    """
+
+    # (키, ResponseDiff 또는 오류 메시지 문자열)
+    diff_ready = Signal(object, object)
+
+    def __init__(self, flow_store, parent=None):
+        super().__init__(parent)
+        self.flow_store = flow_store
+        self.cache = DiffCache()
+        self._lock = threading.Lock()
+        self._latest: tuple | None = None
+        self._queue = queue.SimpleQueue()
+        self._worker = threading.Thread(target=self._run, name="DiffWorker", daemon=True)
+        self._worker.start()
+
+    def request(self, original_id: str, replay_id: str, structural: bool) -> tuple:
+        """비교를 요청하고 키를 반환합니다. 캐시에 있으면 바로 diff_ready를 보냅니다."""
+        key = (original_id, replay_id, structural)
+        with self._lock:
+            self._latest = key
+        cached = self.cache.get(key)
+        if cached is not None:
+            self.diff_ready.emit(key, cached)
+        else:
+            self._queue.put(key)
+        return key
+
+    def _run(self):
+        while True:
+            key = self._queue.get()
+            with self._lock:
+                if key != self._latest:
+                    continue
+            if self.cache.get(key) is not None:
+                continue
+            original_id, replay_id, structural = key
+            try:
+                original = self.flow_store.get_details(original_id, cache=False)
+                replay = self.flow_store.get_details(replay_id, cache=False)
+                if original is None or replay is None:
+                    self.diff_ready.emit(key, "원본 또는 리플레이 Flow가 저장소에 없습니다.")
+                    continue
+                result = diff_details(original, replay, structural)
+                self.cache.put(key, result)
+                self.diff_ready.emit(key, result)
+            except Exception as e:
+                self.diff_ready.emit(key, f"응답을 비교할 수 없습니다: {e}")
+
+
+class DiffHighlighter(QSyntaxHighlighter):
+    """줄 앞의 표시(+, -, ~, @)에 따라 색을 입힙니다."""
+
+    def __init__(self, document):
+        super().__init__(document)
+        self.formats = {}
+        for marker, color in (("+", "#2e7d32"), ("-", "#c62828"), ("~", "#ef6c00"), ("@", "#1565c0")):
+            text_format = QTextCharFormat()
+            text_format.setForeground(QColor(color))
+            if marker == "@":
+                text_format.setFontWeight(QFont.Bold)
+            self.formats[marker] = text_format
+
+    def highlightBlock(self, text):
+        text_format = self.formats.get(text[:1])
+        if text_format is not None:
+            self.setFormat(0, len(text), text_format)
+
+
+class ReplayDiffWidget(QWidget):
+    """리플레이 Flow의 응답을 원본과 비교해 보여주는 History 상세 보기 탭입니다.
+
+    비교는 탭이 보일 때만 요청하고, JSON은 기본으로 키 경로 단위로 비교합니다.
+    """
+
+    def __init__(self, flow_store, parent=None):
+        super().__init__(parent)
+        self.worker = DiffWorker(flow_store, self)
+        self.worker.diff_ready.connect(self.on_diff_ready)
+        self._pair: tuple[str, str] | None = None
+        self._shown_key: tuple | None = None
+        self._pending_key: tuple | None = None
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        option_layout = QHBoxLayout()
+        self.summary_label = QLabel("")
+        self.summary_label.setTextInteractionFlags(Qt.TextSelectableByMouse)
+        self.structural_checkbox = QCheckBox("JSON 구조 비교")
+        self.structural_checkbox.setChecked(True)
+        self.structural_checkbox.toggled.connect(lambda _: self._refresh())
+        option_layout.addWidget(self.summary_label, 1)
+        option_layout.addWidget(self.structural_checkbox)
+        layout.addLayout(option_layout)
+
+        self.diff_text = QPlainTextEdit()
+        self.diff_text.setReadOnly(True)
+        self.diff_text.setLineWrapMode(QPlainTextEdit.NoWrap)
+        self.highlighter = DiffHighlighter(self.diff_text.document())
+        layout.addWidget(self.diff_text)
+        self.clear()
+
+    def clear(self, message: str = "리플레이로 만든 Flow를 선택하면 원본 응답과 비교합니다."):
+        self._pair = None
+        self._shown_key = None
+        self._pending_key = None
+        self.summary_label.setText(message)
+        self.diff_text.clear()
+
+    def show_pair(self, original_id: str, replay_id: str):
+        """비교할 쌍을 정합니다. 탭이 보이지 않으면 다음에 보일 때 계산합니다."""
+        self._pair = (original_id, replay_id)
+        self._refresh()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self._refresh()
+
+    def _refresh(self):
+        if self._pair is None or not self.isVisible():
+            return
+        key = (*self._pair, self.structural_checkbox.isChecked())
+        if key in (self._shown_key, self._pending_key):
+            return
+        self._pending_key = key
+        self.summary_label.setText(f"비교 중... (원본 {self._pair[0]} ↔ 리플레이 {self._pair[1]})")
+        self.worker.request(*key)
+
+    def on_diff_ready(self, key: tuple, result: ResponseDiff | str):
+        if key != self._pending_key:
+            return
+        self._pending_key = None
+        self._shown_key = key
+        if isinstance(result, str):
+            self.summary_label.setText(result)
+            self.diff_text.clear()
+            return
+        self.summary_label.setText(f"원본 {key[0]} ↔ 리플레이 {key[1]}: {result.summary}")
+        self.diff_text.setPlainText("\n".join(result.lines) if result.lines else "(차이 없음)")
@@ -0,0 +1,315 @@
+import dataclasses
+import hashlib
+import html
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from html.parser import HTMLParser
+
+# AI 프롬프트에 넣는 페이지 HTML의 기본 토큰 예산
+DEFAULT_TOKEN_BUDGET = 16000
+DEFAULT_CACHE_SIZE = 32
+
+# 하위 트리째 버리는 요소 (AI가 페이지를 이해하는 데 쓸모가 없고 크기만 큰 것들)
+DROP_TAGS = {"script", "style", "svg", "noscript", "template", "link", "meta", "base", "canvas", "object", "embed"}
+# script.js가 주입한 AI 프롬프트 UI는 페이지 내용이 아니므로 뺍니다.
+DROP_CLASSES = {"ai-prompt-container"}
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+INTERACTIVE_TAGS = {"a", "button", "input", "select", "textarea", "form", "summary", "option"}
+INTERACTIVE_ROLES = {"button", "link", "tab", "checkbox", "radio", "menuitem", "option", "switch", "textbox",
+                     "combobox", "searchbox"}
+# 남기는 속성. 나머지(style, on*, data-* 대부분, 추적용 속성)는 버립니다.
+KEEP_ATTRS = ("id", "name", "type", "value", "placeholder", "href", "action", "method", "for", "role",
+              "aria-label", "alt", "title", "data-testid", "data-test", "data-qa", "checked", "disabled",
+              "selected", "contenteditable", "class")
+# 자신만으로 CSS 선택자가 되는 속성 (id 다음 우선순위)
+SELECTOR_ATTRS = ("data-testid", "data-test", "data-qa", "name", "aria-label")
+MAX_ATTR_LENGTH = 100
+MAX_CLASS_NAMES = 3
+# 프레임워크가 자동으로 만드는 id는 새로고침하면 바뀌므로 선택자로 쓰지 않습니다.
+_UNSTABLE_ID = re.compile(r"^\d|\d{4,}|^:|^(?:ember|yui_|ext-gen|mui-|react-select-)")
+_PLAIN_IDENT = re.compile(r"^[A-Za-z_-][\w-]*$")
+_WHITESPACE = re.compile(r"\s+")
+
+# 예산에 맞을 때까지 차례로 더 강하게 줄입니다. (반복 형제 유지 개수, 텍스트 노드 최대 길이)
+CONDENSE_LEVELS = ((3, 200), (2, 80), (1, 40), (1, 16))
+
+
+def estimate_tokens(text: str) -> int:
+    """토큰 수 근사치입니다. (UTF-8 4바이트당 1토큰, 실제 토크나이저 호출 없이 계산)"""
+    return (len(text.encode("utf-8")) + 3) // 4
+
+
+class _Node:
+    __slots__ = ("tag", "attrs", "children", "parent", "index", "type_counts", "_selector")
+
+    def __init__(self, tag: str, attrs: dict, parent: "_Node | None", index: int):
+        self.tag = tag
+        self.attrs = attrs
+        self.children: list = []
+        self.parent = parent
+        # 원본 DOM 기준의 :nth-of-type 번호. (버린 요소도 세므로 실제 페이지에서 그대로 맞음)
+        self.index = index
+        self.type_counts: dict[str, int] = {}
+        self._selector = None
+
+    def own_selector(self) -> str | None:
+        element_id = self.attrs.get("id")
+        if element_id and not _UNSTABLE_ID.search(element_id):
+            if _PLAIN_IDENT.match(element_id):
+                return f"#{element_id}"
+            return f'[id="{_css_string(element_id)}"]'
+        for name in SELECTOR_ATTRS:
+            value = self.attrs.get(name)
+            if value:
+                return f'{self.tag}[{name}="{_css_string(value)}"]'
+        return None
+
+    def selector(self) -> str:
+        if self._selector is None:
+            own = self.own_selector()
+            if own is not None:
+                self._selector = own
+            elif self.parent is None or self.tag in ("html", "body"):
+                self._selector = self.tag
+            else:
+                self._selector = f"{self.parent.selector()} > {self.tag}:nth-of-type({self.index})"
+        return self._selector
+
+    def is_interactive(self) -> bool:
+        attrs = self.attrs
+        if self.tag in INTERACTIVE_TAGS:
+            return self.tag != "a" or "href" in attrs
+        return (attrs.get("role") in INTERACTIVE_ROLES or "onclick" in attrs
+                or "contenteditable" in attrs or "tabindex" in attrs)
+
+    def signature(self) -> tuple:
+        """반복되는 형제(목록 항목, 표 행, 카드)를 알아보기 위한 구조 서명입니다."""
+        return (self.tag, self.attrs.get("class", ""),
+                tuple(child.tag for child in self.children if isinstance(child, _Node)))
+
+
+def _css_string(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"')
+
+
+def _attr_string(value: str) -> str:
+    # 속성 값 안에서는 &와 "만 바꾸면 되므로 선택자의 '>'는 읽기 쉽게 그대로 둡니다.
+    return value.replace("&", "&amp;").replace('"', "&quot;")
+
+
+class _TreeBuilder(HTMLParser):
+    """브라우저가 직렬화한 outerHTML을 가벼운 트리로 만듭니다. 버릴 요소는 트리에 넣지 않습니다."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.root = _Node("#document", {}, None, 1)
+        self._stack = [self.root]
+        # 버리는 하위 트리 안에 있을 때의 깊이 (0이면 정상)
+        self._skip_depth = 0
+
+    def _open(self, tag: str, attrs: list, void: bool):
+        if self._skip_depth:
+            if not void:
+                self._skip_depth += 1
+            return
+        parent = self._stack[-1]
+        parent.type_counts[tag] = index = parent.type_counts.get(tag, 0) + 1
+        attr_map = {name: value or "" for name, value in attrs}
+        if tag in DROP_TAGS or DROP_CLASSES.intersection(attr_map.get("class", "").split()):
+            if not void:
+                self._skip_depth = 1
+            return
+        node = _Node(tag, attr_map, parent, index)
+        parent.children.append(node)
+        if not void:
+            self._stack.append(node)
+
+    def handle_starttag(self, tag, attrs):
+        self._open(tag, attrs, tag in VOID_TAGS)
+
+    def handle_startendtag(self, tag, attrs):
+        self._open(tag, attrs, True)
+
+    def handle_endtag(self, tag):
+        if self._skip_depth:
+            self._skip_depth -= 1
+            return
+        # 짝이 맞지 않는 닫는 태그는 무시하고, 맞으면 그 사이에 열린 요소를 함께 닫습니다.
+        for position in range(len(self._stack) - 1, 0, -1):
+            if self._stack[position].tag == tag:
+                del self._stack[position:]
+                return
+
+    def handle_data(self, data):
+        if self._skip_depth:
+            return
+        text = _WHITESPACE.sub(" ", data).strip()
+        if text:
+            self._stack[-1].children.append(text)
+
+
+@dataclass
+class CondensedDom:
+    text: str
+    original_bytes: int
+    condensed_bytes: int
+    original_tokens: int
+    condensed_tokens: int
+    level: int
+    truncated: bool
+    elapsed_ms: float
+    cached: bool = False
+
+    def summary(self) -> str:
+        ratio = self.original_bytes / self.condensed_bytes if self.condensed_bytes else 0.0
+        state = "캐시" if self.cached else f"{self.elapsed_ms:.1f}ms"
+        cut = ", 예산 초과로 잘림" if self.truncated else ""
+        return (f"{self.original_bytes:,} bytes/~{self.original_tokens:,} tokens -> "
+                f"{self.condensed_bytes:,} bytes/~{self.condensed_tokens:,} tokens "
+                f"({ratio:.1f}x, 단계 {self.level}, {state}{cut})")
+
+
+class DomCondenser:
+    """AI 프롬프트용으로 페이지 HTML을 줄이고 토큰 예산에 맞춥니다.
+
+    script/style/SVG 등을 버리고, 상호작용 가능한 요소는 안정적인 CSS 선택자(sel 속성)와 함께 남기며,
+    반복되는 형제 구조는 앞의 몇 개만 남기고 접습니다. 결과는 (URL, DOM 해시)로 캐시합니다.
+    """
+
+    def __init__(self, token_budget: int = DEFAULT_TOKEN_BUDGET, cache_size: int = DEFAULT_CACHE_SIZE):
+        self.token_budget = token_budget
+        self.cache_size = cache_size
+        self._cache: OrderedDict[tuple, CondensedDom] = OrderedDict()
+
+    def condense(self, html_content: str, url: str | None = None) -> CondensedDom:
+        digest = hashlib.blake2b(html_content.encode("utf-8", "surrogatepass"), digest_size=16).hexdigest()
+        key = (url or "", digest, self.token_budget)
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            return dataclasses.replace(cached, cached=True)
+
+        started = time.perf_counter()
+        builder = _TreeBuilder()
+        builder.feed(html_content)
+        builder.close()
+
+        text, level = "", 0
+        for level, (keep_repeats, max_text) in enumerate(CONDENSE_LEVELS):
+            out: list[str] = []
+            self._render_children(builder.root, keep_repeats, max_text, out)
+            text = "".join(out)
+            if estimate_tokens(text) <= self.token_budget:
+                break
+        truncated = estimate_tokens(text) > self.token_budget
+        if truncated:
+            text = self._truncate(text)
+
+        result = CondensedDom(
+            text=text,
+            original_bytes=len(html_content.encode("utf-8", "surrogatepass")),
+            condensed_bytes=len(text.encode("utf-8")),
+            original_tokens=estimate_tokens(html_content),
+            condensed_tokens=estimate_tokens(text),
+            level=level,
+            truncated=truncated,
+            elapsed_ms=(time.perf_counter() - started) * 1000,
+        )
+        self._cache[key] = result
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return result
+
+    def _truncate(self, text: str) -> str:
+        limit = self.token_budget * 4
+        cut = text.encode("utf-8")[:limit].decode("utf-8", errors="ignore")
+        # 태그 중간에서 자르지 않도록 마지막 '>'까지만 남깁니다.
+        end = cut.rfind(">")
+        return (cut[:end + 1] if end != -1 else cut) + "<!-- truncated -->"
+
+    def _render_children(self, node: _Node, keep_repeats: int, max_text: int, out: list[str]):
+        run_signature = None
+        run_length = 0
+        hidden = 0
+        hidden_example = None
+        for child in node.children:
+            if isinstance(child, str):
+                if hidden:
+                    out.append(f"<!-- {hidden} more similar {hidden_example} -->")
+                    hidden = 0
+                run_signature, run_length = None, 0
+                out.append(html.escape(self._shorten(child, max_text), quote=False))
+                continue
+            signature = child.signature()
+            if signature == run_signature:
+                run_length += 1
+                if run_length > keep_repeats:
+                    hidden += 1
+                    continue
+            else:
+                if hidden:
+                    out.append(f"<!-- {hidden} more similar {hidden_example} -->")
+                    hidden = 0
+                run_signature, run_length = signature, 1
+                hidden_example = self._open_tag(child.tag, {"class": child.attrs.get("class", "")})
+            self._render(child, keep_repeats, max_text, out)
+        if hidden:
+            out.append(f"<!-- {hidden} more similar {hidden_example} -->")
+
+    def _render(self, node: _Node, keep_repeats: int, max_text: int, out: list[str]):
+        interactive = node.is_interactive()
+        attrs = self._kept_attrs(node)
+        if interactive and node.own_selector() is None:
+            attrs["sel"] = node.selector()
+
+        # 속성이 없는 단순 래퍼(div/span 중첩)는 벗겨 내고 내용만 남깁니다.
+        if not interactive and node.tag in ("div", "span") and set(attrs) <= {"class"}:
+            elements = [child for child in node.children if isinstance(child, _Node)]
+            if len(elements) == len(node.children) and len(elements) <= 1:
+                if elements:
+                    self._render(elements[0], keep_repeats, max_text, out)
+                return
+
+        start = len(out)
+        out.append(self._open_tag(node.tag, attrs))
+        if node.tag in VOID_TAGS:
+            return
+        self._render_children(node, keep_repeats, max_text, out)
+        if len(out) == start + 1 and not interactive and not attrs:
+            # 내용도 속성도 없는 요소는 버립니다.
+            del out[start:]
+            return
+        out.append(f"</{node.tag}>")
+
+    @staticmethod
+    def _open_tag(tag: str, attrs: dict) -> str:
+        parts = [tag]
+        for name, value in attrs.items():
+            if value == "":
+                if name != "class":
+                    parts.append(name)
+            else:
+                parts.append(f'{name}="{_attr_string(value)}"')
+        return f"<{' '.join(parts)}>"
+
+    @staticmethod
+    def _kept_attrs(node: _Node) -> dict:
+        attrs = {}
+        for name in KEEP_ATTRS:
+            value = node.attrs.get(name)
+            if value is None:
+                continue
+            if name == "class":
+                value = " ".join(value.split()[:MAX_CLASS_NAMES])
+            elif name == "href" and value.startswith(("data:", "javascript:")):
+                value = value.split(":", 1)[0] + ":..."
+            if len(value) > MAX_ATTR_LENGTH:
+                value = value[:MAX_ATTR_LENGTH] + "..."
+            attrs[name] = value
+        return attrs
+
+    @staticmethod
+    def _shorten(text: str, max_text: int) -> str:
+        return text if len(text) <= max_text else text[:max_text] + "…"
@@ -0,0 +1,167 @@
+import re
+import time
+from dataclasses import dataclass, field
+
+# 기본 차단 규칙 (GUI의 Filters 탭에서 실행 중에 수정할 수 있습니다)
+DEFAULT_BLOCKED_DOMAINS = [
+    "google-analytics.com", "googletagmanager.com",
+    "content-autofill.googleapis.com",
+]
+DEFAULT_BLOCKED_EXTENSIONS = [
+    '.js', '.css', '.png', '.jpg', '.jpeg', '.gif', '.svg', '.ico',
+    '.mp3', '.mp4', '.woff', '.woff2', '.ttf', '.eot', '.webp'
+]
+DEFAULT_BLOCKED_CONTENT_TYPES = [
+    'application/javascript', 'text/css', 'image/', 'video/', 'audio/',
+    'font/', 'application/font-woff'
+]
+
+_TERMINAL = ""  # 트라이 노드에서 규칙이 끝나는 지점을 표시하는 키 (도메인 라벨은 빈 문자열이 될 수 없음)
+
+
+@dataclass
+class FilterRules:
+    blocked_domains: list[str] = field(default_factory=lambda: list(DEFAULT_BLOCKED_DOMAINS))
+    blocked_extensions: list[str] = field(default_factory=lambda: list(DEFAULT_BLOCKED_EXTENSIONS))
+    blocked_content_types: list[str] = field(default_factory=lambda: list(DEFAULT_BLOCKED_CONTENT_TYPES))
+
+
+class CompiledFilters:
+    """FilterRules를 hot path에서 바로 쓸 수 있는 자료구조로 컴파일한 결과입니다.
+
+    - 도메인: 라벨을 뒤집은 suffix 트라이 (example.com 규칙은 a.example.com에도 적용)
+    - 확장자: set
+    - Content-Type: 접두사들을 하나로 합친 정규식 (긴 접두사 우선)
+    """
+
+    def __init__(self, rules: FilterRules):
+        self.rules = rules
+
+        self.domain_trie: dict = {}
+        for domain in rules.blocked_domains:
+            domain = domain.strip().lower().strip('.')
+            if not domain:
+                continue
+            node = self.domain_trie
+            for label in reversed(domain.split('.')):
+                node = node.setdefault(label, {})
+            node[_TERMINAL] = domain
+
+        self.extensions = {
+            ext if ext.startswith('.') else f".{ext}"
+            for ext in (e.strip().lower() for e in rules.blocked_extensions) if ext
+        }
+
+        prefixes = sorted({c.strip().lower() for c in rules.blocked_content_types if c.strip()},
+                          key=len, reverse=True)
+        self.content_type_regex = re.compile("|".join(map(re.escape, prefixes))) if prefixes else None
+
+        # 규칙별 히트 수는 컴파일 시점에 키를 모두 만들어 두어 다른 스레드에서 안전하게 복사할 수 있게 합니다.
+        self.hits: dict[tuple[str, str], int] = {}
+        for domain in self._iter_domain_rules(self.domain_trie):
+            self.hits[("domain", domain)] = 0
+        for ext in self.extensions:
+            self.hits[("extension", ext)] = 0
+        for prefix in prefixes:
+            self.hits[("content_type", prefix)] = 0
+
+        # 검사 종류별 (평가 횟수, 누적 시간 ns)
+        self.evaluations = {"domain": 0, "extension": 0, "content_type": 0}
+        self.elapsed_ns = {"domain": 0, "extension": 0, "content_type": 0}
+
+    @staticmethod
+    def _iter_domain_rules(node: dict):
+        for key, child in node.items():
+            if key == _TERMINAL:
+                yield child
+            else:
+                yield from CompiledFilters._iter_domain_rules(child)
+
+
+class FilterEngine:
+    """요청/응답 훅에서 사용하는 컴파일된 필터 엔진입니다.
+
+    load_rules()는 새 규칙을 완전히 컴파일한 뒤 참조 하나만 교체하므로,
+    프록시가 동작하는 중에도 재시작 없이 규칙을 바꿀 수 있습니다.
+    """
+
+    def __init__(self, rules: FilterRules | None = None):
+        self._compiled = CompiledFilters(rules or FilterRules())
+        # 프록시가 별도 프로세스에서 동작하면 그 프로세스가 주기적으로 보내는 통계를 보관합니다.
+        self.remote_stats: dict | None = None
+
+    @property
+    def rules(self) -> FilterRules:
+        return self._compiled.rules
+
+    def load_rules(self, rules: FilterRules):
+        self._compiled = CompiledFilters(rules)
+        print(f"필터 규칙이 적용되었습니다: 도메인 {len(rules.blocked_domains)}개, "
+              f"확장자 {len(rules.blocked_extensions)}개, Content-Type {len(rules.blocked_content_types)}개")
+
+    def match_domain(self, host: str) -> str | None:
+        """host가 차단 도메인(또는 그 하위 도메인)이면 해당 규칙을 반환합니다."""
+        compiled = self._compiled
+        start = time.perf_counter_ns()
+        matched = None
+        node = compiled.domain_trie
+        for label in reversed(host.lower().rstrip('.').split('.')):
+            node = node.get(label)
+            if node is None:
+                break
+            if _TERMINAL in node:
+                matched = node[_TERMINAL]
+                break
+        self._record(compiled, "domain", matched, start)
+        return matched
+
+    def match_extension(self, path: str) -> str | None:
+        """요청 경로(쿼리 포함)의 확장자가 차단 목록에 있으면 해당 확장자를 반환합니다."""
+        compiled = self._compiled
+        start = time.perf_counter_ns()
+        path = path.split('?', 1)[0].split('#', 1)[0]
+        slash = path.rfind('/')
+        dot = path.rfind('.')
+        matched = None
+        # os.path.splitext와 같이 '.bashrc'처럼 점으로 시작하는 파일명은 확장자로 보지 않습니다.
+        if dot > slash + 1:
+            extension = path[dot:].lower()
+            if extension in compiled.extensions:
+                matched = extension
+        self._record(compiled, "extension", matched, start)
+        return matched
+
+    def match_content_type(self, content_type: str) -> str | None:
+        """Content-Type 헤더 값이 차단 접두사로 시작하면 해당 접두사를 반환합니다."""
+        compiled = self._compiled
+        start = time.perf_counter_ns()
+        matched = None
+        if compiled.content_type_regex is not None:
+            m = compiled.content_type_regex.match(content_type.lower().lstrip())
+            if m:
+                matched = m.group(0)
+        self._record(compiled, "content_type", matched, start)
+        return matched
+
+    @staticmethod
+    def _record(compiled: CompiledFilters, kind: str, matched: str | None, start: int):
+        compiled.evaluations[kind] += 1
+        compiled.elapsed_ns[kind] += time.perf_counter_ns() - start
+        if matched is not None:
+            compiled.hits[(kind, matched)] += 1
+
+    def stats(self) -> dict:
+        """규칙별 히트 수와 검사 종류별 평균 평가 비용(ns)을 반환합니다."""
+        if self.remote_stats is not None:
+            return self.remote_stats
+        compiled = self._compiled
+        evaluations = dict(compiled.evaluations)
+        elapsed = dict(compiled.elapsed_ns)
+        return {
+            "hits": dict(compiled.hits),
+            "evaluations": evaluations,
+            "avg_cost_ns": {
+                kind: (elapsed[kind] / count if count else 0.0)
+                for kind, count in evaluations.items()
+            },
+        }
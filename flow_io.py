@@ -0,0 +1,219 @@
+import gzip
+import io
+import json
+import os
+import threading
+import uuid
+from typing import BinaryIO, Callable, Iterator
+
+import mitmproxy.http
+import zstandard
+from mitmproxy import version
+from mitmproxy.addons.savehar import SaveHar
+from mitmproxy.io import FlowReader, FlowWriter
+from mitmproxy.io.har import request_to_flow
+
+from channel import FlowFeed
+from flow_store import FlowStore
+from openapi import OpenApiBuilder
+from proxy import flow_data_from_flow, submit_to_openapi
+
+# 파일 확장자로 형식과 압축을 고릅니다. (예: capture.har.zst, session.flows.gz)
+HAR_EXTENSIONS = (".har", ".zhar")
+READ_CHUNK_SIZE = 1024 * 1024
+IMPORT_BATCH_SIZE = 500
+
+# (처리한 Flow 수, 진행률 0.0~1.0)
+ProgressCallback = Callable[[int, float], None]
+
+
+def _compression(path: str) -> str | None:
+    lower = path.lower()
+    if lower.endswith(".gz"):
+        return "gzip"
+    if lower.endswith(".zst"):
+        return "zstd"
+    return None
+
+
+def is_har_path(path: str) -> bool:
+    lower = path.lower()
+    for suffix in (".gz", ".zst"):
+        if lower.endswith(suffix):
+            lower = lower[:-len(suffix)]
+    return lower.endswith(HAR_EXTENSIONS)
+
+
+def open_for_write(path: str) -> BinaryIO:
+    """확장자에 맞게 압축 스트림을 씌워 쓰기용으로 엽니다."""
+    compression = _compression(path)
+    if compression == "gzip":
+        return gzip.open(path, "wb", compresslevel=6)
+    if compression == "zstd":
+        return zstandard.ZstdCompressor(level=6).stream_writer(open(path, "wb"), closefd=True)
+    return open(path, "wb")
+
+
+def open_for_read(path: str) -> tuple[io.BufferedReader, BinaryIO]:
+    """(압축 해제된 읽기 스트림, 원본 파일)을 반환합니다. 원본 파일의 위치로 진행률을 계산합니다."""
+    raw = open(path, "rb")
+    compression = _compression(path)
+    if compression == "gzip":
+        return io.BufferedReader(gzip.GzipFile(fileobj=raw, mode="rb"), READ_CHUNK_SIZE), raw
+    if compression == "zstd":
+        reader = zstandard.ZstdDecompressor().stream_reader(raw, closefd=False)
+        return io.BufferedReader(reader, READ_CHUNK_SIZE), raw
+    return io.BufferedReader(raw, READ_CHUNK_SIZE), raw
+
+
+def iter_har_entries(fo: BinaryIO) -> Iterator[dict]:
+    """HAR 파일의 log.entries 원소를 하나씩 파싱합니다. 파일 전체를 메모리에 올리지 않습니다."""
+    decoder = json.JSONDecoder()
+    text_reader = io.TextIOWrapper(fo, encoding="utf-8-sig")
+    buffer = ""
+    eof = False
+
+    def fill() -> bool:
+        nonlocal buffer, eof
+        chunk = text_reader.read(READ_CHUNK_SIZE)
+        if not chunk:
+            eof = True
+            return False
+        buffer += chunk
+        return True
+
+    # "entries" 배열의 시작까지 건너뜁니다. (log.creator 등 앞쪽 필드는 작으므로 버퍼에 쌓아도 됩니다)
+    while True:
+        marker = buffer.find('"entries"')
+        if marker != -1:
+            bracket = buffer.find("[", marker)
+            if bracket != -1:
+                buffer = buffer[bracket + 1:]
+                break
+        if not fill():
+            raise ValueError("HAR 파일에서 log.entries를 찾을 수 없습니다.")
+
+    position = 0
+    while True:
+        # 원소 사이의 공백과 쉼표를 건너뜁니다.
+        while position < len(buffer) and buffer[position] in " \t\r\n,":
+            position += 1
+        if position >= len(buffer):
+            buffer, position = "", 0
+            if not fill():
+                raise ValueError("HAR 파일이 entries 도중에 끝났습니다.")
+            continue
+        if buffer[position] == "]":
+            return
+        try:
+            entry, end = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            # 원소가 버퍼 경계에서 잘렸으면 더 읽어서 다시 시도합니다.
+            buffer, position = buffer[position:], 0
+            if eof or not fill():
+                raise
+            continue
+        yield entry
+        position = end
+        if position > READ_CHUNK_SIZE:
+            buffer, position = buffer[position:], 0
+
+
+def iter_flows_from_file(path: str, progress: Callable[[float], None] | None = None) -> Iterator[mitmproxy.http.HTTPFlow]:
+    """HAR 또는 mitmproxy flow 파일(gzip/zstd 압축 가능)에서 HTTPFlow를 하나씩 읽습니다."""
+    total = os.path.getsize(path) or 1
+    fo, raw = open_for_read(path)
+    try:
+        head = fo.peek(4)[:4]
+        if head.startswith(b"\xef\xbb\xbf{") or head.lstrip().startswith(b"{"):
+            flows = (request_to_flow(entry) for entry in iter_har_entries(fo))
+        else:
+            flows = FlowReader(fo).stream()
+        for flow in flows:
+            if isinstance(flow, mitmproxy.http.HTTPFlow):
+                yield flow
+            if progress is not None:
+                progress(min(1.0, raw.tell() / total))
+    finally:
+        fo.close()
+        raw.close()
+
+
+def export_flows(flow_store: FlowStore, path: str, progress: ProgressCallback | None = None,
+                 cancel: threading.Event | None = None) -> int:
+    """저장소의 Flow를 HAR 또는 mitmproxy flow 형식으로 한 건씩 내보냅니다. 내보낸 개수를 반환합니다."""
+    total = len(flow_store) or 1
+    count = 0
+    har = is_har_path(path)
+    har_writer = SaveHar()
+    servers_seen = set()
+    with open_for_write(path) as out:
+        if har:
+            header = {"version": "1.2", "creator": {"name": "PongpSuite", "version": version.VERSION, "comment": ""},
+                      "pages": []}
+            # entries 배열만 열어 두고 원소를 하나씩 이어서 씁니다.
+            out.write(json.dumps({"log": header})[:-2].encode() + b', "entries": [\n')
+        else:
+            flow_writer = FlowWriter(out)
+
+        for flow_id, *_ in flow_store.iter_summaries():
+            if cancel is not None and cancel.is_set():
+                break
+            flow = flow_store.get_flow(flow_id)
+            if flow is None:
+                continue
+            if har:
+                if count:
+                    out.write(b",\n")
+                out.write(json.dumps(har_writer.flow_entry(flow, servers_seen)).encode())
+            else:
+                flow_writer.add(flow)
+            count += 1
+            if progress is not None and count % 100 == 0:
+                progress(count, count / total)
+
+        if har:
+            out.write(b"\n]}}\n")
+    if progress is not None:
+        progress(count, 1.0)
+    return count
+
+
+def import_flows(path: str, flow_store: FlowStore, shared_queue: FlowFeed,
+                 openapi_builder: OpenApiBuilder | None = None, progress: ProgressCallback | None = None,
+                 cancel: threading.Event | None = None, batch_size: int = IMPORT_BATCH_SIZE) -> int:
+    """파일의 Flow를 배치 단위로 저장소에 넣고 History 피드로 보냅니다. 가져온 개수를 반환합니다.
+
+    캡처된 Flow와 같은 경로(저장소 + 피드)를 거치므로 History 테이블, 검색 색인, 리플레이가
+    그대로 동작하고, GUI는 check_queue의 배치/시간 예산으로 끊어서 반영합니다.
+    """
+    count = 0
+    fraction = 0.0
+    batch: list[tuple] = []
+
+    def on_file_progress(value: float):
+        nonlocal fraction
+        fraction = value
+
+    def flush():
+        flow_store.add_many(batch)
+        for flow_data, flow in batch:
+            if openapi_builder is not None:
+                submit_to_openapi(openapi_builder, flow, flow_data)
+            shared_queue.put(flow_data)
+        batch.clear()
+        if progress is not None:
+            progress(count, fraction)
+
+    for flow in iter_flows_from_file(path, on_file_progress):
+        if cancel is not None and cancel.is_set():
+            break
+        # 같은 파일을 두 번 가져와도 기존 행을 덮어쓰지 않도록 ID가 겹치면 새로 발급합니다.
+        if flow_store.contains(flow.id):
+            flow.id = str(uuid.uuid4())
+        batch.append((flow_data_from_flow(flow), flow))
+        count += 1
+        if len(batch) >= batch_size:
+            flush()
+    flush()
+    return count
@@ -0,0 +1,323 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+from collections import OrderedDict
+
+import mitmproxy.http
+from mitmproxy.io import tnetstring, compat
+
+from body_store import BodyStore, BodySpool
+from proxy import FlowData, FlowDetails, BodyHandle, Headers, decode_headers
+
+# FlowData 필드 순서와 같은 flows 테이블 열 목록
+_FLOW_DATA_COLUMNS = ("flow_id, method, url, path, http_version, status_code, "
+                      "request_size, response_size, content_type, replay_of")
+
+
+class FlowStore:
+    """프록시와 GUI가 공유하는 디스크 기반 Flow 저장소입니다.
+
+    메타데이터는 SQLite 파일에, 바디는 내용 해시로 중복 제거·압축하는 BodyStore에 저장하고
+    최근에 조회한 Flow의 상세 정보만 메모리(LRU)에 유지하므로 세션이 길어져도 메모리 사용량이 일정합니다.
+    """
+
+    def __init__(self, db_path: str | None = None, hot_cache_size: int = 256,
+                 spill_threshold: int = 256 * 1024):
+        # 경로를 지정하지 않으면 세션 전용 임시 디렉토리를 만들고 종료 시 삭제합니다.
+        self._temp_dir = None
+        if db_path is None:
+            self._temp_dir = tempfile.mkdtemp(prefix="pongpsuite-")
+            db_path = os.path.join(self._temp_dir, "flows.sqlite3")
+
+        self.db_path = db_path
+        self.spill_dir = f"{db_path}.bodies"
+        os.makedirs(self.spill_dir, exist_ok=True)
+        self.hot_cache_size = hot_cache_size
+        self.spill_threshold = spill_threshold
+
+        self._lock = threading.Lock()
+        self._hot: OrderedDict[str, FlowDetails] = OrderedDict()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=OFF")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS flows (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                flow_id TEXT UNIQUE NOT NULL,
+                method TEXT,
+                url TEXT,
+                path TEXT,
+                http_version TEXT,
+                status_code TEXT,
+                request_size INTEGER,
+                response_size INTEGER,
+                content_type TEXT,
+                request_body_hash TEXT,
+                response_body_hash TEXT,
+                flow_state BLOB,
+                replay_of TEXT NOT NULL DEFAULT ''
+            )
+        """)
+        # replay_of 열이 생기기 전에 만든 저장소 파일도 그대로 열 수 있게 합니다.
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(flows)")}
+        if "replay_of" not in columns:
+            self._conn.execute("ALTER TABLE flows ADD COLUMN replay_of TEXT NOT NULL DEFAULT ''")
+        self.bodies = BodyStore(self._conn, self._lock, self.spill_dir, spill_threshold)
+        self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM flows").fetchone()[0]
+
+    def open_spool(self, flow_id: str, kind: str) -> BodySpool:
+        """스트리밍 모드 Flow의 바디를 저장할 spool 파일을 엽니다. (kind: 'request' 또는 'response')"""
+        return BodySpool(os.path.join(self.spill_dir, f"{flow_id}.{kind}"))
+
+    def discard_spool(self, spool: BodySpool):
+        """History에 저장하지 않기로 한 Flow의 spool 파일을 삭제합니다."""
+        spool.close()
+        try:
+            os.remove(spool.path)
+        except OSError:
+            pass
+
+    def _load_body(self, flow_id: str, kind: str) -> bytes:
+        """원본(content-encoding이 적용된 상태 그대로의) 바디를 BodyStore에서 읽습니다."""
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {kind}_body_hash FROM flows WHERE flow_id = ?", (flow_id,)
+            ).fetchone()
+        if row is None:
+            return b""
+        return self.bodies.get(row[0])
+
+    def _load_body_prefix(self, flow_id: str, kind: str, limit: int) -> bytes:
+        """원본 바디의 앞 limit 바이트만 읽습니다. (검색 색인용)"""
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {kind}_body_hash FROM flows WHERE flow_id = ?", (flow_id,)
+            ).fetchone()
+        if row is None:
+            return b""
+        return self.bodies.get_prefix(row[0], limit)
+
+    def _prepare_row(self, flow_data: FlowData, flow: mitmproxy.http.HTTPFlow,
+                     spools: dict[str, BodySpool] | None = None) -> tuple:
+        """바디를 BodyStore에 넣고(같은 내용이면 참조만 추가) INSERT할 행을 만듭니다.
+
+        spools에 있는 바디(스트리밍 모드)는 이미 spool 파일에 기록되어 있으므로 그 파일을 넘겨줍니다.
+        """
+        spools = spools or {}
+        state = flow.get_state()
+        request_raw = state["request"]["content"] or b""
+        state["request"]["content"] = None
+        response_raw = b""
+        if state.get("response"):
+            response_raw = state["response"]["content"] or b""
+            state["response"]["content"] = None
+        flow_state = tnetstring.dumps(state)
+
+        if "request" in spools:
+            request_hash = self.bodies.adopt_spool(spools["request"])
+        else:
+            request_hash = self.bodies.put(request_raw)
+        if "response" in spools:
+            response_hash = self.bodies.adopt_spool(spools["response"])
+        else:
+            response_hash = self.bodies.put(response_raw)
+
+        return (flow_data.flow_id, flow_data.method, flow_data.url, flow_data.path,
+                flow_data.http_version, flow_data.status_code,
+                flow_data.request_size, flow_data.response_size, flow_data.content_type,
+                request_hash, response_hash, flow_state, flow_data.replay_of)
+
+    def _body_hashes(self, flow_ids: list[str]) -> list[str | None]:
+        """Flow들이 참조하는 바디 해시를 모읍니다. (lock 보유 상태에서 호출)"""
+        hashes = []
+        for flow_id in flow_ids:
+            row = self._conn.execute(
+                "SELECT request_body_hash, response_body_hash FROM flows WHERE flow_id = ?", (flow_id,)
+            ).fetchone()
+            if row is not None:
+                hashes.extend(row)
+        return hashes
+
+    def _insert(self, rows: list[tuple]):
+        with self._lock:
+            # 같은 ID의 행을 덮어쓰면 이전 행이 참조하던 바디를 놓아 줍니다.
+            replaced = self._body_hashes([row[0] for row in rows])
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO flows (flow_id, method, url, path, http_version, status_code, "
+                "request_size, response_size, content_type, request_body_hash, response_body_hash, flow_state, "
+                "replay_of) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            self.bodies.release(replaced)
+            self._conn.commit()
+            for row in rows:
+                self._hot.pop(row[0], None)
+
+    def add(self, flow_data: FlowData, flow: mitmproxy.http.HTTPFlow,
+            spools: dict[str, BodySpool] | None = None):
+        """Flow를 저장합니다. 바디는 BodyStore에 분리 저장하고, 나머지 상태는 리플레이용으로 직렬화합니다."""
+        self._insert([self._prepare_row(flow_data, flow, spools)])
+
+    def add_many(self, items: list[tuple[FlowData, mitmproxy.http.HTTPFlow]]):
+        """여러 Flow를 한 트랜잭션으로 저장합니다. (가져오기처럼 대량으로 넣을 때 사용)"""
+        if items:
+            self._insert([self._prepare_row(flow_data, flow) for flow_data, flow in items])
+
+    def contains(self, flow_id: str) -> bool:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT 1 FROM flows WHERE flow_id = ?", (flow_id,)
+            ).fetchone() is not None
+
+    def delete(self, flow_ids: list[str]):
+        """Flow를 삭제하고, 더 이상 어떤 Flow도 참조하지 않는 바디를 함께 지웁니다."""
+        if not flow_ids:
+            return
+        with self._lock:
+            hashes = self._body_hashes(flow_ids)
+            self._conn.executemany("DELETE FROM flows WHERE flow_id = ?", [(flow_id,) for flow_id in flow_ids])
+            self.bodies.release(hashes)
+            self._conn.commit()
+            for flow_id in flow_ids:
+                details = self._hot.pop(flow_id, None)
+                if details is not None:
+                    details.release()
+
+    def evict_oldest(self, max_flows: int) -> list[str]:
+        """저장된 Flow가 max_flows개를 넘으면 오래된 것부터 삭제하고 삭제한 ID 목록을 반환합니다."""
+        with self._lock:
+            excess = self._conn.execute("SELECT COUNT(*) FROM flows").fetchone()[0] - max_flows
+            if excess <= 0:
+                return []
+            flow_ids = [row[0] for row in self._conn.execute(
+                "SELECT flow_id FROM flows ORDER BY seq LIMIT ?", (excess,)
+            )]
+        self.delete(flow_ids)
+        return flow_ids
+
+    def body_stats(self) -> dict:
+        """바디 저장소의 중복 제거/압축 통계를 반환합니다."""
+        return self.bodies.stats()
+
+    def _remember(self, details: FlowDetails):
+        """LRU 캐시에 Flow를 넣고, 한도를 넘으면 가장 오래된 항목을 버립니다. (lock 보유 상태에서 호출)"""
+        self._hot[details.flow.flow_id] = details
+        self._hot.move_to_end(details.flow.flow_id)
+        while len(self._hot) > self.hot_cache_size:
+            _, evicted = self._hot.popitem(last=False)
+            evicted.release()
+
+    def get(self, flow_id: str) -> FlowData | None:
+        """ID로 Flow 메타데이터를 조회합니다."""
+        with self._lock:
+            details = self._hot.get(flow_id)
+            if details is not None:
+                return details.flow
+            row = self._conn.execute(
+                f"SELECT {_FLOW_DATA_COLUMNS} FROM flows WHERE flow_id = ?", (flow_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return FlowData(*row)
+
+    def get_details(self, flow_id: str, cache: bool = True) -> FlowDetails | None:
+        """헤더와 지연 바디 핸들을 포함한 상세 정보를 조회합니다. 바디는 실제로 볼 때 읽힙니다.
+
+        cache=False이면 LRU를 건드리지 않습니다. (검색 색인처럼 한 번만 훑는 용도)
+        """
+        with self._lock:
+            details = self._hot.get(flow_id)
+            if details is not None and cache:
+                self._hot.move_to_end(flow_id)
+                return details
+
+        flow_data = self.get(flow_id)
+        if flow_data is None:
+            return None
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT flow_state FROM flows WHERE flow_id = ?", (flow_id,)
+            ).fetchone()
+        state = tnetstring.loads(row[0])
+
+        request_headers = decode_headers(state["request"]["headers"])
+        response_headers = decode_headers(state["response"]["headers"]) if state.get("response") else ()
+
+        def header_value(headers: Headers, name: str) -> str:
+            return next((v for k, v in headers if k.lower() == name), "")
+
+        details = FlowDetails(
+            flow=flow_data,
+            request_headers=request_headers,
+            response_headers=response_headers,
+            request_body=BodyHandle(
+                lambda: self._load_body(flow_id, "request"), flow_data.request_size,
+                header_value(request_headers, 'content-encoding'),
+                header_value(request_headers, 'content-type'),
+                lambda limit: self._load_body_prefix(flow_id, "request", limit)),
+            response_body=BodyHandle(
+                lambda: self._load_body(flow_id, "response"), flow_data.response_size,
+                header_value(response_headers, 'content-encoding'), flow_data.content_type,
+                lambda limit: self._load_body_prefix(flow_id, "response", limit)),
+        )
+        if cache:
+            with self._lock:
+                self._remember(details)
+        return details
+
+    def get_flow(self, flow_id: str) -> mitmproxy.http.HTTPFlow | None:
+        """리플레이용 HTTPFlow를 디스크의 직렬화 상태와 원본 바디로부터 복원합니다."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT flow_state FROM flows WHERE flow_id = ?", (flow_id,)
+            ).fetchone()
+        if row is None or row[0] is None:
+            return None
+
+        state = compat.migrate_flow(tnetstring.loads(row[0]))
+        state["request"]["content"] = self._load_body(flow_id, "request")
+        if state.get("response"):
+            state["response"]["content"] = self._load_body(flow_id, "response")
+        return mitmproxy.http.HTTPFlow.from_state(state)
+
+    def iter_summaries(self, batch_size: int = 5000):
+        """저장된 Flow의 (flow_id, method, url, status_code)를 바디 없이 순서대로 순회합니다."""
+        last_seq = 0
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT seq, flow_id, method, url, status_code FROM flows "
+                    "WHERE seq > ? ORDER BY seq LIMIT ?", (last_seq, batch_size)
+                ).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                yield row[1:]
+            last_seq = rows[-1][0]
+
+    def list_flows(self, after_seq: int = 0, limit: int = 100, url_contains: str = "") -> list[tuple[int, FlowData]]:
+        """seq가 after_seq보다 큰 Flow 메타데이터를 순서대로 최대 limit개 반환합니다. (URL 부분 일치 필터)"""
+        query = f"SELECT seq, {_FLOW_DATA_COLUMNS} FROM flows WHERE seq > ?"
+        params: list = [after_seq]
+        if url_contains:
+            query += " AND instr(url, ?) > 0"
+            params.append(url_contains)
+        query += " ORDER BY seq LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [(row[0], FlowData(*row[1:])) for row in rows]
+
+    def close(self):
+        """DB 연결을 닫고, 임시 세션 저장소였다면 디스크에서 삭제합니다."""
+        with self._lock:
+            self._conn.close()
+            self._hot.clear()
+        if self._temp_dir:
+            shutil.rmtree(self._temp_dir, ignore_errors=True)
@@ -1,28 +1,73 @@
 import queue
 import os
-import json
-from urllib.parse import urlparse
+import threading
+import time
 from PySide6.QtWidgets import (
-    QMainWindow, QTableWidget, QTableWidgetItem, QVBoxLayout, QWidget,
-    QSplitter, QTabWidget, QTextEdit, QPushButton, QHBoxLayout, QSpacerItem, QSizePolicy,
-    QLabel, QLineEdit
+    QMainWindow, QTableView, QHeaderView, QAbstractItemView, QVBoxLayout, QWidget,
+    QSplitter, QTabWidget, QPushButton, QHBoxLayout, QSpacerItem, QSizePolicy,
+    QLabel, QLineEdit, QPlainTextEdit, QCheckBox, QSpinBox, QFileDialog, QProgressBar
 )
-from PySide6.QtCore import QTimer, Qt, QUrl
-from PySide6.QtWebEngineWidgets import QWebEngineView
-
-from proxy import FlowData
+from PySide6.QtCore import QTimer, Qt, QUrl, Signal
+from PySide6.QtGui import QTextCursor
+
+from proxy import FlowData, FlowDetails
+from flow_store import FlowStore
+from history_model import HistoryTableModel
+from filters import FilterEngine, FilterRules
+from channel import AsyncChannel, FlowFeed
+from openapi import OpenApiBuilder
+from search_index import SearchIndex
+from bulk_replay_view import BulkReplayWidget
+from stats_view import StatsWidget
+from metrics import Metrics
+from detail_renderer import DetailRenderer, BodyHighlighter, HIGHLIGHT_MAX_SIZE
+from diff_view import ReplayDiffWidget
+from websocket_view import WebSocketWidget
+from websocket_capture import DEFAULT_WEBSOCKET_CAPACITY
 from browser import PlaywrightThread
 
 class MainWindow(QMainWindow):
-    def __init__(self, shared_queue: queue.Queue, command_queue: queue.Queue):
+    # 프록시 스레드에서 emit하면 GUI 스레드에서 check_queue가 실행됩니다. (queued connection)
+    flows_available = Signal()
+    # 검색 색인 워커가 배치를 끝낼 때마다 emit합니다.
+    index_updated = Signal()
+    # 가져오기/내보내기 워커 스레드의 진행 상황 (처리한 개수, 진행률)과 완료 메시지
+    transfer_progress = Signal(int, float)
+    transfer_finished = Signal(str)
+
+    # 타이머 한 번에 큐에서 꺼낼 최대 Flow 수와 시간 예산 (트래픽 폭주 시 UI 멈춤 방지)
+    QUEUE_BATCH_LIMIT = 5000
+    QUEUE_TIME_BUDGET = 0.03
+
+    def __init__(self, shared_queue: FlowFeed, command_queue: AsyncChannel, flow_store: FlowStore, filter_engine: FilterEngine, openapi_builder: OpenApiBuilder, browser_command_queue: AsyncChannel | None = None, metrics: Metrics | None = None, metrics_url: str | None = None, websocket_queue: FlowFeed | None = None, websocket_capacity: int = DEFAULT_WEBSOCKET_CAPACITY):
         super().__init__()
         self.setWindowTitle("PongpSuite")
         self.resize(1024, 768) 
 
         self.queue = shared_queue
         self.command_queue = command_queue
-        self.flows_data_list = []
+        # 테이블 모델에는 행별 Flow ID와 표시용 컬럼만 보관하고, 상세 데이터는 저장소에서 필요할 때 불러옵니다.
+        self.flow_store = flow_store
+        self.history_model = HistoryTableModel(self)
+        self.search_index = SearchIndex(flow_store, on_indexed=self.index_updated.emit)
+        self.active_search_query = ""
+        # 필터 규칙 변경은 명령 큐로 보내고, 통계는 공유 엔진에서 읽기만 합니다.
+        self.filter_engine = filter_engine
+        self.openapi_builder = openapi_builder
+        # 파이프라인 단계별 메트릭 (테이블 추가 시간을 여기서 기록하고 Stats 탭에서 표시)
+        self.metrics = metrics or Metrics()
+        self.written_spec_version = -1
         self.current_selected_flow_data: FlowData | None = None
+        self.current_selected_details: FlowDetails | None = None
+        # History에서 보낸 리플레이의 원본 ID. 결과 Flow가 들어오면 Diff 탭에 바로 비교를 띄웁니다.
+        self.pending_replay_source: str | None = None
+        # 상세 보기는 워커에서 조각 단위로 만들어지며, 현재 세대가 아닌 조각은 버립니다.
+        self.detail_renderer = DetailRenderer(self)
+        self.render_generations = {"request": 0, "response": 0}
+        self.request_render_done = True
+        self.response_has_more = False
+        self.response_more_pending = False
+        self.transfer_cancel: threading.Event | None = None
 
         # --- 메인 탭 위젯 설정 ---
         central_widget = QWidget()
@@ -42,26 +87,70 @@ class MainWindow(QMainWindow):
         
         top_layout.addWidget(QLabel("Scope:"))
         self.scope_input = QLineEdit()
-        self.scope_input.setPlaceholderText("https://*.example.com/*")
-        self.scope_input.textChanged.connect(self.on_scope_changed)
+        self.scope_input.setPlaceholderText("https://*.example.com/*  api.example.org  -*.cdn.example.com")
+        self.scope_input.setToolTip("공백/쉼표로 여러 패턴을 구분하고, '-'로 시작하면 제외합니다. Enter로 적용.\n"
+                                    "Scope 밖 host의 HTTPS는 복호화하지 않고 그대로 통과시킵니다.")
         top_layout.addWidget(self.scope_input)
 
         top_layout.addSpacerItem(QSpacerItem(40, 20, QSizePolicy.Expanding, QSizePolicy.Minimum))
 
+        # 이 크기를 넘는 바디는 프록시가 버퍼링하지 않고 스트리밍하며 디스크에 저장합니다. (0 = 끔)
+        top_layout.addWidget(QLabel("Stream bodies >"))
+        self.stream_threshold_input = QSpinBox()
+        self.stream_threshold_input.setRange(0, 10240)
+        self.stream_threshold_input.setValue(5)
+        self.stream_threshold_input.setSuffix(" MB")
+        self.stream_threshold_input.setSpecialValueText("Off")
+        top_layout.addWidget(self.stream_threshold_input)
+
+        self.import_button = QPushButton("Import...")
+        self.export_button = QPushButton("Export...")
+        self.transfer_progress_bar = QProgressBar()
+        self.transfer_progress_bar.setRange(0, 1000)
+        self.transfer_progress_bar.setMaximumWidth(160)
+        self.transfer_progress_bar.setVisible(False)
+        self.transfer_cancel_button = QPushButton("Cancel")
+        self.transfer_cancel_button.setVisible(False)
+        top_layout.addWidget(self.import_button)
+        top_layout.addWidget(self.export_button)
+        top_layout.addWidget(self.transfer_progress_bar)
+        top_layout.addWidget(self.transfer_cancel_button)
+
         self.open_button = QPushButton("Open Browser")
         top_layout.addWidget(self.open_button)
         history_layout.addLayout(top_layout)
 
+        # --- 검색 바 ---
+        search_layout = QHBoxLayout()
+        search_layout.addWidget(QLabel("Search:"))
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText('host:api.example.com status:5xx method:post header:authorization body:"token"')
+        search_layout.addWidget(self.search_input)
+        self.search_result_label = QLabel("")
+        search_layout.addWidget(self.search_result_label)
+        history_layout.addLayout(search_layout)
+
+        # 색인이 갱신되면 현재 검색을 너무 자주 다시 실행하지 않도록 묶어서 처리합니다.
+        self.search_refresh_timer = QTimer(self)
+        self.search_refresh_timer.setSingleShot(True)
+        self.search_refresh_timer.setInterval(500)
+
         # --- History UI (테이블 및 상세 보기) ---
         history_splitter = QSplitter(Qt.Vertical)
         history_layout.addWidget(history_splitter)
 
-        self.table = QTableWidget()
-        self.table.setColumnCount(3)
-        self.table.setHorizontalHeaderLabels(["Method", "URL", "Status"])
+        self.table = QTableView()
+        self.table.setModel(self.history_model)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setSelectionMode(QAbstractItemView.SingleSelection)
+        # 행 높이를 고정해야 뷰가 전체 행을 측정하지 않고 보이는 영역만 그립니다.
+        self.table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.table.verticalHeader().setDefaultSectionSize(22)
+        self.table.horizontalHeader().setStretchLastSection(True)
         self.table.setColumnWidth(0, 100)
         self.table.setColumnWidth(1, 650)
         self.table.setColumnWidth(2, 100)
+        self.table.setColumnWidth(3, 90)
         history_splitter.addWidget(self.table)
 
         history_bottom_widget = QWidget()
@@ -70,91 +159,293 @@ class MainWindow(QMainWindow):
         history_splitter.addWidget(history_bottom_widget)
         
         self.details_tabs = QTabWidget()
-        self.request_text = QTextEdit()
-        self.response_text = QTextEdit()
+        # QPlainTextEdit는 보이는 블록만 레이아웃하므로 큰 텍스트에서도 가볍습니다.
+        self.request_text = QPlainTextEdit()
+        self.response_text = QPlainTextEdit()
         self.response_text.setReadOnly(True) 
+        self.response_highlighter = BodyHighlighter(self.response_text.document())
         self.details_tabs.addTab(self.request_text, "Request")
         self.details_tabs.addTab(self.response_text, "Response")
+        self.diff_widget = ReplayDiffWidget(self.flow_store)
+        self.details_tabs.addTab(self.diff_widget, "Diff")
         history_bottom_layout.addWidget(self.details_tabs)
 
+        # 응답 바디 보기 옵션과 로드 상태 (나머지는 스크롤하면 이어서 불러옴)
+        page_layout = QHBoxLayout()
+        self.page_label = QLabel("")
+        self.pretty_view_checkbox = QCheckBox("Pretty")
+        self.hex_view_checkbox = QCheckBox("Hex")
+        page_layout.addWidget(self.page_label)
+        page_layout.addWidget(self.pretty_view_checkbox)
+        page_layout.addWidget(self.hex_view_checkbox)
+        page_layout.addSpacerItem(QSpacerItem(40, 20, QSizePolicy.Expanding, QSizePolicy.Minimum))
+        history_bottom_layout.addLayout(page_layout)
+
         self.send_button = QPushButton("Send (Replay)")
         self.send_browser_button = QPushButton("Send with Browser")
         self.render_browser_button = QPushButton("Render in Browser")
+        self.send_bulk_button = QPushButton("Send to Bulk Replay")
         button_layout = QHBoxLayout()
         button_layout.addWidget(self.send_button)
         button_layout.addWidget(self.send_browser_button)
         button_layout.addWidget(self.render_browser_button)
+        button_layout.addWidget(self.send_bulk_button)
         history_bottom_layout.addLayout(button_layout)
 
         history_splitter.setStretchFactor(0, 4)
         history_splitter.setStretchFactor(1, 6)
 
-        # --- Swagger 탭 생성 ---
-        swagger_widget = QWidget()
-        swagger_layout = QVBoxLayout(swagger_widget)
-        self.main_tabs.addTab(swagger_widget, "Swagger")
-
-        swagger_button_layout = QHBoxLayout()
-        self.swagger_refresh_button = QPushButton("Refresh Swagger Spec")
-        swagger_button_layout.addWidget(self.swagger_refresh_button)
-        swagger_button_layout.addSpacerItem(QSpacerItem(40, 20, QSizePolicy.Expanding, QSizePolicy.Minimum))
-        swagger_layout.addLayout(swagger_button_layout)
+        # --- WebSocket 탭 생성 ---
+        self.websocket_widget = WebSocketWidget(websocket_queue, self.command_queue, websocket_capacity)
+        self.main_tabs.addTab(self.websocket_widget, "WebSocket")
+
+        # --- Bulk Replay 탭 생성 ---
+        self.bulk_replay_widget = BulkReplayWidget(self.command_queue, browser_command_queue, self.metrics)
+        self.main_tabs.addTab(self.bulk_replay_widget, "Bulk Replay")
+
+        # --- Filters 탭 생성 ---
+        filters_widget = QWidget()
+        filters_layout = QVBoxLayout(filters_widget)
+        self.main_tabs.addTab(filters_widget, "Filters")
+
+        rules = self.filter_engine.rules
+        rule_editors_layout = QHBoxLayout()
+        self.blocked_domains_edit = QPlainTextEdit("\n".join(rules.blocked_domains))
+        self.blocked_extensions_edit = QPlainTextEdit("\n".join(rules.blocked_extensions))
+        self.blocked_content_types_edit = QPlainTextEdit("\n".join(rules.blocked_content_types))
+        for title, editor in (("Blocked Domains", self.blocked_domains_edit),
+                              ("Blocked Extensions", self.blocked_extensions_edit),
+                              ("Blocked Content-Types", self.blocked_content_types_edit)):
+            column_layout = QVBoxLayout()
+            column_layout.addWidget(QLabel(title))
+            column_layout.addWidget(editor)
+            rule_editors_layout.addLayout(column_layout)
+        filters_layout.addLayout(rule_editors_layout)
+
+        filters_button_layout = QHBoxLayout()
+        self.apply_filters_button = QPushButton("Apply Filters")
+        self.refresh_filter_stats_button = QPushButton("Refresh Stats")
+        filters_button_layout.addWidget(self.apply_filters_button)
+        filters_button_layout.addWidget(self.refresh_filter_stats_button)
+        filters_button_layout.addSpacerItem(QSpacerItem(40, 20, QSizePolicy.Expanding, QSizePolicy.Minimum))
+        filters_layout.addLayout(filters_button_layout)
+
+        self.filter_stats_text = QPlainTextEdit()
+        self.filter_stats_text.setReadOnly(True)
+        filters_layout.addWidget(self.filter_stats_text)
+
+        # --- Stats 탭 생성 ---
+        self.stats_widget = StatsWidget(self.metrics, metrics_url)
+        self.main_tabs.addTab(self.stats_widget, "Stats")
 
-        self.swagger_view = QWebEngineView()
-        swagger_layout.addWidget(self.swagger_view)
-        self.generate_and_load_swagger() # 초기 로드
+        # --- Swagger 탭 생성 ---
+        # 웹뷰(QtWebEngine)와 스펙 파일은 탭을 처음 열 때 만듭니다. (build_swagger_tab)
+        self.swagger_widget = QWidget()
+        self.swagger_layout = QVBoxLayout(self.swagger_widget)
+        self.main_tabs.addTab(self.swagger_widget, "Swagger")
+        self.swagger_view = None
 
         # --- 시그널 연결 ---
         self.open_button.clicked.connect(self.on_open_browser_clicked)
-        self.scope_input.textChanged.connect(self.on_scope_changed)
-        self.table.itemSelectionChanged.connect(self.display_flow_details)
+        # 입력 중간 상태가 TLS 통과 설정에 반영되지 않도록 입력을 마칠 때 적용합니다.
+        self.scope_input.editingFinished.connect(lambda: self.on_scope_changed(self.scope_input.text()))
+        self.table.selectionModel().selectionChanged.connect(self.display_flow_details)
         self.send_button.clicked.connect(self.on_send_clicked)
         self.send_browser_button.clicked.connect(self.on_send_browser_clicked)
         self.render_browser_button.clicked.connect(self.on_render_in_browser_clicked)
-        self.swagger_refresh_button.clicked.connect(self.generate_and_load_swagger)
-
-        self.timer = QTimer(self)
-        self.timer.timeout.connect(self.check_queue) 
-        self.timer.start(100) 
+        self.send_bulk_button.clicked.connect(self.on_send_to_bulk_clicked)
+        self.main_tabs.currentChanged.connect(self.on_main_tab_changed)
+        self.search_input.returnPressed.connect(self.on_search_submitted)
+        self.index_updated.connect(self.on_index_updated)
+        self.search_refresh_timer.timeout.connect(self.run_search)
+        self.stream_threshold_input.valueChanged.connect(self.on_stream_threshold_changed)
+        self.apply_filters_button.clicked.connect(self.on_apply_filters_clicked)
+        self.hex_view_checkbox.toggled.connect(lambda checked: self.render_response(checked))
+        self.pretty_view_checkbox.toggled.connect(lambda _: self.render_response(self.hex_view_checkbox.isChecked()))
+        self.response_text.verticalScrollBar().valueChanged.connect(self.on_response_scrolled)
+        self.detail_renderer.chunk_ready.connect(self.on_detail_chunk)
+        self.refresh_filter_stats_button.clicked.connect(self.refresh_filter_stats)
+
+        self.import_button.clicked.connect(self.on_import_clicked)
+        self.export_button.clicked.connect(self.on_export_clicked)
+        self.transfer_cancel_button.clicked.connect(lambda: self.transfer_cancel and self.transfer_cancel.set())
+        self.transfer_progress.connect(self.on_transfer_progress)
+        self.transfer_finished.connect(self.on_transfer_finished)
+
+        self.flows_available.connect(self.check_queue)
+        self.queue.set_notify(self.flows_available.emit)
 
     def check_queue(self):
+        """큐에 쌓인 Flow를 배치로 꺼내 테이블에 추가합니다. 한 틱의 처리량은 제한됩니다."""
+        self.queue.acknowledge()
+        batch = []
+        deadline = time.perf_counter() + self.QUEUE_TIME_BUDGET
         try:
-            while True:
+            while len(batch) < self.QUEUE_BATCH_LIMIT and time.perf_counter() < deadline:
                 flow_data: FlowData = self.queue.get_nowait()
-                self._add_flow_to_table(flow_data)
+                batch.append(flow_data)
         except queue.Empty:
             pass
-
-    def _add_flow_to_table(self, flow_data: FlowData):
-        self.flows_data_list.append(flow_data)
-        row_count = self.table.rowCount()
-        self.table.insertRow(row_count)
-        self.table.setItem(row_count, 0, QTableWidgetItem(flow_data.method))
-        self.table.setItem(row_count, 1, QTableWidgetItem(flow_data.url))
-        self.table.setItem(row_count, 2, QTableWidgetItem(flow_data.status_code))
-        
-        self.table.scrollToBottom()
+        if batch:
+            with self.metrics.gui_insert.time():
+                self._add_flows_to_table(batch)
+            self.metrics.inserted_flows.inc(amount=len(batch))
+        # 예산을 넘어 남은 항목은 이벤트 루프에 한 번 양보한 뒤 이어서 처리합니다.
+        if not self.queue.empty():
+            QTimer.singleShot(0, self.check_queue)
+
+    def _add_flows_to_table(self, flows: list[FlowData]):
+        if not flows:
+            return
+        # 사용자가 맨 아래를 보고 있을 때만 배치당 한 번 자동 스크롤합니다.
+        scroll_bar = self.table.verticalScrollBar()
+        at_bottom = scroll_bar.value() >= scroll_bar.maximum()
+        first_row = self.history_model.append_flows(flows)
+        for offset, flow_data in enumerate(flows):
+            self.search_index.submit(first_row + offset, flow_data)
+            if self.pending_replay_source and flow_data.replay_of == self.pending_replay_source:
+                # 선택은 그대로 두고(편집 중인 요청 유지) Diff 탭에만 결과를 보여줍니다.
+                self.pending_replay_source = None
+                self.diff_widget.show_pair(flow_data.replay_of, flow_data.flow_id)
+                self.details_tabs.setCurrentWidget(self.diff_widget)
+        if at_bottom:
+            self.table.scrollToBottom()
+
+    def on_search_submitted(self):
+        self.active_search_query = self.search_input.text().strip()
+        self.run_search()
+
+    def on_index_updated(self):
+        if self.active_search_query and not self.search_refresh_timer.isActive():
+            self.search_refresh_timer.start()
+
+    def run_search(self):
+        """현재 검색어로 색인을 조회하고 History 테이블에 결과만 표시합니다."""
+        if not self.active_search_query:
+            self._set_visible_rows(None)
+            self.search_result_label.clear()
+            return
+        rows, elapsed_ms = self.search_index.search(self.active_search_query)
+        self._set_visible_rows(rows)
+        self.search_result_label.setText(
+            f"{len(rows):,} / {self.search_index.indexed_count:,} flows ({elapsed_ms:.1f} ms)")
+
+    def _set_visible_rows(self, rows: list[int] | None):
+        """보이는 행을 바꾸고, 모델을 다시 만들었으면 선택한 행과 스크롤 위치를 원본 행 기준으로 되돌립니다."""
+        selected = self.table.selectionModel().selectedRows()
+        selected_source = self.history_model.source_row(selected[0].row()) if selected else None
+        top_row = self.table.rowAt(0)
+        top_source = self.history_model.source_row(top_row) if top_row >= 0 else None
+        if not self.history_model.set_visible_rows(rows):
+            return
+        if top_source is not None:
+            row = self.history_model.visible_row(top_source)
+            if row >= 0:
+                self.table.scrollTo(self.history_model.index(row, 0), QAbstractItemView.PositionAtTop)
+        if selected_source is None:
+            return
+        row = self.history_model.visible_row(selected_source)
+        if row < 0:
+            # 선택한 Flow가 결과에서 빠졌으면 상세 보기도 비웁니다. (리셋은 selectionChanged를 보내지 않음)
+            self.display_flow_details()
+            return
+        # 같은 Flow를 다시 선택하는 것이므로 상세 보기를 다시 그리지 않습니다.
+        selection_model = self.table.selectionModel()
+        selection_model.blockSignals(True)
+        self.table.selectRow(row)
+        selection_model.blockSignals(False)
+        self.table.viewport().update()
 
     def display_flow_details(self):
-        selected_items = self.table.selectedItems()
-        if not selected_items:
+        # 이전에 선택한 Flow의 압축 해제된 바디는 더 이상 필요하지 않습니다.
+        if self.current_selected_details is not None:
+            self.current_selected_details.release()
+        self.current_selected_details = None
+        self.current_selected_flow_data = None
+
+        selected_rows = self.table.selectionModel().selectedRows()
+        if not selected_rows:
+            # 취소 전에 큐에 들어간 조각이 비운 편집기에 붙지 않도록 세대 번호도 함께 바꿉니다.
+            self.render_generations = self.detail_renderer.cancel()
+            self.response_has_more = False
             self.request_text.clear()
             self.response_text.clear()
-            self.current_selected_flow_data = None
+            self.page_label.clear()
+            self.diff_widget.clear()
             return
 
-        selected_row = selected_items[0].row()
+        selected_row = selected_rows[0].row()
 
-        try:
-            flow_data = self.flows_data_list[selected_row]
-            self.current_selected_flow_data = flow_data
-        except IndexError:
+        flow_id = self.history_model.flow_id_at(selected_row)
+        if flow_id is None:
             print(f"오류: {selected_row} 인덱스의 데이터를 찾을 수 없습니다.")
-            self.current_selected_flow_data = None
             return
 
-        self.request_text.setText(flow_data.get_request_display())
-        self.response_text.setText(flow_data.get_response_display())
+        details = self.flow_store.get_details(flow_id)
+        if details is None:
+            print(f"오류: 저장소에서 {flow_id} Flow를 찾을 수 없습니다.")
+            return
+        self.current_selected_details = details
+        self.current_selected_flow_data = details.flow
+
+        # 바디 읽기/압축 해제/포맷은 워커에서 하고, 여기서는 요청만 보냅니다. (이전 렌더링은 취소됨)
+        # Request는 편집 후 리플레이에 쓰이므로 끝까지 불러옵니다.
+        self.request_render_done = False
+        self.render_generations["request"] = self.detail_renderer.render("request", details, load_all=True)
+        self.render_response(None)
+        if details.flow.replay_of:
+            self.diff_widget.show_pair(details.flow.replay_of, flow_id)
+        else:
+            self.diff_widget.clear()
+
+    def render_response(self, hex_view: bool | None):
+        """응답 보기를 다시 그립니다. hex_view가 None이면 바이너리 여부로 자동 결정합니다."""
+        details = self.current_selected_details
+        if details is None:
+            return
+        self.response_has_more = False
+        self.response_more_pending = False
+        self.page_label.setText("불러오는 중...")
+        self.render_generations["response"] = self.detail_renderer.render(
+            "response", details, hex_view, pretty=self.pretty_view_checkbox.isChecked())
+
+    def on_detail_chunk(self, target: str, generation: int, text: str, append: bool, state: dict):
+        """워커가 만든 조각을 문서에 붙입니다. 이미 다른 행을 선택했다면 버립니다."""
+        if generation != self.render_generations[target]:
+            return
+        editor = self.request_text if target == "request" else self.response_text
+        if not append:
+            if target == "response":
+                # 강조는 GUI 스레드에서 블록마다 실행되므로 큰 바디에는 적용하지 않습니다.
+                highlight = state.get("syntax") if state.get("total", 0) <= HIGHLIGHT_MAX_SIZE else None
+                self.response_highlighter.set_mode(highlight)
+                self.hex_view_checkbox.blockSignals(True)
+                self.hex_view_checkbox.setChecked(state.get("hex_view", False))
+                self.hex_view_checkbox.blockSignals(False)
+            editor.setPlainText(text)
+        elif text:
+            # 보고 있는 위치가 바뀌지 않도록 별도 커서로 문서 끝에 붙입니다.
+            cursor = QTextCursor(editor.document())
+            cursor.movePosition(QTextCursor.End)
+            cursor.insertText(text)
+
+        if target == "request":
+            self.request_render_done = state["done"]
+            return
+        self.response_more_pending = False
+        self.response_has_more = not state["done"]
+        unit = "chars" if state.get("pretty") else "bytes"
+        suffix = "" if state["done"] else " (스크롤하면 더 불러옵니다)"
+        self.page_label.setText(f"{state['loaded']:,} / {state['total']:,} {unit}{suffix}")
+
+    def on_response_scrolled(self, value: int):
+        """스크롤이 끝에 가까워지면 다음 조각을 요청합니다."""
+        if not self.response_has_more or self.response_more_pending:
+            return
+        scroll_bar = self.response_text.verticalScrollBar()
+        if value >= scroll_bar.maximum() - scroll_bar.pageStep():
+            self.response_more_pending = True
+            self.detail_renderer.request_more("response", self.render_generations["response"])
 
     def on_send_clicked(self):
         if self.current_selected_flow_data is None:
@@ -162,11 +453,15 @@ class MainWindow(QMainWindow):
             return
             
         flow_id = self.current_selected_flow_data.flow_id
+        if not self.request_render_done:
+            print("요청을 아직 불러오는 중입니다. 잠시 후 다시 시도하세요.")
+            return
         modified_request_text = self.request_text.toPlainText()
         
         command = ('replay', flow_id, modified_request_text)
         try:
             self.command_queue.put(command)
+            self.pending_replay_source = flow_id
             print(f"명령 전송: Replay (Flow ID: {flow_id})")
         except Exception as e:
             print(f"명령 큐 전송 오류: {e}")
@@ -177,29 +472,24 @@ class MainWindow(QMainWindow):
             print("브라우저에서 리플레이할 요청이 선택되지 않았습니다.")
             return
 
+        if not self.request_render_done:
+            print("요청을 아직 불러오는 중입니다. 잠시 후 다시 시도하세요.")
+            return
         modified_request_text = self.request_text.toPlainText()
-        
-        command = ('replay_in_browser', modified_request_text)
-        try:
-            self.command_queue.put(command)
+
+        # 결과는 Bulk Replay 탭의 결과 테이블에 한 줄로 표시합니다. (브라우저 채널로 직접 전송)
+        if self.bulk_replay_widget.replay_in_browser(modified_request_text, self.current_selected_flow_data.url):
+            self.main_tabs.setCurrentWidget(self.bulk_replay_widget)
             print(f"명령 전송: Replay in Browser")
-        except Exception as e:
-            print(f"브라우저 리플레이 명령 큐 전송 오류: {e}")
 
     def on_render_in_browser_clicked(self):
         """선택된 응답을 브라우저에서 렌더링하도록 명령합니다."""
-        if self.current_selected_flow_data is None:
+        if self.current_selected_details is None:
             print("브라우저에서 렌더링할 응답이 선택되지 않았습니다.")
             return
 
-        modified_response_text = self.response_text.toPlainText()
-        
-        # 응답 텍스트에서 바디 부분만 추출
-        body_marker = "\n\n--- BODY ---\n"
-        if body_marker in modified_response_text:
-            response_body = modified_response_text.split(body_marker, 1)[1]
-        else:
-            response_body = "" # 바디 마커가 없으면 빈 문자열로 처리
+        # 화면에는 한 페이지만 표시되므로 저장소의 전체 바디를 사용합니다.
+        response_body = self.current_selected_details.response_body.text()
 
         command = ('render_in_browser', response_body)
         try:
@@ -208,6 +498,76 @@ class MainWindow(QMainWindow):
         except Exception as e:
             print(f"브라우저 렌더링 명령 큐 전송 오류: {e}")
 
+    def on_send_to_bulk_clicked(self):
+        """선택된 요청을 Bulk Replay 탭의 템플릿으로 보냅니다."""
+        if self.current_selected_flow_data is None:
+            print("Bulk Replay로 보낼 요청이 선택되지 않았습니다.")
+            return
+        self.bulk_replay_widget.load_request(self.request_text.toPlainText(), self.current_selected_flow_data.url)
+        self.main_tabs.setCurrentWidget(self.bulk_replay_widget)
+
+    CAPTURE_FILE_FILTER = ("HAR (*.har *.har.gz *.har.zst *.zhar);;"
+                           "mitmproxy flows (*.flows *.flows.gz *.flows.zst *.mitm);;All files (*)")
+
+    def _start_transfer(self, target, *args):
+        """가져오기/내보내기를 워커 스레드에서 실행합니다. 한 번에 하나만 실행됩니다."""
+        self.transfer_cancel = threading.Event()
+        self.import_button.setEnabled(False)
+        self.export_button.setEnabled(False)
+        self.transfer_progress_bar.setValue(0)
+        self.transfer_progress_bar.setVisible(True)
+        self.transfer_cancel_button.setVisible(True)
+
+        def run():
+            try:
+                message = target(*args, progress=self.transfer_progress.emit, cancel=self.transfer_cancel)
+            except Exception as e:
+                message = f"오류: {e}"
+            self.transfer_finished.emit(message)
+
+        threading.Thread(target=run, name="FlowTransfer", daemon=True).start()
+
+    def on_import_clicked(self):
+        """HAR 또는 mitmproxy flow 파일을 History로 가져옵니다. (gzip/zstd 압축 지원)"""
+        path, _ = QFileDialog.getOpenFileName(self, "Import Capture", "", self.CAPTURE_FILE_FILTER)
+        if not path:
+            return
+
+        def run_import(path, progress, cancel):
+            import flow_io
+            count = flow_io.import_flows(path, self.flow_store, self.queue, self.openapi_builder,
+                                         progress=progress, cancel=cancel)
+            return f"가져오기 완료: {count:,}건 ({os.path.basename(path)})"
+
+        print(f"가져오기 시작: {path}")
+        self._start_transfer(run_import, path)
+
+    def on_export_clicked(self):
+        """History 전체를 HAR 또는 mitmproxy flow 파일로 내보냅니다. 확장자로 형식과 압축을 고릅니다."""
+        path, _ = QFileDialog.getSaveFileName(self, "Export Capture", "capture.har", self.CAPTURE_FILE_FILTER)
+        if not path:
+            return
+
+        def run_export(path, progress, cancel):
+            import flow_io
+            count = flow_io.export_flows(self.flow_store, path, progress=progress, cancel=cancel)
+            return f"내보내기 완료: {count:,}건 ({os.path.basename(path)})"
+
+        print(f"내보내기 시작: {path}")
+        self._start_transfer(run_export, path)
+
+    def on_transfer_progress(self, count: int, fraction: float):
+        self.transfer_progress_bar.setValue(int(fraction * 1000))
+        self.transfer_progress_bar.setFormat(f"{count:,}건")
+
+    def on_transfer_finished(self, message: str):
+        print(message)
+        self.transfer_cancel = None
+        self.transfer_progress_bar.setVisible(False)
+        self.transfer_cancel_button.setVisible(False)
+        self.import_button.setEnabled(True)
+        self.export_button.setEnabled(True)
+
     def on_open_browser_clicked(self):
         """'Open' 버튼 클릭 시 Playwright 브라우저를 백그라운드에서 실행합니다."""
         print("Playwright 브라우저를 시작합니다...")
@@ -221,6 +581,62 @@ class MainWindow(QMainWindow):
         except Exception as e:
             print(f"Scope 설정 명령 전송 오류: {e}")
 
+    def on_stream_threshold_changed(self, megabytes: int):
+        """대용량 바디 스트리밍 기준이 바뀌면 'set_large_body_threshold' 명령을 보냅니다."""
+        command = ('set_large_body_threshold', megabytes * 1024 * 1024)
+        try:
+            self.command_queue.put(command)
+        except Exception as e:
+            print(f"스트리밍 기준 설정 명령 전송 오류: {e}")
+
+    def on_apply_filters_clicked(self):
+        """Filters 탭의 규칙을 읽어 프록시에 'set_filters' 명령으로 보냅니다. (재시작 없이 적용)"""
+        def lines(editor: QPlainTextEdit) -> list[str]:
+            return [line.strip() for line in editor.toPlainText().splitlines() if line.strip()]
+
+        rules = FilterRules(
+            blocked_domains=lines(self.blocked_domains_edit),
+            blocked_extensions=lines(self.blocked_extensions_edit),
+            blocked_content_types=lines(self.blocked_content_types_edit),
+        )
+        command = ('set_filters', rules)
+        try:
+            self.command_queue.put(command)
+            print("명령 전송: Set Filters")
+        except Exception as e:
+            print(f"필터 설정 명령 전송 오류: {e}")
+
+    def refresh_filter_stats(self):
+        """규칙별 히트 수와 평균 평가 비용을 표시합니다."""
+        stats = self.filter_engine.stats()
+        lines = ["--- 평가 비용 ---"]
+        for kind, count in stats["evaluations"].items():
+            lines.append(f"{kind}: {count}회, 평균 {stats['avg_cost_ns'][kind]:.0f} ns")
+        lines.append("")
+        lines.append("--- 규칙별 히트 수 ---")
+        for (kind, rule), hits in sorted(stats["hits"].items(), key=lambda item: -item[1]):
+            lines.append(f"[{kind}] {rule}: {hits}")
+        self.filter_stats_text.setPlainText("\n".join(lines))
+
+    def on_main_tab_changed(self, index):
+        if self.swagger_view is None and self.main_tabs.widget(index) is self.swagger_widget:
+            self.build_swagger_tab()
+
+    def build_swagger_tab(self):
+        """Swagger 탭 내용을 만들고 처음 로드합니다. QtWebEngine 임포트와 초기화가 여기서 일어납니다."""
+        from PySide6.QtWebEngineWidgets import QWebEngineView
+
+        swagger_button_layout = QHBoxLayout()
+        self.swagger_refresh_button = QPushButton("Refresh Swagger Spec")
+        swagger_button_layout.addWidget(self.swagger_refresh_button)
+        swagger_button_layout.addSpacerItem(QSpacerItem(40, 20, QSizePolicy.Expanding, QSizePolicy.Minimum))
+        self.swagger_layout.addLayout(swagger_button_layout)
+
+        self.swagger_view = QWebEngineView()
+        self.swagger_layout.addWidget(self.swagger_view)
+        self.swagger_refresh_button.clicked.connect(self.generate_and_load_swagger)
+        self.generate_and_load_swagger() # 초기 로드
+
     def generate_and_load_swagger(self):
         """History 데이터를 기반으로 OpenAPI Spec을 생성하고 웹뷰를 로드합니다."""
         print("Swagger Spec 생성 및 로드 시작...")
@@ -241,39 +657,15 @@ class MainWindow(QMainWindow):
         print("Swagger UI 로드 완료.")
 
     def generate_openapi_spec(self):
-        """self.flows_data_list를 OpenAPI 3.0 JSON 파일로 변환합니다."""
-        openapi_spec = {
-            "openapi": "3.0.0",
-            "info": {
-                "title": "Captured API Spec",
-                "version": "1.0.0",
-                "description": "API specification automatically generated from captured traffic."
-            },
-            "paths": {}
-        }
-
-        for flow in self.flows_data_list:
-            parsed_url = urlparse(flow.url)
-            path = parsed_url.path
-
-            if path not in openapi_spec["paths"]:
-                openapi_spec["paths"][path] = {}
-
-            method = flow.method.lower()
-            if method not in openapi_spec["paths"][path]:
-                # 간단한 응답 구조만 정의합니다.
-                openapi_spec["paths"][path][method] = {
-                    "summary": f"Captured {flow.method} request to {path}",
-                    "responses": {
-                        flow.status_code: {
-                            "description": f"Status code {flow.status_code}"
-                        }
-                    }
-                }
+        """점진적으로 갱신된 OpenAPI 스펙을 openapi.json 파일로 저장합니다. (변경이 있을 때만)"""
+        version = self.openapi_builder.version
+        if version == self.written_spec_version:
+            print("OpenAPI spec 변경 없음, 저장을 건너뜁니다.")
+            return
 
         # swagger-ui 폴더에 openapi.json 파일로 저장
         base_dir = os.path.dirname(__file__)
         output_path = os.path.join(base_dir, 'swagger-ui', 'openapi.json')
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(openapi_spec, f, indent=2, ensure_ascii=False)
-        print(f"OpenAPI spec이 '{output_path}'에 저장되었습니다.")
\ No newline at end of file
+        self.openapi_builder.write(output_path)
+        self.written_spec_version = version
+        print(f"OpenAPI spec이 '{output_path}'에 저장되었습니다.")
@@ -0,0 +1,146 @@
+import uuid
+from array import array
+
+from PySide6.QtCore import QAbstractTableModel, QModelIndex, Qt
+
+from proxy import FlowData
+
+
+class HistoryTableModel(QAbstractTableModel):
+    """History 테이블용 가상화 모델입니다.
+
+    행마다 위젯 아이템을 만드는 대신 컬럼별 저장소(간단한 Flow 인덱스)만 유지하고,
+    뷰가 화면에 보이는 셀을 요청할 때만 값을 꺼내 줍니다. 고정 폭 값은 array에 담습니다.
+    (Flow ID는 UUID 16바이트, 메서드는 메서드 표의 번호, 상태 코드와 바디 크기는 정수)
+    """
+
+    HEADERS = ["Method", "URL", "Status", "Req Size", "Resp Size"]
+    NO_STATUS = 0
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._flow_ids = bytearray()
+        # UUID 형식이 아닌 Flow ID(가져온 파일 등)는 행 번호로 따로 보관합니다.
+        self._other_flow_ids: dict[int, str] = {}
+        self._method_codes = array('H')
+        self._method_names: list[str] = []
+        self._method_index: dict[str, int] = {}
+        self._urls: list[str] = []
+        self._statuses = array('H')
+        # 전송된(content-encoding이 적용된) 바디 크기 (바이트)
+        self._request_sizes = array('Q')
+        self._response_sizes = array('Q')
+        # 검색 필터가 적용되면 보이는 원본 행 번호 목록, 아니면 None
+        self._visible: list[int] | None = None
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        if parent.isValid():
+            return 0
+        return len(self._urls) if self._visible is None else len(self._visible)
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole):
+        if role == Qt.TextAlignmentRole and index.column() >= 3:
+            return int(Qt.AlignRight | Qt.AlignVCenter)
+        if role != Qt.DisplayRole or not index.isValid():
+            return None
+        row = self.source_row(index.row())
+        column = index.column()
+        if column == 0:
+            return self._method_names[self._method_codes[row]]
+        if column == 1:
+            return self._urls[row]
+        if column == 2:
+            status = self._statuses[row]
+            return "No Response" if status == self.NO_STATUS else str(status)
+        if column == 3:
+            return f"{self._request_sizes[row]:,}"
+        if column == 4:
+            return f"{self._response_sizes[row]:,}"
+        return None
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role: int = Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return str(self.source_row(section) + 1)
+
+    def append_flows(self, flows: list[FlowData]) -> int:
+        """여러 Flow를 한 번의 beginInsertRows/endInsertRows로 추가하고 첫 원본 행 번호를 반환합니다."""
+        if not flows:
+            return len(self._urls)
+        start = len(self._urls)
+        # 필터가 적용된 동안에는 새 행을 저장만 하고, 다음 검색 결과 갱신 때 표시합니다.
+        if self._visible is None:
+            self.beginInsertRows(QModelIndex(), start, start + len(flows) - 1)
+        for row, flow_data in enumerate(flows, start):
+            try:
+                flow_uuid = uuid.UUID(flow_data.flow_id)
+            except ValueError:
+                flow_uuid = None
+            # 문자열로 되돌렸을 때 원래 ID와 같을 때만 16바이트로 저장합니다.
+            if flow_uuid is not None and str(flow_uuid) == flow_data.flow_id:
+                self._flow_ids += flow_uuid.bytes
+            else:
+                self._flow_ids += bytes(16)
+                self._other_flow_ids[row] = flow_data.flow_id
+            self._method_codes.append(self._method_code(flow_data.method))
+            self._urls.append(flow_data.url)
+            status = flow_data.status_code
+            self._statuses.append(int(status) if status.isdigit() and int(status) < 65536 else self.NO_STATUS)
+            self._request_sizes.append(flow_data.request_size)
+            self._response_sizes.append(flow_data.response_size)
+        if self._visible is None:
+            self.endInsertRows()
+        return start
+
+    def _method_code(self, method: str) -> int:
+        code = self._method_index.get(method)
+        if code is None:
+            code = len(self._method_names)
+            self._method_names.append(method)
+            self._method_index[method] = code
+        return code
+
+    def source_row(self, row: int) -> int:
+        """보이는 행 번호를 원본 행 번호(검색 문서 ID)로 변환합니다."""
+        return row if self._visible is None else self._visible[row]
+
+    def set_visible_rows(self, rows: list[int] | None) -> bool:
+        """검색 결과에 해당하는 원본 행만 보이도록 합니다. None이면 필터를 해제합니다.
+
+        새 결과가 기존 결과 뒤에 행만 더 붙은 것이면(캡처 중 색인 갱신) 그 행만 추가해 선택과
+        스크롤 위치를 유지합니다. 모델을 다시 만들었으면 True를 반환합니다.
+        """
+        old = self._visible
+        if old is not None and rows is not None and len(rows) >= len(old) and rows[:len(old)] == old:
+            if len(rows) > len(old):
+                self.beginInsertRows(QModelIndex(), len(old), len(rows) - 1)
+                self._visible = rows
+                self.endInsertRows()
+            return False
+        self.beginResetModel()
+        self._visible = rows
+        self.endResetModel()
+        return True
+
+    def visible_row(self, source: int) -> int:
+        """원본 행 번호가 지금 보이는 행 번호를 반환합니다. 보이지 않으면 -1입니다."""
+        if self._visible is None:
+            return source if 0 <= source < len(self._urls) else -1
+        try:
+            return self._visible.index(source)
+        except ValueError:
+            return -1
+
+    def flow_id_at(self, row: int) -> str | None:
+        if not 0 <= row < self.rowCount():
+            return None
+        source = self.source_row(row)
+        other = self._other_flow_ids.get(source)
+        if other is not None:
+            return other
+        return str(uuid.UUID(bytes=bytes(self._flow_ids[source * 16:source * 16 + 16])))
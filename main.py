@@ -1,6 +1,12 @@
+import time
+# 시작 시간 측정 기준점 (무거운 임포트보다 먼저 기록)
+STARTED_AT = time.perf_counter()
+
 import sys
-import queue
 import os
+import json
+import argparse
+from PySide6.QtCore import QCoreApplication, QTimer, Qt
 from PySide6.QtWidgets import QApplication
 from PySide6.QtGui import QIcon
 # Windows 작업 표시줄 아이콘 설정을 위해 추가
@@ -9,7 +15,36 @@ if sys.platform == 'win32':
 
 from gui import MainWindow
 from proxy import MitmThread
+from proxy_process import ProxyProcess, IpcCommandChannel
+from flow_store import FlowStore
+from filters import FilterEngine
+from channel import AsyncChannel, FlowFeed
+from openapi import OpenApiBuilder
 from browser import PlaywrightThread
+from dom_condenser import DEFAULT_TOKEN_BUDGET
+from browser_pool import DEFAULT_POOL_SIZE
+from metrics import Metrics, MetricsServer, DEFAULT_METRICS_PORT
+from websocket_capture import DEFAULT_WEBSOCKET_CAPACITY
+
+IMPORTED_AT = time.perf_counter()
+
+
+def report_startup(measure_only: bool):
+    """첫 이벤트 루프 처리 시점(창이 그려진 직후)까지의 시작 시간을 출력합니다."""
+    visible_at = time.perf_counter()
+    timings = {
+        "import_ms": round((IMPORTED_AT - STARTED_AT) * 1000, 1),
+        "window_visible_ms": round((visible_at - STARTED_AT) * 1000, 1),
+        "eager_modules": sorted(name for name in ("playwright", "google.generativeai", "mitmproxy.tools.dump",
+                                                  "PySide6.QtWebEngineWidgets", "flow_io")
+                                if name in sys.modules),
+    }
+    if measure_only:
+        print(json.dumps(timings))
+        QApplication.quit()
+    else:
+        print(f"시작 시간: 임포트 {timings['import_ms']} ms, 창 표시 {timings['window_visible_ms']} ms")
+
 
 if __name__ == "__main__":
     # --- Windows 작업 표시줄 아이콘 설정 ---
@@ -20,7 +55,24 @@ if __name__ == "__main__":
     # ------------------------------------
     os.environ['QTWEBENGINE_REMOTE_DEBUGGING'] = '9222' # Swagger 디버깅용
 
-    app = QApplication(sys.argv)
+    parser = argparse.ArgumentParser(description="PongpSuite")
+    parser.add_argument("--proxy-process", action="store_true",
+                        help="mitmproxy 엔진을 별도 프로세스에서 실행합니다. (GUI와 GIL을 나누지 않음)")
+    parser.add_argument("--ai-token-budget", type=int, default=DEFAULT_TOKEN_BUDGET,
+                        help="AI 프롬프트에 넣는 페이지 HTML의 토큰 예산 (기본: %(default)s)")
+    parser.add_argument("--browser-pool-size", type=int, default=DEFAULT_POOL_SIZE,
+                        help="브라우저 리플레이를 병렬로 처리하는 컨텍스트 수 (기본: %(default)s)")
+    parser.add_argument("--metrics-port", type=int, default=DEFAULT_METRICS_PORT,
+                        help="Prometheus 메트릭을 내보낼 localhost 포트, 0이면 끔 (기본: %(default)s)")
+    parser.add_argument("--websocket-capacity", type=int, default=DEFAULT_WEBSOCKET_CAPACITY,
+                        help="WebSocket 연결 하나당 보관하는 최대 메시지 수 (기본: %(default)s)")
+    parser.add_argument("--measure-startup", action="store_true",
+                        help="창이 보일 때까지의 시간을 JSON으로 출력하고 종료합니다. (프록시는 시작하지 않음)")
+    args, qt_args = parser.parse_known_args()
+
+    # Swagger 탭의 QtWebEngine을 나중에 불러오려면 QApplication 생성 전에 설정해야 합니다.
+    QCoreApplication.setAttribute(Qt.AA_ShareOpenGLContexts)
+    app = QApplication(sys.argv[:1] + qt_args)
 
     # --- 애플리케이션 아이콘 설정 ---
     # icon.svg 파일이 main.py와 같은 디렉토리에 있다고 가정합니다.
@@ -29,19 +81,53 @@ if __name__ == "__main__":
         app.setWindowIcon(QIcon(icon_path))
     # --------------------------------
     
-    # mitmproxy <-> GUI 통신을 위한 큐
-    shared_queue = queue.Queue()  # 데이터 전달용 (proxy -> gui)
-    command_queue = queue.Queue() # 명령 전달용 (gui -> proxy)
-    browser_command_queue = queue.Queue() # 명령 전달용 (proxy -> browser)
+    # 파이프라인 단계별 카운터/지연 시간 히스토그램 (Stats 탭과 Prometheus 엔드포인트에서 조회)
+    metrics = Metrics()
+    metrics_server = None
+    if args.metrics_port:
+        try:
+            metrics_server = MetricsServer(metrics, args.metrics_port)
+        except OSError as e:
+            print(f"메트릭 엔드포인트를 열 수 없습니다 (포트 {args.metrics_port}): {e}")
+
+    # mitmproxy <-> GUI 통신을 위한 큐/채널 (폴링 없이 받는 쪽을 즉시 깨움)
+    shared_queue = FlowFeed(metrics.queue_dwell)  # 데이터 전달용 (proxy -> gui, Qt 시그널로 알림, 대기 시간 기록)
+    # 명령 전달용 (gui -> proxy). 프록시가 별도 프로세스면 파이프를 통하는 채널을 사용합니다.
+    command_queue = IpcCommandChannel() if args.proxy_process else AsyncChannel()
+    browser_command_queue = AsyncChannel() # 명령 전달용 (proxy -> browser)
+    websocket_queue = FlowFeed() # WebSocket 메시지 배치 전달용 (proxy -> gui)
+
+    # 프록시와 GUI가 함께 사용하는 디스크 기반 Flow 저장소
+    flow_store = FlowStore()
+    # 요청/응답 훅에서 사용하는 컴파일된 차단 규칙 (GUI에서 통계 조회)
+    filter_engine = FilterEngine()
+    # 캡처되는 Flow로 OpenAPI 스펙을 점진적으로 만드는 빌더
+    openapi_builder = OpenApiBuilder()
 
     # 메인 윈도우와 mitmproxy 스레드 생성
-    main_window = MainWindow(shared_queue, command_queue)
-    mitm_thread = MitmThread(shared_queue, command_queue, browser_command_queue)
+    metrics_url = f"http://127.0.0.1:{metrics_server.port}/metrics" if metrics_server else None
+    main_window = MainWindow(shared_queue, command_queue, flow_store, filter_engine, openapi_builder, browser_command_queue,
+                             metrics, metrics_url, websocket_queue, args.websocket_capacity)
+    if args.proxy_process:
+        mitm_thread = ProxyProcess(shared_queue, command_queue, flow_store, filter_engine, openapi_builder, browser_command_queue,
+                                   metrics=metrics, websocket_queue=websocket_queue)
+    else:
+        mitm_thread = MitmThread(shared_queue, command_queue, flow_store, filter_engine, openapi_builder, browser_command_queue,
+                                 metrics=metrics, websocket_queue=websocket_queue)
     
-    main_window.playwright_thread = PlaywrightThread(browser_command_queue)
+    main_window.playwright_thread = PlaywrightThread(
+        browser_command_queue, ai_token_budget=args.ai_token_budget, browser_pool_size=args.browser_pool_size,
+        metrics=metrics)
     # 애플리케이션 종료 시 mitmproxy 스레드도 함께 종료되도록 연결
     app.aboutToQuit.connect(mitm_thread.shutdown)
-    mitm_thread.start()
+    app.aboutToQuit.connect(flow_store.close)
+    if metrics_server is not None:
+        app.aboutToQuit.connect(metrics_server.shutdown)
+        metrics_server.start()
 
     main_window.show()
+    # 프록시 엔진(mitmproxy 마스터 임포트 포함)은 창을 띄운 뒤 시작합니다.
+    if not args.measure_startup:
+        QTimer.singleShot(0, mitm_thread.start)
+    QTimer.singleShot(0, lambda: report_startup(args.measure_startup))
     sys.exit(app.exec())
\ No newline at end of file
@@ -0,0 +1,273 @@
+import bisect
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_METRICS_PORT = 9464
+# 지연 시간 히스토그램의 버킷 상한(초). 프록시 훅(수십 µs)부터 AI 호출(수십 초)까지 한 벌로 씁니다.
+LATENCY_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+                   0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# 스냅샷 형식 (프로세스 간 전달을 위해 기본 타입만 사용)
+#   {이름: {"kind": "histogram"|"counter", "help": 설명, "label": 레이블 이름 또는 None,
+#          "series": {레이블 값: {"buckets": [...], "sum": 합, "count": 개수} 또는 카운트}}}
+MetricsSnapshot = dict
+
+
+class Histogram:
+    """고정 버킷 지연 시간 히스토그램입니다. 레이블은 하나(예: engine)까지 둘 수 있습니다.
+
+    observe()는 버킷 검색(bisect)과 잠금 한 번이라 훅 안에서 호출해도 비용이 작습니다.
+    """
+
+    def __init__(self, name: str, help_text: str, label: str | None = None, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.label = label
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        # 레이블 값 -> [버킷별 개수(마지막은 +Inf), 합, 개수]
+        self._series: dict[str, list] = {}
+
+    def observe(self, seconds: float, label_value: str = ""):
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            series = self._series.get(label_value)
+            if series is None:
+                series = self._series[label_value] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += seconds
+            series[2] += 1
+
+    def time(self, label_value: str = ""):
+        """with 블록의 실행 시간을 기록하는 컨텍스트 매니저를 반환합니다."""
+        return _Timer(self, label_value)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            series = {value: {"buckets": list(counts), "sum": total, "count": count}
+                      for value, (counts, total, count) in self._series.items()}
+        return {"kind": "histogram", "help": self.help, "label": self.label,
+                "bucket_bounds": list(self.buckets), "series": series}
+
+
+class _Timer:
+    __slots__ = ("histogram", "label_value", "started")
+
+    def __init__(self, histogram: Histogram, label_value: str):
+        self.histogram = histogram
+        self.label_value = label_value
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.started, self.label_value)
+
+
+class Counter:
+    """단조 증가 카운터입니다. 레이블은 하나(예: outcome)까지 둘 수 있습니다."""
+
+    def __init__(self, name: str, help_text: str, label: str | None = None):
+        self.name = name
+        self.help = help_text
+        self.label = label
+        self._lock = threading.Lock()
+        self._values: dict[str, int] = {}
+
+    def inc(self, label_value: str = "", amount: int = 1):
+        with self._lock:
+            self._values[label_value] = self._values.get(label_value, 0) + amount
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            series = dict(self._values)
+        return {"kind": "counter", "help": self.help, "label": self.label, "series": series}
+
+
+def _copy_series(data):
+    return dict(data, buckets=list(data["buckets"])) if isinstance(data, dict) else data
+
+
+def merge_snapshots(*snapshots: MetricsSnapshot) -> MetricsSnapshot:
+    """같은 이름의 계열을 더해 스냅샷 여러 개를 하나로 합칩니다. (GUI + 프록시 프로세스)"""
+    merged: MetricsSnapshot = {}
+    for snapshot in snapshots:
+        for name, metric in snapshot.items():
+            target = merged.get(name)
+            if target is None:
+                merged[name] = {**metric, "series": {value: _copy_series(data)
+                                                     for value, data in metric["series"].items()}}
+                continue
+            for value, data in metric["series"].items():
+                existing = target["series"].get(value)
+                if existing is None:
+                    target["series"][value] = _copy_series(data)
+                elif isinstance(data, dict):
+                    existing["buckets"] = [a + b for a, b in zip(existing["buckets"], data["buckets"])]
+                    existing["sum"] += data["sum"]
+                    existing["count"] += data["count"]
+                else:
+                    target["series"][value] = existing + data
+    return merged
+
+
+def histogram_quantile(quantile: float, bounds: list[float], buckets: list[int]) -> float:
+    """버킷 개수로 분위수를 추정합니다. (버킷 안에서는 선형 보간, Prometheus와 같은 방식)"""
+    total = sum(buckets)
+    if not total:
+        return 0.0
+    rank = quantile * total
+    cumulative = 0
+    for index, count in enumerate(buckets):
+        if cumulative + count >= rank and count:
+            if index >= len(bounds):
+                # +Inf 버킷에 걸리면 마지막 유한 상한을 돌려줍니다.
+                return bounds[-1]
+            lower = bounds[index - 1] if index else 0.0
+            return lower + (bounds[index] - lower) * (rank - cumulative) / count
+        cumulative += count
+    return bounds[-1]
+
+
+def summarize_histogram(metric: dict, label_value: str = "") -> dict:
+    """스냅샷의 히스토그램 계열 하나를 {count, avg_ms, p50_ms, p99_ms}로 요약합니다."""
+    series = metric["series"].get(label_value)
+    if not series or not series["count"]:
+        return {"count": 0}
+    bounds = metric["bucket_bounds"]
+    return {
+        "count": series["count"],
+        "avg_ms": series["sum"] / series["count"] * 1000,
+        "p50_ms": histogram_quantile(0.5, bounds, series["buckets"]) * 1000,
+        "p99_ms": histogram_quantile(0.99, bounds, series["buckets"]) * 1000,
+    }
+
+
+def summarize(snapshot: MetricsSnapshot) -> dict:
+    """스냅샷 전체를 JSON으로 보기 좋은 요약으로 바꿉니다. (히스토그램은 요약, 카운터는 값 그대로)"""
+    result = {}
+    for name, metric in sorted(snapshot.items()):
+        if metric["kind"] == "counter":
+            result[name] = dict(metric["series"])
+        else:
+            result[name] = {value: summarize_histogram(metric, value) for value in sorted(metric["series"])}
+    return result
+
+
+def _format_labels(label: str | None, value: str, extra: str = "") -> str:
+    pairs = []
+    if label:
+        escaped = value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        pairs.append(f'{label}="{escaped}"')
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def prometheus_text(snapshot: MetricsSnapshot) -> str:
+    """스냅샷을 Prometheus 텍스트 노출 형식(0.0.4)으로 변환합니다."""
+    lines = []
+    for name, metric in sorted(snapshot.items()):
+        lines.append(f"# HELP {name} {metric['help']}")
+        lines.append(f"# TYPE {name} {metric['kind']}")
+        label = metric["label"]
+        for value, data in sorted(metric["series"].items()):
+            if metric["kind"] == "counter":
+                lines.append(f"{name}{_format_labels(label, value)} {data}")
+                continue
+            cumulative = 0
+            for bound, count in zip(metric["bucket_bounds"] + ["+Inf"], data["buckets"]):
+                cumulative += count
+                le = 'le="{}"'.format(bound if bound == "+Inf" else repr(float(bound)))
+                lines.append(f"{name}_bucket{_format_labels(label, value, le)} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(label, value)} {data['sum']!r}")
+            lines.append(f"{name}_count{_format_labels(label, value)} {data['count']}")
+    return "\n".join(lines) + "\n"
+
+
+class Metrics:
+    """파이프라인 단계별 카운터와 지연 시간 히스토그램 묶음입니다.
+
+    main.py에서 한 번 만들어 프록시 애드온, GUI, 브라우저 스레드가 함께 씁니다. 프록시가 별도
+    프로세스면 그쪽 인스턴스의 스냅샷을 주기적으로 받아 remote_snapshot에 두고 combined()에서 합칩니다.
+    """
+
+    def __init__(self):
+        self.request_hook = Histogram(
+            "pongpsuite_request_hook_seconds", "PySideAddon.request 훅 실행 시간")
+        self.response_hook = Histogram(
+            "pongpsuite_response_hook_seconds", "PySideAddon.response 훅 실행 시간 (저장, 큐 전달 포함)")
+        self.queue_dwell = Histogram(
+            "pongpsuite_queue_dwell_seconds", "Flow가 shared_queue에 들어가서 check_queue가 꺼낼 때까지의 시간")
+        self.gui_insert = Histogram(
+            "pongpsuite_gui_insert_seconds", "History 테이블에 배치 하나를 추가하는 시간")
+        self.replay = Histogram(
+            "pongpsuite_replay_seconds", "리플레이 요청 왕복 시간", label="engine")
+        self.ai_call = Histogram(
+            "pongpsuite_ai_call_seconds", "AI 프롬프트 처리 시간 (응답 전체 수신까지)", label="source")
+        self.ai_first_token = Histogram(
+            "pongpsuite_ai_first_token_seconds", "AI 응답의 첫 result 텍스트까지의 시간")
+        self.flows = Counter(
+            "pongpsuite_proxy_flows_total", "프록시를 지난 Flow 수 (기록 여부 또는 제외한 필터별)", label="outcome")
+        self.inserted_flows = Counter(
+            "pongpsuite_gui_inserted_flows_total", "History 테이블에 추가된 Flow 수")
+        self.websocket_messages = Counter(
+            "pongpsuite_websocket_messages_total", "캡처한 WebSocket 메시지 수 (보낸 쪽별)", label="direction")
+        self.started_at = time.time()
+        self.remote_snapshot: MetricsSnapshot | None = None
+
+    def _metrics(self):
+        return (self.request_hook, self.response_hook, self.queue_dwell, self.gui_insert, self.replay,
+                self.ai_call, self.ai_first_token, self.flows, self.inserted_flows, self.websocket_messages)
+
+    def snapshot(self) -> MetricsSnapshot:
+        """이 프로세스에서 기록한 값만의 스냅샷입니다."""
+        return {metric.name: metric.snapshot() for metric in self._metrics()}
+
+    def combined(self) -> MetricsSnapshot:
+        if self.remote_snapshot is None:
+            return self.snapshot()
+        return merge_snapshots(self.snapshot(), self.remote_snapshot)
+
+    def prometheus_text(self) -> str:
+        return prometheus_text(self.combined())
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    metrics: Metrics
+
+    def do_GET(self):
+        if self.path.split("?", 1)[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = self.metrics.prometheus_text().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # 스크레이프 요청마다 콘솔에 로그를 남기지 않습니다.
+        pass
+
+
+class MetricsServer:
+    """combined() 값을 Prometheus 텍스트로 내보내는 localhost 전용 HTTP 서버입니다. (/metrics)"""
+
+    def __init__(self, metrics: Metrics, port: int = DEFAULT_METRICS_PORT, host: str = "127.0.0.1"):
+        handler = type("MetricsHandler", (_MetricsHandler,), {"metrics": metrics})
+        self._server = ThreadingHTTPServer((host, port), handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name="MetricsServer", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        print(f"메트릭 엔드포인트: http://127.0.0.1:{self.port}/metrics")
+
+    def shutdown(self):
+        self._server.shutdown()
+        self._server.server_close()
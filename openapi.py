@@ -0,0 +1,376 @@
+import json
+import queue
+import re
+import threading
+import zlib
+from io import BytesIO
+from urllib.parse import urlsplit, parse_qsl
+
+import brotli
+import zstandard
+
+# 경로 세그먼트 중 파라미터로 접을 패턴 (먼저 매칭되는 것이 우선)
+SEGMENT_PATTERNS = [
+    ("integer", re.compile(r"^\d+$")),
+    ("uuid", re.compile(r"^[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}$")),
+    ("hash", re.compile(r"^[0-9a-fA-F]{16,}$")),
+    ("token", re.compile(r"^(?=.*\d)[A-Za-z0-9_-]{24,}$")),
+]
+
+# 한 노드에 이보다 많은 고정 세그먼트가 생기면 이후 세그먼트는 파라미터로 취급합니다. (slug 등)
+MAX_LITERAL_CHILDREN = 200
+# 스키마 추론 비용 상한
+MAX_SCHEMA_BODY_SIZE = 1024 * 1024
+MAX_SCHEMA_DEPTH = 8
+MAX_SCHEMA_PROPERTIES = 200
+# 크기 제한을 두고 brotli를 풀 때 한 번에 넣는 입력 바이트 수
+BROTLI_INPUT_STEP = 16
+
+
+def decode_bounded(body: bytes, content_encoding: str, limit: int = MAX_SCHEMA_BODY_SIZE,
+                   partial: bool = False) -> bytes | None:
+    """압축된 바디를 최대 limit 바이트까지만 풀어 봅니다. 넘거나 풀 수 없으면 None을 반환합니다.
+
+    작은 압축 폭탄이 스키마 추론 스레드에서 전부 풀려 메모리를 차지하지 않도록 출력 크기를 제한합니다.
+    partial이면 넘는 부분은 잘라 앞 limit 바이트를 반환하고, 앞부분만 읽은 입력이라 생기는
+    오류는 그때까지 푼 내용으로 처리합니다. (검색 색인처럼 바디의 앞부분만 필요한 경우)
+    """
+    content_encoding = content_encoding.strip().lower()
+    if content_encoding in ('', 'identity', 'none'):
+        if partial:
+            return body[:limit]
+        return body if len(body) <= limit else None
+    parts = []
+    size = 0
+    try:
+        if content_encoding in ('gzip', 'x-gzip'):
+            parts.append(zlib.decompressobj(16 + zlib.MAX_WBITS).decompress(body, limit + 1))
+        elif content_encoding == 'deflate':
+            # mitmproxy와 같이 raw deflate를 먼저, 실패하면 zlib 헤더가 있는 형식으로 풉니다.
+            try:
+                parts.append(zlib.decompressobj(-zlib.MAX_WBITS).decompress(body, limit + 1))
+            except zlib.error:
+                parts.append(zlib.decompressobj().decompress(body, limit + 1))
+        elif content_encoding == 'br':
+            # brotli 디코더에는 출력 상한이 없으므로 입력을 조금씩 넣으며 크기를 확인합니다.
+            # (한 번에 풀리는 양은 대략 brotli 메타블록 하나, 최대 16 MiB)
+            decompressor = brotli.Decompressor()
+            for start in range(0, len(body), BROTLI_INPUT_STEP):
+                part = decompressor.process(body[start:start + BROTLI_INPUT_STEP])
+                parts.append(part)
+                size += len(part)
+                if size > limit:
+                    break
+        elif content_encoding == 'zstd':
+            reader = zstandard.ZstdDecompressor().stream_reader(BytesIO(body), read_across_frames=True)
+            while size <= limit:
+                part = reader.read(min(limit + 1 - size, 64 * 1024))
+                if not part:
+                    break
+                parts.append(part)
+                size += len(part)
+        else:
+            return None
+    except (zlib.error, brotli.error, zstandard.ZstdError):
+        if not partial:
+            return None
+    decoded = b"".join(parts)
+    if partial:
+        return decoded[:limit]
+    return decoded if len(decoded) <= limit else None
+
+
+def classify_segment(segment: str) -> str | None:
+    for kind, pattern in SEGMENT_PATTERNS:
+        if pattern.match(segment):
+            return kind
+    return None
+
+
+def infer_schema(value, depth: int = 0) -> dict:
+    """JSON 값으로부터 OpenAPI 스키마를 추론합니다."""
+    if value is None:
+        return {"nullable": True}
+    if isinstance(value, bool):
+        return {"type": "boolean"}
+    if isinstance(value, int):
+        return {"type": "integer"}
+    if isinstance(value, float):
+        return {"type": "number"}
+    if isinstance(value, str):
+        return {"type": "string"}
+    if depth >= MAX_SCHEMA_DEPTH:
+        return {}
+    if isinstance(value, list):
+        items = {}
+        # 배열은 앞쪽 일부 원소만 보고 스키마를 합칩니다.
+        for item in value[:20]:
+            items = merge_schema(items, infer_schema(item, depth + 1)) if items else infer_schema(item, depth + 1)
+        return {"type": "array", "items": items}
+    if isinstance(value, dict):
+        properties = {}
+        for key in list(value)[:MAX_SCHEMA_PROPERTIES]:
+            properties[key] = infer_schema(value[key], depth + 1)
+        return {"type": "object", "properties": properties, "required": sorted(properties)}
+    return {}
+
+
+def merge_schema(a: dict, b: dict) -> dict:
+    """두 스키마를 합칩니다. 객체는 속성을 합치고 required는 양쪽 모두에 있는 것만 남깁니다."""
+    if not a:
+        return b
+    if not b:
+        return a
+    nullable = a.get("nullable") or b.get("nullable")
+    a_type, b_type = a.get("type"), b.get("type")
+
+    if a_type is None and nullable and "oneOf" not in a:
+        merged = dict(b)
+    elif b_type is None and nullable and "oneOf" not in b:
+        merged = dict(a)
+    elif a_type == b_type and a_type == "object":
+        properties = dict(a.get("properties", {}))
+        for key, schema in b.get("properties", {}).items():
+            properties[key] = merge_schema(properties[key], schema) if key in properties else schema
+            if len(properties) >= MAX_SCHEMA_PROPERTIES:
+                break
+        required = sorted(set(a.get("required", [])) & set(b.get("required", [])))
+        merged = {"type": "object", "properties": properties, "required": required}
+    elif a_type == b_type and a_type == "array":
+        merged = {"type": "array", "items": merge_schema(a.get("items", {}), b.get("items", {}))}
+    elif a_type == b_type:
+        merged = dict(a)
+    elif {a_type, b_type} == {"integer", "number"}:
+        merged = {"type": "number"}
+    else:
+        variants = a.get("oneOf", [a]) + [v for v in b.get("oneOf", [b]) if v not in a.get("oneOf", [a])]
+        merged = {"oneOf": [{k: v for k, v in variant.items() if k != "nullable"} for variant in variants]}
+
+    if nullable:
+        merged["nullable"] = True
+    return merged
+
+
+def _scalar_schema(value: str) -> dict:
+    if re.fullmatch(r"-?\d+", value):
+        return {"type": "integer"}
+    if re.fullmatch(r"-?\d+\.\d+", value):
+        return {"type": "number"}
+    if value.lower() in ("true", "false"):
+        return {"type": "boolean"}
+    return {"type": "string"}
+
+
+class Operation:
+    def __init__(self):
+        self.count = 0
+        self.query_params: dict[str, dict] = {}
+        self.request_schemas: dict[str, dict] = {}
+        self.responses: dict[str, dict[str, dict]] = {}
+
+    def to_spec(self, method: str, path: str, path_params: list[tuple[str, str]]) -> dict:
+        parameters = [
+            {"name": name, "in": "path", "required": True,
+             "schema": {"type": "integer"} if kind == "integer" else
+                       {"type": "string", "format": "uuid"} if kind == "uuid" else {"type": "string"}}
+            for name, kind in path_params
+        ]
+        parameters += [
+            {"name": name, "in": "query", "required": False, "schema": schema}
+            for name, schema in sorted(self.query_params.items())
+        ]
+        spec = {
+            "summary": f"Captured {method.upper()} request to {path}",
+            "description": f"Observed {self.count} time(s).",
+            "responses": {
+                status: {
+                    "description": f"Status code {status}",
+                    **({"content": {ct: {"schema": schema} for ct, schema in contents.items()}} if contents else {})
+                }
+                for status, contents in sorted(self.responses.items())
+            }
+        }
+        if parameters:
+            spec["parameters"] = parameters
+        if self.request_schemas:
+            spec["requestBody"] = {
+                "content": {ct: {"schema": schema} for ct, schema in self.request_schemas.items()}
+            }
+        return spec
+
+
+class PathNode:
+    """경로 세그먼트 트라이의 노드입니다. 파라미터 세그먼트는 param_child 하나로 합쳐집니다."""
+
+    def __init__(self):
+        self.literals: dict[str, "PathNode"] = {}
+        self.param_child: "PathNode | None" = None
+        self.param_kind = "string"
+        self.operations: dict[str, Operation] = {}
+
+    def child_for(self, segment: str) -> tuple["PathNode", bool]:
+        """세그먼트에 해당하는 자식 노드와 (파라미터 여부)를 반환합니다. 없으면 만듭니다."""
+        literal = self.literals.get(segment)
+        if literal is not None:
+            return literal, False
+
+        kind = classify_segment(segment)
+        if kind is None and len(self.literals) < MAX_LITERAL_CHILDREN:
+            node = PathNode()
+            self.literals[segment] = node
+            return node, False
+
+        if self.param_child is None:
+            self.param_child = PathNode()
+            self.param_child.param_kind = kind or "string"
+        elif self.param_child.param_kind != (kind or "string"):
+            self.param_child.param_kind = "string"
+        return self.param_child, True
+
+
+class OpenApiBuilder:
+    """캡처된 Flow로부터 OpenAPI 스펙을 점진적으로 만듭니다.
+
+    프록시는 submit()으로 원본 데이터를 넘기기만 하고, 바디 압축 해제와 스키마 추론은
+    전용 워커 스레드에서 처리합니다. 스펙 직렬화는 to_spec()/write()를 호출할 때만 일어납니다.
+    """
+
+    def __init__(self):
+        self._root = PathNode()
+        self._servers: set[str] = set()
+        self._lock = threading.Lock()
+        self._queue = queue.SimpleQueue()
+        # 스펙이 바뀔 때마다 증가합니다. 직렬화 결과를 다시 만들 필요가 있는지 판단하는 데 사용합니다.
+        self.version = 0
+        self._worker = threading.Thread(target=self._run, name="OpenApiBuilder", daemon=True)
+        self._worker.start()
+
+    def submit(self, method: str, url: str, status_code: str,
+               request_body: bytes | None = None, request_headers: dict | None = None,
+               response_body: bytes | None = None, response_headers: dict | None = None):
+        """Flow 하나를 스펙에 반영하도록 워커에 넘깁니다. (프록시 스레드에서 호출, 즉시 반환)"""
+        self._queue.put((self.add_flow, (method, url, status_code, request_body, request_headers or {},
+                                         response_body, response_headers or {})))
+
+    def submit_stored(self, flow_store, flow_data):
+        """이미 저장소에 있는 Flow를 반영하도록 워커에 넘깁니다. 바디는 워커가 저장소에서 읽습니다.
+
+        프록시가 별도 프로세스에서 동작해 원본 바디를 직접 받을 수 없을 때 사용합니다.
+        """
+        self._queue.put((self._add_stored_flow, (flow_store, flow_data)))
+
+    def _run(self):
+        while True:
+            handler, args = self._queue.get()
+            try:
+                handler(*args)
+            except Exception as e:
+                print(f"OpenAPI 스펙 갱신 중 오류: {e}")
+
+    def _add_stored_flow(self, flow_store, flow_data):
+        details = flow_store.get_details(flow_data.flow_id, cache=False)
+        if details is None:
+            return
+
+        def body_and_headers(body, headers: list[tuple[str, str]]) -> tuple[bytes | None, dict]:
+            content_type = next((v for k, v in headers if k.lower() == 'content-type'), '')
+            if not body.raw_size or body.raw_size > MAX_SCHEMA_BODY_SIZE:
+                return None, {'content-type': content_type}
+            # 압축 해제는 _json_schema에서 크기 상한을 두고 합니다. (content()는 끝까지 풂)
+            return body.raw_content(), {'content-type': content_type, 'content-encoding': body.content_encoding}
+
+        try:
+            request_body, request_headers = body_and_headers(details.request_body, details.request_headers)
+            response_body, response_headers = body_and_headers(details.response_body, details.response_headers)
+            self.add_flow(flow_data.method, flow_data.url, flow_data.status_code,
+                          request_body, request_headers, response_body, response_headers)
+        finally:
+            details.release()
+
+    @staticmethod
+    def _json_schema(body: bytes | None, headers: dict) -> tuple[str, dict] | None:
+        content_type = headers.get('content-type', '').split(';')[0].strip().lower()
+        if not body or not (content_type == 'application/json' or content_type.endswith('+json')):
+            return None
+        # 압축 해제 전후 모두 MAX_SCHEMA_BODY_SIZE를 넘으면 추론하지 않습니다.
+        if len(body) > MAX_SCHEMA_BODY_SIZE:
+            return None
+        body = decode_bounded(body, headers.get('content-encoding', ''))
+        if body is None:
+            return None
+        try:
+            return content_type, infer_schema(json.loads(body))
+        except Exception:
+            return None
+
+    def add_flow(self, method: str, url: str, status_code: str,
+                 request_body: bytes | None, request_headers: dict,
+                 response_body: bytes | None, response_headers: dict):
+        parts = urlsplit(url)
+        segments = [s for s in parts.path.split('/') if s]
+        request_schema = self._json_schema(request_body, request_headers)
+        response_schema = self._json_schema(response_body, response_headers)
+
+        with self._lock:
+            self._servers.add(f"{parts.scheme}://{parts.netloc}")
+            node = self._root
+            for segment in segments:
+                node, _ = node.child_for(segment)
+
+            operation = node.operations.setdefault(method.lower(), Operation())
+            operation.count += 1
+            for name, value in parse_qsl(parts.query, keep_blank_values=True):
+                schema = _scalar_schema(value)
+                existing = operation.query_params.get(name)
+                operation.query_params[name] = merge_schema(existing, schema) if existing else schema
+            if request_schema:
+                ct, schema = request_schema
+                existing = operation.request_schemas.get(ct)
+                operation.request_schemas[ct] = merge_schema(existing, schema) if existing else schema
+            contents = operation.responses.setdefault(status_code, {})
+            if response_schema:
+                ct, schema = response_schema
+                existing = contents.get(ct)
+                contents[ct] = merge_schema(existing, schema) if existing else schema
+            self.version += 1
+
+    def _collect_paths(self, node: PathNode, prefix: list[str], params: list[tuple[str, str]], paths: dict):
+        if node.operations:
+            path = "/" + "/".join(prefix)
+            paths[path] = {
+                method: operation.to_spec(method, path, params)
+                for method, operation in sorted(node.operations.items())
+            }
+        for segment, child in sorted(node.literals.items()):
+            self._collect_paths(child, prefix + [segment], params, paths)
+        if node.param_child is not None:
+            # 직전 고정 세그먼트로 파라미터 이름을 만듭니다. (/users/{usersId})
+            base = re.sub(r"\W", "_", prefix[-1]) if prefix and not prefix[-1].startswith("{") else "param"
+            name = f"{base}Id"
+            used = {n for n, _ in params}
+            suffix = 2
+            while name in used:
+                name = f"{base}Id{suffix}"
+                suffix += 1
+            self._collect_paths(node.param_child, prefix + [f"{{{name}}}"],
+                                params + [(name, node.param_child.param_kind)], paths)
+
+    def to_spec(self) -> dict:
+        with self._lock:
+            paths = {}
+            self._collect_paths(self._root, [], [], paths)
+            servers = [{"url": server} for server in sorted(self._servers)]
+        return {
+            "openapi": "3.0.0",
+            "info": {
+                "title": "Captured API Spec",
+                "version": "1.0.0",
+                "description": "API specification automatically generated from captured traffic."
+            },
+            "servers": servers,
+            "paths": paths
+        }
+
+    def write(self, output_path: str):
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_spec(), f, indent=2, ensure_ascii=False)
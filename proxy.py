@@ -1,180 +1,544 @@
 import asyncio
-import queue
-from PySide6.QtCore import QThread
+import sys
+import threading
 from dataclasses import dataclass, field
-from typing import Dict
+from typing import TYPE_CHECKING, Callable
 import re
+import time
 import mitmproxy.http
-from urllib.parse import urlparse
-import os
 
-from mitmproxy.tools.dump import DumpMaster
-from mitmproxy import options
 from mitmproxy import http
+from mitmproxy.net import encoding
 
-@dataclass
+from filters import FilterEngine, FilterRules
+from channel import AsyncChannel, FlowFeed
+from openapi import OpenApiBuilder, decode_bounded
+from bulk_replay import BulkReplayJob
+from metrics import Metrics
+from scope import CompiledScope
+from websocket_capture import WebSocketCollector, DEFAULT_WEBSOCKET_CAPACITY, WEBSOCKET_FLUSH_INTERVAL
+
+if TYPE_CHECKING:
+    from mitmproxy.tools.dump import DumpMaster
+    from flow_store import FlowStore, BodySpool
+
+@dataclass(slots=True)
 class FlowData:
+    """History 테이블과 GUI 큐로 전달되는 Flow 메타데이터입니다. (헤더/바디는 저장소에 있음)
+
+    인스턴스 dict 없이 슬롯만 사용하고, 값의 종류가 적은 문자열은 intern하여 Flow 간에 공유합니다.
+    """
     flow_id: str  
     method: str
     url: str
     path: str
     http_version: str
     status_code: str
-    request_headers: dict
-    request_body: bytes
-    response_headers: dict
-    response_body: bytes
-    
+    request_size: int = 0
+    response_size: int = 0
+    content_type: str = ""
+    # 리플레이로 만들어진 Flow면 원본 Flow ID (응답 비교에 사용)
+    replay_of: str = ""
+
+    def __post_init__(self):
+        self.method = sys.intern(self.method)
+        self.http_version = sys.intern(self.http_version)
+        self.status_code = sys.intern(self.status_code)
+        self.content_type = sys.intern(self.content_type)
+
+
+# (이름, 값) 튜플의 순서 있는 목록. 이름은 intern되고 Set-Cookie 같은 중복 헤더도 그대로 유지됩니다.
+Headers = tuple[tuple[str, str], ...]
+# 이보다 짧은 헤더 값(Accept-Encoding, Connection 등 흔한 값)도 intern합니다.
+MAX_INTERNED_HEADER_VALUE = 64
+# 요청 단계에서 기록하지 않기로 한 Flow에 제외 사유를 남기는 flow.metadata 키
+SKIP_METADATA_KEY = "pongpsuite_skip"
+# 리플레이한 Flow에 원본 Flow ID를 남기는 flow.metadata 키 (직렬화 상태와 함께 저장됨)
+REPLAY_SOURCE_KEY = "pongpsuite_replay_of"
+
+
+def decode_headers(raw_headers) -> Headers:
+    """mitmproxy 상태의 (bytes, bytes) 헤더 목록을 Headers로 변환합니다."""
+    headers = []
+    for k, v in raw_headers:
+        value = v.decode('utf-8', 'surrogateescape')
+        if len(value) <= MAX_INTERNED_HEADER_VALUE:
+            value = sys.intern(value)
+        headers.append((sys.intern(k.decode('utf-8', 'surrogateescape')), value))
+    return tuple(headers)
+
+
+class BodyHandle:
+    """저장소에 있는 원본(압축된) 바디에 대한 지연 핸들입니다.
+
+    행이 선택되어 미리보기를 요청할 때 처음으로 읽고 압축 해제하며, release()로 캐시를 비웁니다.
+    """
+
+    BINARY_CONTENT_TYPES = ('image/', 'audio/', 'video/', 'font/', 'application/octet-stream',
+                            'application/zip', 'application/pdf', 'application/x-protobuf')
+
+    def __init__(self, loader: Callable[[], bytes], raw_size: int,
+                 content_encoding: str = "", content_type: str = "",
+                 prefix_loader: Callable[[int], bytes] | None = None):
+        self._loader = loader
+        # 원본 바디의 앞부분만 읽는 함수 (없으면 전체를 읽어 자름)
+        self._prefix_loader = prefix_loader
+        self.raw_size = raw_size
+        self.content_encoding = content_encoding.strip().lower()
+        self.content_type = content_type
+        self._content: bytes | None = None
+
+    def content(self) -> bytes:
+        """압축 해제된 바디를 반환합니다. (첫 호출 시에만 실제로 읽고 해제)"""
+        if self._content is None:
+            raw = self._loader()
+            if self.content_encoding and self.content_encoding != 'identity':
+                try:
+                    raw = encoding.decode(raw, self.content_encoding)
+                except Exception as e:
+                    print(f"바디 압축 해제 실패 ({self.content_encoding}): {e}")
+            self._content = raw
+        return self._content
+
+    def raw_content(self) -> bytes:
+        """압축을 풀지 않은 저장된 바디를 그대로 읽습니다. (캐시하지 않음)"""
+        return self._loader()
+
+    def release(self):
+        self._content = None
+
+    @property
+    def charset(self) -> str:
+        match = re.search(r'charset=([\w.-]+)', self.content_type, re.IGNORECASE)
+        return match.group(1) if match else 'utf-8'
+
+    def is_binary(self) -> bool:
+        return self._looks_binary(self.content()[:1024])
+
+    def _looks_binary(self, sample: bytes) -> bool:
+        if self.content_type.lower().startswith(self.BINARY_CONTENT_TYPES):
+            return True
+        return b"\x00" in sample[:1024]
+
+    def text_head(self, limit: int) -> str | None:
+        """압축을 푼 바디의 앞 limit 바이트를 텍스트로 반환합니다. 바이너리면 None입니다.
+
+        전체 바디를 읽거나 풀어 캐시하지 않으므로 수백 MB 바디에도 limit 정도의 메모리만 씁니다.
+        """
+        if self._content is not None:
+            head = self._content[:limit]
+        else:
+            raw = self._prefix_loader(limit) if self._prefix_loader else self._loader()[:limit]
+            head = decode_bounded(raw, self.content_encoding, limit, partial=True) or b""
+        if self._looks_binary(head):
+            return None
+        try:
+            return head.decode(self.charset, errors='replace')
+        except LookupError:
+            return head.decode('utf-8', errors='replace')
+
+    def text(self) -> str:
+        try:
+            return self.content().decode(self.charset, errors='replace')
+        except LookupError:
+            return self.content().decode('utf-8', errors='replace')
+
+    def preview(self, offset: int = 0, limit: int = 64 * 1024, hex_view: bool | None = None) -> str:
+        """offset부터 최대 limit 바이트만 텍스트 또는 hex dump로 반환합니다."""
+        chunk = self.content()[offset:offset + limit]
+        if hex_view is None:
+            hex_view = self.is_binary()
+        if not hex_view:
+            try:
+                return chunk.decode(self.charset, errors='replace')
+            except LookupError:
+                return chunk.decode('utf-8', errors='replace')
+
+        lines = []
+        for i in range(0, len(chunk), 16):
+            row = chunk[i:i + 16]
+            hex_part = " ".join(f"{b:02x}" for b in row)
+            ascii_part = "".join(chr(b) if 32 <= b < 127 else "." for b in row)
+            lines.append(f"{offset + i:08x}  {hex_part:<47}  {ascii_part}")
+        return "\n".join(lines)
+
+
+@dataclass
+class FlowDetails:
+    """선택된 Flow의 상세 정보입니다. 헤더는 중복(Set-Cookie 등)을 유지하는 리스트로 보관합니다."""
+    flow: FlowData
+    request_headers: Headers
+    response_headers: Headers
+    request_body: BodyHandle
+    response_body: BodyHandle
+
     def get_request_display(self) -> str:
-        first_line = f"{self.method} {self.path} {self.http_version}"
-        headers = "\n".join(f"{k}: {v}" for k, v in self.request_headers.items())
+        first_line = f"{self.flow.method} {self.flow.path} {self.flow.http_version}"
+        headers = "\n".join(f"{k}: {v}" for k, v in self.request_headers)
         try:
-            body = self.request_body.decode('utf-8', errors='replace')
-        except: body = "[Error] 바디를 디코딩할 수 없습니다."
+            body = self.request_body.text()
+        except Exception: body = "[Error] 바디를 디코딩할 수 없습니다."
         return f"{first_line}\n{headers}\n\n{body}"
 
-    def get_response_display(self) -> str:
-        headers = "\n".join(f"{k}: {v}" for k, v in self.response_headers.items())
+    def get_response_display(self, offset: int = 0, limit: int = 64 * 1024, hex_view: bool | None = None) -> str:
+        """응답 헤더와 바디의 한 페이지(offset부터 limit 바이트)를 반환합니다."""
+        headers = "\n".join(f"{k}: {v}" for k, v in self.response_headers)
         try:
-            body = self.response_body.decode('utf-8', errors='replace')
-        except: body = "[Error] 바디를 디코딩할 수 없습니다."
+            body = self.response_body.preview(offset, limit, hex_view)
+        except Exception: body = "[Error] 바디를 디코딩할 수 없습니다."
         return f"--- HEADERS ---\n{headers}\n\n--- BODY ---\n{body}"
 
+    def release(self):
+        self.request_body.release()
+        self.response_body.release()
+
+
+def flow_data_from_flow(flow: mitmproxy.http.HTTPFlow, spools: dict | None = None) -> FlowData:
+    """HTTPFlow에서 History 표시용 메타데이터를 만듭니다.
+
+    바디는 압축 해제하지 않고(raw_content) 크기만 기록합니다. 디코딩은 행을 선택할 때 수행됩니다.
+    spools에 있는 바디(스트리밍 모드)는 spool 파일에 기록된 크기를 사용합니다.
+    """
+    spools = spools or {}
+    status = "No Response"
+    response_size = 0
+    content_type = ""
+    if flow.response:
+        status = str(flow.response.status_code)
+        response_size = spools["response"].size if "response" in spools else len(flow.response.raw_content or b"")
+        content_type = flow.response.headers.get('content-type', '')
+
+    return FlowData(
+        flow_id=flow.id,
+        method=flow.request.method,
+        url=flow.request.pretty_url,
+        path=flow.request.path,
+        http_version=flow.request.http_version,
+        status_code=status,
+        request_size=spools["request"].size if "request" in spools else len(flow.request.raw_content or b""),
+        response_size=response_size,
+        content_type=content_type,
+        replay_of=flow.metadata.get(REPLAY_SOURCE_KEY, ""),
+    )
+
+
+def submit_to_openapi(openapi_builder: OpenApiBuilder, flow: mitmproxy.http.HTTPFlow,
+                      flow_data: FlowData, spools: dict | None = None):
+    """스키마 추론에 필요한 원본 바디와 헤더 두 개만 빌더에 넘깁니다. (스트리밍된 바디는 제외)"""
+    spools = spools or {}
+
+    def schema_headers(headers: http.Headers) -> dict:
+        return {
+            'content-type': headers.get('content-type', ''),
+            'content-encoding': headers.get('content-encoding', ''),
+        }
+
+    request_body = None if "request" in spools else flow.request.raw_content
+    response_body = None
+    response_headers = {}
+    if flow.response:
+        response_body = None if "response" in spools else flow.response.raw_content
+        response_headers = schema_headers(flow.response.headers)
+    openapi_builder.submit(
+        flow_data.method, flow_data.url, flow_data.status_code,
+        request_body, schema_headers(flow.request.headers),
+        response_body, response_headers
+    )
+
+
 class PySideAddon:
-    def __init__(self, shared_queue: queue.Queue):
+    # 크기를 알 수 없어도(Content-Length 없음) 항상 스트리밍할 Content-Type 접두사
+    STREAM_CONTENT_TYPES = ('video/', 'audio/', 'text/event-stream', 'application/octet-stream')
+
+    def __init__(self, shared_queue: FlowFeed, flow_store: "FlowStore", filter_engine: FilterEngine,
+                 openapi_builder: OpenApiBuilder | None = None, large_body_threshold: int = 5 * 1024 * 1024,
+                 metrics: Metrics | None = None, websocket_queue=None,
+                 websocket_capacity: int = DEFAULT_WEBSOCKET_CAPACITY):
         self.queue = shared_queue
-        self.flows_by_id: Dict[str, mitmproxy.http.HTTPFlow] = {}
-        self.scope_regex = None
-        # 차단할 정적 파일 확장자 목록
-        self.blocked_extensions = {
-            '.js', '.css', '.png', '.jpg', '.jpeg', '.gif', '.svg', '.ico',
-            '.mp3', '.mp4', '.woff', '.woff2', '.ttf', '.eot', '.webp'
-        }
-        # 차단할 Content-Type 목록 (소문자로 비교)
-        self.blocked_content_types = {
-            'application/javascript', 'text/css', 'image/', 'video/', 'audio/',
-            'font/', 'application/font-woff'
-        }
-        self.blocked_domains = {
-            "google-analytics.com", "googletagmanager.com",
-            "content-autofill.googleapis.com",
-        }
+        # 모든 Flow는 공유 저장소(디스크 + LRU)에 보관하고 필요할 때 ID로 불러옵니다.
+        self.flow_store = flow_store
+        # 포함/제외 Scope 패턴을 host 색인으로 컴파일한 matcher (None이면 모든 요청이 Scope 안)
+        self.scope: CompiledScope | None = None
+        # 차단할 도메인/확장자/Content-Type 규칙은 컴파일된 필터 엔진이 담당합니다.
+        self.filters = filter_engine
+        # Flow가 기록될 때마다 OpenAPI 스펙을 점진적으로 갱신합니다. (추론은 빌더의 워커 스레드에서 수행)
+        self.openapi_builder = openapi_builder
+        # 이 크기(bytes)를 넘는 바디는 버퍼링하지 않고 스트리밍하며 spool 파일로 저장합니다. (0이면 끔)
+        self.large_body_threshold = large_body_threshold
+        self._spools: dict[str, dict[str, "BodySpool"]] = {}
+        # 훅 실행 시간과 Flow 처리 결과(기록/필터별 제외)를 단계별로 기록합니다.
+        self.metrics = metrics or Metrics()
+        # WebSocket 메시지는 연결별 링 버퍼에 모았다가 배치로 websocket_queue에 넣습니다. (None이면 캡처 안 함)
+        self.websocket_queue = websocket_queue
+        self.websocket_collector = WebSocketCollector(websocket_capacity)
+        # 메시지를 주입(재전송)할 수 있도록 열려 있는 WebSocket Flow를 ID로 보관합니다.
+        self.websocket_flows: dict[str, mitmproxy.http.HTTPFlow] = {}
+        self._websocket_flush_handle: asyncio.TimerHandle | None = None
 
-    def set_scope(self, pattern: str):
-        """와일드카드 패턴을 정규식으로 변환하여 저장합니다."""
-        if not pattern:
-            self.scope_regex = None
-            print("Scope 필터가 해제되었습니다.")
+    def set_large_body_threshold(self, threshold: int):
+        self.large_body_threshold = max(0, threshold)
+        if self.large_body_threshold:
+            print(f"대용량 바디 스트리밍 모드: {self.large_body_threshold:,} bytes 초과 시 스트리밍")
+        else:
+            print("대용량 바디 스트리밍 모드가 해제되었습니다.")
+
+    def _should_stream(self, headers: http.Headers) -> bool:
+        if not self.large_body_threshold:
+            return False
+        content_length = headers.get('content-length')
+        if content_length is not None:
+            try:
+                return int(content_length) > self.large_body_threshold
+            except ValueError:
+                return False
+        return headers.get('content-type', '').lower().startswith(self.STREAM_CONTENT_TYPES)
+
+    def _start_spool(self, flow: mitmproxy.http.HTTPFlow, kind: str) -> "BodySpool":
+        spool = self.flow_store.open_spool(flow.id, kind)
+        self._spools.setdefault(flow.id, {})[kind] = spool
+        return spool
+
+    def _discard_spools(self, flow: mitmproxy.http.HTTPFlow):
+        for spool in self._spools.pop(flow.id, {}).values():
+            self.flow_store.discard_spool(spool)
+
+    def _in_scope(self, flow: mitmproxy.http.HTTPFlow) -> bool:
+        request = flow.request
+        return self.scope is None or self.scope.matches(request.scheme, request.pretty_host, request.port,
+                                                       request.path)
+
+    def requestheaders(self, flow: mitmproxy.http.HTTPFlow):
+        """Scope 밖 요청은 바디를 버퍼링하지 않고 통과시키고, 대용량 요청 바디(업로드)는 스트리밍으로 전환합니다."""
+        if not self._in_scope(flow):
+            # 기록하지 않을 Flow로 표시해 두고 이후 훅에서는 바로 넘깁니다.
+            flow.metadata[SKIP_METADATA_KEY] = "scope"
+            flow.request.stream = True
             return
+        if self._should_stream(flow.request.headers):
+            flow.request.stream = self._start_spool(flow, "request")
 
+    def responseheaders(self, flow: mitmproxy.http.HTTPFlow):
+        """대용량 응답 바디(다운로드, 동영상 등)는 버퍼링 없이 스트리밍하면서 디스크에 기록합니다."""
+        if SKIP_METADATA_KEY in flow.metadata:
+            flow.response.stream = True
+            return
+        if not self._should_stream(flow.response.headers):
+            return
+        content_type = flow.response.headers.get('content-type', '')
+        if content_type and self.filters.match_content_type(content_type):
+            # History에 남지 않을 Flow는 spool 없이 그대로 통과시킵니다.
+            flow.response.stream = True
+            return
+        flow.response.stream = self._start_spool(flow, "response")
+
+    def error(self, flow: mitmproxy.http.HTTPFlow):
+        self._discard_spools(flow)
+
+    def set_scope(self, pattern: str):
+        """포함/제외 와일드카드 패턴 목록을 컴파일하여 저장합니다. (공백/쉼표 구분, 제외는 '-' 접두사)"""
         try:
-            # 와일드카드(*)를 정규식(.*)으로 변환하고, 다른 특수문자는 escape 처리
-            regex_pattern = re.escape(pattern).replace('\\*', '.*')
-            self.scope_regex = re.compile(f"^{regex_pattern}$")
-            print(f"Scope 필터가 설정되었습니다: {pattern}")
-        except re.error as e:
+            scope = CompiledScope(pattern)
+        except (ValueError, re.error) as e:
             print(f"잘못된 Scope 패턴입니다: {e}")
-            self.scope_regex = None
+            self.scope = None
+            return
+        if not scope:
+            self.scope = None
+            print("Scope 필터가 해제되었습니다.")
+            return
+        self.scope = scope
+        print(f"Scope 필터가 설정되었습니다: 포함 {len(scope.includes)}개, 제외 {len(scope.excludes)}개")
 
     def request(self, flow: mitmproxy.http.HTTPFlow):
-        """요청 단계에서 차단할 도메인을 필터링합니다."""
+        """요청 단계에서 Scope를 판정하고 차단할 도메인을 필터링합니다."""
+        started = time.perf_counter()
+        # requestheaders를 거치지 않는 요청(리플레이 등)도 있으므로 여기서도 확인합니다.
+        if SKIP_METADATA_KEY not in flow.metadata and not self._in_scope(flow):
+            flow.metadata[SKIP_METADATA_KEY] = "scope"
         # flow.request.host는 'www.google-analytics.com'과 같은 형태입니다.
-        for domain in self.blocked_domains:
-            if domain in flow.request.host:
-                flow.kill() # 요청을 즉시 중단시킵니다.
-                return
+        if self.filters.match_domain(flow.request.host):
+            flow.kill() # 요청을 즉시 중단시킵니다.
+            self.metrics.flows.inc("blocked_domain")
+        self.metrics.request_hook.observe(time.perf_counter() - started)
 
-    def response(self, flow: mitmproxy.http.HTTPFlow):
-        # Scope 필터 확인
-        if self.scope_regex and not self.scope_regex.match(flow.request.pretty_url):
-            return # Scope에 맞지 않으면 무시
+    def _skip_reason(self, flow: mitmproxy.http.HTTPFlow) -> str | None:
+        """History에 기록하지 않을 Flow면 걸린 필터 종류를, 기록할 Flow면 None을 반환합니다."""
+        # Scope 필터 확인 (요청 단계에서 이미 판정해 둔 결과)
+        if SKIP_METADATA_KEY in flow.metadata:
+            return flow.metadata[SKIP_METADATA_KEY] # Scope에 맞지 않으면 무시
 
         # 정적 파일 확장자 필터 확인
-        parsed_path = urlparse(flow.request.path).path.lower()
-        _, extension = os.path.splitext(parsed_path)
-        if extension in self.blocked_extensions:
-            return # 차단 목록에 있는 확장자면 무시
+        if self.filters.match_extension(flow.request.path):
+            return "extension" # 차단 목록에 있는 확장자면 무시
 
-        # Content-Type 헤더 필터 확인
+        # Content-Type 헤더 필터 확인 ('image/'와 같은 접두사 규칙 포함)
         if flow.response and 'content-type' in flow.response.headers:
-            content_type = flow.response.headers['content-type'].lower().split(';')[0]
-            for blocked_type in self.blocked_content_types:
-                # 'image/'와 같이 부분 일치를 허용하기 위해 startswith 사용
-                if content_type.startswith(blocked_type):
-                    return # 차단 목록에 있는 Content-Type이면 무시
-
-        status = "No Response"
-        response_headers = {}
-        response_body = b""
-        if flow.response:
-            status = str(flow.response.status_code)
-            response_headers = dict(flow.response.headers)
-            response_body = flow.response.content or b""
-
-        self.flows_by_id[flow.id] = flow
-        flow_data = FlowData(
-            flow_id=flow.id,
-            method=flow.request.method,
-            url=flow.request.pretty_url,
-            path=flow.request.path,
-            http_version=flow.request.http_version,
-            status_code=status,
-            request_headers=dict(flow.request.headers),
-            request_body=flow.request.content or b"",
-            response_headers=response_headers,
-            response_body=response_body
-        )
-        
+            if self.filters.match_content_type(flow.response.headers['content-type']):
+                return "content_type" # 차단 목록에 있는 Content-Type이면 무시
+        return None
+
+    def response(self, flow: mitmproxy.http.HTTPFlow):
+        started = time.perf_counter()
+        try:
+            self._record_response(flow)
+        finally:
+            self.metrics.response_hook.observe(time.perf_counter() - started)
+        if flow.is_replay == "request" and flow.response and flow.response.timestamp_end:
+            # 단건 리플레이(replay.client)의 왕복 시간: 요청 시작부터 응답 수신 완료까지
+            self.metrics.replay.observe(
+                flow.response.timestamp_end - flow.request.timestamp_start, "proxy")
+
+    def _record_response(self, flow: mitmproxy.http.HTTPFlow):
+        skip_reason = self._skip_reason(flow)
+        self.metrics.flows.inc(skip_reason or "recorded")
+        if skip_reason:
+            self._discard_spools(flow)
+            return
+        spools = self._spools.pop(flow.id, {})
+
+        flow_data = flow_data_from_flow(flow, spools)
+        self.flow_store.add(flow_data, flow, spools)
+
+        if self.openapi_builder is not None:
+            submit_to_openapi(self.openapi_builder, flow, flow_data, spools)
+
         try:
             self.queue.put(flow_data)
         except Exception as e:
             print(f"큐에 데이터 넣기 오류: {e}")
 
+    def websocket_start(self, flow: mitmproxy.http.HTTPFlow):
+        if self.websocket_queue is None or SKIP_METADATA_KEY in flow.metadata:
+            return
+        self.websocket_flows[flow.id] = flow
+        self.websocket_collector.open(flow.id, flow.request.pretty_url, time.time())
+        self._schedule_websocket_flush()
+
+    def websocket_message(self, flow: mitmproxy.http.HTTPFlow):
+        """마지막 메시지를 링 버퍼로 옮기고, mitmproxy가 Flow에 쌓아 두는 메시지 목록은 비웁니다."""
+        messages = flow.websocket.messages
+        if flow.id in self.websocket_flows:
+            message = messages[-1]
+            self.websocket_collector.add(flow.id, message.from_client, message.is_text, message.content,
+                                         message.timestamp, message.injected)
+            self.metrics.websocket_messages.inc("client" if message.from_client else "server")
+            self._schedule_websocket_flush()
+        # 연결이 열려 있는 동안 모든 메시지가 Flow에 남으므로, 오래 열린 연결도 메모리가 늘지 않게 합니다.
+        messages.clear()
+
+    def websocket_end(self, flow: mitmproxy.http.HTTPFlow):
+        if self.websocket_flows.pop(flow.id, None) is None:
+            return
+        websocket = flow.websocket
+        self.websocket_collector.close(flow.id, time.time(), websocket.close_code, websocket.close_reason or "")
+        self._schedule_websocket_flush()
+
+    def set_websocket_capacity(self, capacity: int):
+        self.websocket_collector.set_capacity(capacity)
+        print(f"WebSocket 링 버퍼 크기: 연결당 {self.websocket_collector.capacity:,}개")
+
+    def _schedule_websocket_flush(self):
+        """메시지마다 큐에 넣지 않고 WEBSOCKET_FLUSH_INTERVAL 동안 모아 배치 하나로 보냅니다."""
+        if self._websocket_flush_handle is not None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # 이벤트 루프 밖(스크립트에서 직접 호출)이면 바로 보냅니다.
+            self.flush_websocket()
+            return
+        self._websocket_flush_handle = loop.call_later(WEBSOCKET_FLUSH_INTERVAL, self.flush_websocket)
+
+    def flush_websocket(self):
+        self._websocket_flush_handle = None
+        batch = self.websocket_collector.flush()
+        if batch is None or self.websocket_queue is None:
+            return
+        try:
+            self.websocket_queue.put(batch)
+        except Exception as e:
+            print(f"WebSocket 큐에 데이터 넣기 오류: {e}")
+
     def get_flow_by_id(self, flow_id: str) -> mitmproxy.http.HTTPFlow | None:
-        return self.flows_by_id.get(flow_id)
+        return self.flow_store.get_flow(flow_id)
+
+class ProxyEngine:
+    """mitmproxy 마스터와 명령 처리 루프를 하나의 asyncio 루프에서 실행하는 프록시 코어입니다.
+
+    Qt에 의존하지 않으므로 GUI에서는 MitmThread로 백그라운드 스레드에서, 별도 프로세스나 헤드리스
+    데몬에서는 main_async()/run()을 직접 실행합니다. flow_log=False면 Flow마다 콘솔에 찍는 로그를 끕니다.
+    """
 
-class MitmThread(QThread):
-    def __init__(self, shared_queue: queue.Queue, command_queue: queue.Queue, browser_command_queue: queue.Queue | None = None):
-        super().__init__()
+    def __init__(self, shared_queue: FlowFeed, command_queue: AsyncChannel, flow_store: "FlowStore", filter_engine: FilterEngine, openapi_builder: OpenApiBuilder | None = None, browser_command_queue: AsyncChannel | None = None, listen_port: int = 8080, metrics: Metrics | None = None, flow_log: bool = True, websocket_queue=None):
         self.shared_queue = shared_queue
+        self.listen_port = listen_port
         self.command_queue = command_queue
         self.browser_command_queue = browser_command_queue
+        self.flow_log = flow_log
         self.master = None 
-        self.addon = PySideAddon(self.shared_queue)
+        self.bulk_jobs: dict[str, asyncio.Task] = {}
+        self.addon = PySideAddon(self.shared_queue, flow_store, filter_engine, openapi_builder, metrics=metrics,
+                                 websocket_queue=websocket_queue)
 
-    async def poll_command_queue(self):
-        print("명령 큐 폴링 시작...")
+    async def process_commands(self):
+        """GUI에서 보낸 명령을 채널에서 받는 즉시 처리합니다. (폴링 없음)"""
+        print("명령 채널 대기 시작...")
+        self.command_queue.bind()
         while True:
+            command = await self.command_queue.get()
             try:
-                command = self.command_queue.get_nowait()
-                
                 if command[0] == 'replay':
                     flow_id, modified_request_text = command[1], command[2]
                     print(f"명령 수신: Replay (Flow ID: {flow_id})")
                     await self.replay_flow(flow_id, modified_request_text)
                 
+                elif command[0] == 'bulk_replay':
+                    job: BulkReplayJob = command[1]
+                    self.start_bulk_replay(job)
+
+                elif command[0] == 'bulk_replay_stop':
+                    task = self.bulk_jobs.get(command[1])
+                    if task:
+                        task.cancel()
+
                 elif command[0] == 'set_scope':
                     scope_pattern = command[1]
                     self.addon.set_scope(scope_pattern)
+                    self.apply_scope_passthrough()
+
+                elif command[0] == 'set_large_body_threshold':
+                    self.addon.set_large_body_threshold(command[1])
+
+                elif command[0] == 'websocket_send':
+                    flow_id, to_client, content, is_text = command[1:5]
+                    self.send_websocket_message(flow_id, to_client, content, is_text)
+
+                elif command[0] == 'set_websocket_capacity':
+                    self.addon.set_websocket_capacity(command[1])
+
+                elif command[0] == 'set_filters':
+                    rules: FilterRules = command[1]
+                    self.addon.filters.load_rules(rules)
+
+                elif command[0] == 'shutdown':
+                    self.shutdown()
 
-                elif command[0] == 'replay_in_browser':
-                    if self.browser_command_queue:
-                        request_text = command[1]
-                        self.browser_command_queue.put(('replay', request_text))
-                    else:
-                        print("오류: 브라우저 명령 큐가 설정되지 않았습니다.")
-                
                 elif command[0] == 'render_in_browser':
                     if self.browser_command_queue:
                         response_body = command[1]
                         self.browser_command_queue.put(('render', response_body))
                     else:
                         print("오류: 브라우저 명령 큐가 설정되지 않았습니다.")
-                    
-            except queue.Empty:
-                await asyncio.sleep(0.1)
+
             except Exception as e:
-                print(f"명령 큐 처리 중 오류: {e}")
+                print(f"명령 처리 중 오류: {e}")
+
+    def start_bulk_replay(self, job: BulkReplayJob):
+        """Bulk Replay 작업을 프록시 이벤트 루프에서 백그라운드 태스크로 실행합니다."""
+        job.proxy_port = self.master.options.listen_port
+        task = asyncio.create_task(job.run())
+        self.bulk_jobs[job.job_id] = task
+        task.add_done_callback(lambda _: self.bulk_jobs.pop(job.job_id, None))
 
     async def replay_flow(self, flow_id: str, request_text: str):
         if not self.addon or not self.master:
@@ -206,6 +570,8 @@ class MitmThread(QThread):
                                          value.strip().encode('utf-8'))) 
             
             new_flow = original_flow.copy()
+            # 응답을 원본과 비교할 수 있도록 어떤 Flow의 리플레이인지 남깁니다.
+            new_flow.metadata[REPLAY_SOURCE_KEY] = flow_id
             
             new_flow.request.method = method
             new_flow.request.path = path
@@ -222,35 +588,87 @@ class MitmThread(QThread):
             import traceback
             traceback.print_exc()
 
+    def send_websocket_message(self, flow_id: str, to_client: bool, content: bytes, is_text: bool):
+        """열려 있는 WebSocket 연결에 메시지를 주입합니다. (캡처한 메시지의 재전송/수정 전송)"""
+        flow = self.addon.websocket_flows.get(flow_id)
+        if flow is None or not flow.live:
+            print(f"오류: {flow_id}는 열려 있는 WebSocket 연결이 아닙니다.")
+            return
+        direction = "클라이언트" if to_client else "서버"
+        print(f"WebSocket 메시지 주입: {direction}로 {len(content):,} bytes (Flow ID: {flow_id})")
+        self.master.commands.call("inject.websocket", flow, to_client, content, is_text)
+
+    def apply_scope_passthrough(self):
+        """Scope 밖 host의 TLS 연결은 가로채지 않고 그대로 통과시키도록 mitmproxy 옵션을 맞춥니다.
+
+        새로 맺는 연결부터 적용되며, 이미 열린 연결은 요청 단계의 Scope 검사로 걸러집니다.
+        """
+        if self.master is None:
+            return
+        scope = self.addon.scope
+        passthrough = scope.passthrough_options() if scope else {"allow_hosts": [], "ignore_hosts": []}
+        self.master.options.update(**passthrough)
+        if scope:
+            print(f"TLS 통과 설정: 허용 host {len(passthrough['allow_hosts'])}개, "
+                  f"제외 host {len(passthrough['ignore_hosts'])}개")
+
     async def main_async(self):
+        # mitmproxy 마스터(애드온 전체 포함)는 프록시 스레드에서 불러옵니다. (GUI 시작을 막지 않음)
+        from mitmproxy.tools.dump import DumpMaster
+        from mitmproxy import options
+
         # 옵션 설정
         opts = options.Options()
-        opts.listen_port = 8080
+        opts.listen_port = self.listen_port
 
-        self.master = DumpMaster(opts)
+        self.master = DumpMaster(opts, with_dumper=self.flow_log)
         self.master.addons.add(self.addon)
+        self.apply_scope_passthrough()
         
-        print("mitmproxy 마스터 및 명령 큐 폴링 동시 시작...")
+        print("mitmproxy 마스터 및 명령 채널 동시 시작...")
         
+        command_task = asyncio.create_task(self.process_commands())
         try:
-            await asyncio.gather(
-                self.master.run(),
-                self.poll_command_queue()
-            )
+            await self.master.run()
         except Exception as e:
-            print(f"asyncio.gather 실행 중 예외: {e}")
+            print(f"mitmproxy 마스터 실행 중 예외: {e}")
+        finally:
+            command_task.cancel()
+            self.command_queue.unbind()
             
-        print("mitmproxy 마스터 및 폴링 종료됨.")
+        print("mitmproxy 마스터 및 명령 채널 종료됨.")
 
     def run(self):
         try:
             asyncio.run(self.main_async())
         except Exception as e:
-            print(f"mitmproxy 스레드 종료됨: {e}")
+            print(f"mitmproxy 엔진 종료됨: {e}")
         finally:
-            print("MitmThread.run() 완전 종료.")
+            print("ProxyEngine.run() 완전 종료.")
 
     def shutdown(self):
         print("mitmproxy 종료 중...")
         if self.master:
-            self.master.shutdown()
\ No newline at end of file
+            self.master.shutdown()
+
+
+class MitmThread(threading.Thread):
+    """GUI 프로세스에서 ProxyEngine을 백그라운드 스레드로 실행합니다. (인자는 ProxyEngine과 같음)"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(name="MitmThread", daemon=True)
+        self.engine = ProxyEngine(*args, **kwargs)
+
+    @property
+    def addon(self) -> PySideAddon:
+        return self.engine.addon
+
+    @property
+    def master(self) -> "DumpMaster | None":
+        return self.engine.master
+
+    def run(self):
+        self.engine.run()
+
+    def shutdown(self):
+        self.engine.shutdown()
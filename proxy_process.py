@@ -0,0 +1,255 @@
+import dataclasses
+import multiprocessing
+import pickle
+import struct
+import threading
+import time
+
+from bulk_replay import BulkReplaySummary
+from channel import AsyncChannel, FlowFeed
+from filters import FilterEngine
+from flow_store import FlowStore
+from metrics import Metrics
+from openapi import OpenApiBuilder
+from proxy import FlowData, ProxyEngine
+
+# 프록시 프로세스 -> GUI 메시지 종류 (첫 바이트)
+MSG_FLOWS = b"F"
+MSG_EVENT = b"E"
+
+_FLOW_STRING_FIELDS = ("flow_id", "method", "url", "path", "http_version", "status_code", "content_type",
+                       "replay_of")
+# FlowData 한 건의 고정 길이 헤더: request_size, response_size, 문자열 필드마다의 바이트 길이
+_FLOW_HEADER = struct.Struct(f"<QQ{len(_FLOW_STRING_FIELDS)}I")
+# 한 메시지에 넣는 최대 Flow 수
+MAX_FLOWS_PER_MESSAGE = 1000
+# 프록시 쪽에서 Flow를 모아 보내는 간격 (초). 트래픽이 몰릴 때 메시지 수를 줄입니다.
+FLUSH_INTERVAL = 0.002
+STATS_INTERVAL = 1.0
+
+
+def encode_flows(flows: list[FlowData]) -> bytes:
+    """FlowData 목록을 길이 접두 바이너리로 직렬화합니다. (pickle보다 작고 빠름)"""
+    parts = []
+    for flow_data in flows:
+        strings = [getattr(flow_data, name).encode("utf-8", "surrogateescape") for name in _FLOW_STRING_FIELDS]
+        parts.append(_FLOW_HEADER.pack(flow_data.request_size, flow_data.response_size, *map(len, strings)))
+        parts.extend(strings)
+    return b"".join(parts)
+
+
+def decode_flows(data: bytes | memoryview) -> list[FlowData]:
+    flows = []
+    view = memoryview(data)
+    offset = 0
+    while offset < len(view):
+        request_size, response_size, *lengths = _FLOW_HEADER.unpack_from(view, offset)
+        offset += _FLOW_HEADER.size
+        values = {}
+        for name, length in zip(_FLOW_STRING_FIELDS, lengths):
+            values[name] = str(view[offset:offset + length], "utf-8", "surrogateescape")
+            offset += length
+        flows.append(FlowData(request_size=request_size, response_size=response_size, **values))
+    return flows
+
+
+class PipeSender:
+    """프록시 프로세스에서 GUI로 Flow와 이벤트를 보내는 송신기입니다.
+
+    put()은 FlowFeed와 같은 인터페이스라 PySideAddon의 큐로 그대로 쓸 수 있고, 실제 전송은
+    전용 스레드가 FLUSH_INTERVAL마다 모아서 하므로 프록시 이벤트 루프가 파이프 쓰기로 막히지 않습니다.
+    """
+
+    def __init__(self, conn):
+        self._conn = conn
+        self._lock = threading.Lock()
+        self._flows: list[FlowData] = []
+        self._events: list[tuple] = []
+        self._wake = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="PipeSender", daemon=True)
+        self._thread.start()
+
+    def put(self, flow_data: FlowData):
+        with self._lock:
+            self._flows.append(flow_data)
+        self._wake.set()
+
+    def send_event(self, *event):
+        with self._lock:
+            self._events.append(event)
+        self._wake.set()
+
+    def _run(self):
+        while True:
+            self._wake.wait()
+            time.sleep(FLUSH_INTERVAL)
+            with self._lock:
+                self._wake.clear()
+                flows, self._flows = self._flows, []
+                events, self._events = self._events, []
+            try:
+                for start in range(0, len(flows), MAX_FLOWS_PER_MESSAGE):
+                    self._conn.send_bytes(MSG_FLOWS + encode_flows(flows[start:start + MAX_FLOWS_PER_MESSAGE]))
+                for event in events:
+                    self._conn.send_bytes(MSG_EVENT + pickle.dumps(event, pickle.HIGHEST_PROTOCOL))
+            except (BrokenPipeError, OSError):
+                return
+
+
+class _ForwardingQueue:
+    """프록시 프로세스에서 받은 put()을 GUI 프로세스의 이벤트로 넘깁니다. (브라우저 명령, Bulk Replay 결과, WebSocket 배치)"""
+
+    def __init__(self, sender: PipeSender, kind: str, key: str | None = None):
+        self._sender = sender
+        self._kind = kind
+        self._key = key
+
+    def put(self, item):
+        self._sender.send_event(self._kind, self._key, item)
+
+
+class IpcCommandChannel:
+    """프록시가 별도 프로세스일 때 AsyncChannel 대신 쓰는 GUI -> 프록시 명령 채널입니다.
+
+    put() 인터페이스는 같고, 명령 튜플은 pickle로 파이프를 통해 전달됩니다. Bulk Replay 작업의
+    결과 피드처럼 프로세스를 넘을 수 없는 객체는 여기에 남겨 두고 결과 이벤트를 받아 전달합니다.
+    """
+
+    def __init__(self, context=None):
+        context = context or multiprocessing.get_context("spawn")
+        self.reader, self._writer = context.Pipe(duplex=False)
+        self._lock = threading.Lock()
+        self.bulk_feeds: dict[str, FlowFeed] = {}
+
+    def put(self, command: tuple):
+        if command[0] == 'bulk_replay':
+            job = command[1]
+            self.bulk_feeds[job.job_id] = job.results
+            command = ('bulk_replay', dataclasses.replace(job, results=None))
+        with self._lock:
+            self._writer.send(command)
+
+
+def _receive_commands(conn, command_queue: AsyncChannel, sender: PipeSender):
+    """GUI에서 온 명령을 프록시 프로세스의 AsyncChannel로 옮깁니다."""
+    while True:
+        try:
+            command = conn.recv()
+        except (EOFError, OSError):
+            # GUI 프로세스가 사라졌으면 프록시도 종료합니다.
+            command_queue.put(('shutdown',))
+            return
+        if command[0] == 'bulk_replay':
+            command[1].results = _ForwardingQueue(sender, 'bulk', command[1].job_id)
+        command_queue.put(command)
+
+
+def _report_stats(filter_engine: FilterEngine, metrics: Metrics, sender: PipeSender):
+    while True:
+        time.sleep(STATS_INTERVAL)
+        sender.send_event('filter_stats', None, filter_engine.stats())
+        sender.send_event('metrics', None, metrics.snapshot())
+
+
+def run_proxy_process(event_conn, command_conn, db_path: str, listen_port: int):
+    """프록시 프로세스의 진입점입니다. 같은 SQLite 저장소 파일을 열어 Flow를 직접 기록합니다."""
+    sender = PipeSender(event_conn)
+    flow_store = FlowStore(db_path)
+    filter_engine = FilterEngine()
+    command_queue = AsyncChannel()
+    metrics = Metrics()
+    # OpenAPI 빌더는 GUI 프로세스에 있으므로 여기서는 넘기지 않습니다. (GUI가 저장소에서 읽어 반영)
+    engine = ProxyEngine(sender, command_queue, flow_store, filter_engine, None,
+                         _ForwardingQueue(sender, 'browser'), listen_port, metrics,
+                         websocket_queue=_ForwardingQueue(sender, 'websocket'))
+    threading.Thread(target=_receive_commands, args=(command_conn, command_queue, sender),
+                     name="CommandReceiver", daemon=True).start()
+    threading.Thread(target=_report_stats, args=(filter_engine, metrics, sender),
+                     name="StatsReporter", daemon=True).start()
+    try:
+        engine.run()
+    finally:
+        flow_store.close()
+
+
+class ProxyProcess:
+    """프록시 코어(PySideAddon + 명령 처리)를 별도 프로세스에서 실행합니다.
+
+    MitmThread와 같은 start()/shutdown() 인터페이스를 가지며, GUI 쪽에서는 수신 스레드가
+    Flow 메타데이터를 shared_queue로, 브라우저 명령과 Bulk Replay 결과, WebSocket 배치를 각각의 큐로 넘깁니다.
+    TLS 가로채기와 Flow 저장이 GUI와 GIL을 다투지 않게 됩니다.
+    """
+
+    def __init__(self, shared_queue: FlowFeed, command_queue: IpcCommandChannel, flow_store: FlowStore,
+                 filter_engine: FilterEngine, openapi_builder: OpenApiBuilder | None = None,
+                 browser_command_queue: AsyncChannel | None = None, listen_port: int = 8080,
+                 metrics: Metrics | None = None, websocket_queue: FlowFeed | None = None):
+        self.shared_queue = shared_queue
+        self.command_queue = command_queue
+        self.flow_store = flow_store
+        self.filter_engine = filter_engine
+        self.openapi_builder = openapi_builder
+        self.browser_command_queue = browser_command_queue
+        self.websocket_queue = websocket_queue
+        # 프록시 훅 메트릭은 프록시 프로세스에서 기록되고, 주기적으로 받은 스냅샷을 여기에 합칩니다.
+        self.metrics = metrics
+
+        context = multiprocessing.get_context("spawn")
+        self._event_conn, child_event_conn = context.Pipe(duplex=False)
+        self.process = context.Process(
+            target=run_proxy_process,
+            args=(child_event_conn, command_queue.reader, flow_store.db_path, listen_port),
+            name="PongpSuiteProxy", daemon=True)
+        self._receiver = threading.Thread(target=self._receive_events, name="ProxyEventReceiver", daemon=True)
+
+    def start(self):
+        self.process.start()
+        self._receiver.start()
+
+    def _receive_events(self):
+        while True:
+            try:
+                data = self._event_conn.recv_bytes()
+            except (EOFError, OSError):
+                print("프록시 프로세스와의 연결이 끊어졌습니다.")
+                return
+            kind, payload = data[:1], memoryview(data)[1:]
+            if kind == MSG_FLOWS:
+                for flow_data in decode_flows(payload):
+                    if self.openapi_builder is not None:
+                        self.openapi_builder.submit_stored(self.flow_store, flow_data)
+                    self.shared_queue.put(flow_data)
+            elif kind == MSG_EVENT:
+                self._handle_event(*pickle.loads(payload))
+
+    def _handle_event(self, kind: str, key: str | None, item):
+        if kind == 'filter_stats':
+            self.filter_engine.remote_stats = item
+        elif kind == 'metrics':
+            if self.metrics is not None:
+                self.metrics.remote_snapshot = item
+        elif kind == 'browser':
+            if self.browser_command_queue:
+                self.browser_command_queue.put(item)
+            else:
+                print("오류: 브라우저 명령 큐가 설정되지 않았습니다.")
+        elif kind == 'websocket':
+            if self.websocket_queue is not None:
+                self.websocket_queue.put(item)
+        elif kind == 'bulk':
+            feed = self.command_queue.bulk_feeds.get(key)
+            if feed is not None:
+                feed.put(item)
+                if isinstance(item, BulkReplaySummary):
+                    self.command_queue.bulk_feeds.pop(key, None)
+
+    def shutdown(self, timeout: float = 5.0):
+        print("mitmproxy 프로세스 종료 중...")
+        try:
+            self.command_queue.put(('shutdown',))
+        except (BrokenPipeError, OSError):
+            pass
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join(timeout)
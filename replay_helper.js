@@ -0,0 +1,50 @@
+(() => {
+    // 브라우저 리플레이용 fetch 헬퍼. add_init_script로 컨텍스트마다 한 번 설치되고,
+    // Python은 요청 목록을 한 번의 evaluate로 넘깁니다. (요청 파싱은 Python 쪽에서 끝난 상태)
+    if (window.__pongpsuiteReplay) {
+        return;
+    }
+
+    // 바디는 바이너리도 손상 없이 보내도록 base64로 받습니다.
+    const decodeBody = (encoded) => Uint8Array.from(atob(encoded), (c) => c.charCodeAt(0));
+
+    const replayOne = async (request, timeoutMs) => {
+        const started = performance.now();
+        try {
+            const options = { method: request.method, headers: request.headers, credentials: 'include' };
+            const method = request.method.toUpperCase();
+            if (method !== 'GET' && method !== 'HEAD' && request.body !== null) {
+                options.body = decodeBody(request.body);
+            }
+            if (timeoutMs > 0) {
+                options.signal = AbortSignal.timeout(timeoutMs);
+            }
+            const response = await fetch(request.url, options);
+            const buffer = await response.arrayBuffer();
+            return {
+                status: response.status,
+                headers: [...response.headers.entries()],
+                length: buffer.byteLength,
+                duration_ms: performance.now() - started,
+                error: '',
+            };
+        } catch (e) {
+            return { status: null, headers: [], length: 0, duration_ms: performance.now() - started, error: String(e) };
+        }
+    };
+
+    // requests: [{method, url, headers, body(base64)}], 동시에 최대 concurrency개까지 보냅니다.
+    window.__pongpsuiteReplay = async ([requests, concurrency, timeoutMs]) => {
+        const results = new Array(requests.length);
+        let next = 0;
+        const worker = async () => {
+            while (next < requests.length) {
+                const index = next++;
+                results[index] = await replayOne(requests[index], timeoutMs);
+            }
+        };
+        const workers = Math.max(1, Math.min(concurrency, requests.length));
+        await Promise.all(Array.from({ length: workers }, worker));
+        return results;
+    };
+})();
@@ -0,0 +1,419 @@
+import difflib
+import json
+import re
+import threading
+from bisect import bisect_left
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from proxy import FlowDetails
+
+# 한 줄이 이보다 길면(압축된 JSON/HTML 등) 구분자 뒤에서 잘라 여러 조각으로 비교합니다.
+MAX_CHUNK_LENGTH = 256
+# 고유한 기준 줄이 없는 구간에서 difflib로 비교할 최대 크기 (양쪽 길이의 곱). 넘으면 통째로 교체로 봅니다.
+MAX_FALLBACK_COST = 4_000_000
+# 출력에 남기는 최대 줄 수와 JSON 변경 항목 수
+MAX_OUTPUT_LINES = 20000
+MAX_JSON_CHANGES = 5000
+# JSON 구조 비교를 시도하는 최대 바디 크기 (전체를 파싱해야 함)
+JSON_DIFF_MAX_SIZE = 32 * 1024 * 1024
+DIFF_CONTEXT_LINES = 3
+
+# 긴 줄을 나누는 후보 위치 (구분자 바로 뒤)
+_CHUNK_BOUNDARY = re.compile(r"(?<=[>;,}\]])")
+# 후보 조각의 해시가 이 마스크와 겹치지 않을 때만 자릅니다. (평균 8조각마다 한 번)
+_CHUNK_CUT_MASK = 7
+
+Opcode = tuple[str, int, int, int, int]
+
+
+def split_chunks(text: str) -> list[str]:
+    """텍스트를 줄 단위로 나누고, 너무 긴 줄은 구분자 뒤에서 다시 나눕니다.
+
+    자를지 말지는 조각 자신의 내용(해시)으로 정하므로, 중간에 글자가 바뀌거나 끼어들어도 그 뒤의
+    자르는 위치는 양쪽에서 같아져 비교가 다시 맞춰집니다. (content-defined chunking)
+    """
+    chunks = []
+    for line in text.splitlines():
+        if len(line) <= MAX_CHUNK_LENGTH:
+            chunks.append(line)
+            continue
+        pieces = []
+        size = 0
+        for part in _CHUNK_BOUNDARY.split(line):
+            pieces.append(part)
+            size += len(part)
+            if not hash(part) & _CHUNK_CUT_MASK or size >= MAX_CHUNK_LENGTH * 8:
+                chunks.append("".join(pieces))
+                pieces = []
+                size = 0
+        if pieces:
+            chunks.append("".join(pieces))
+    return chunks
+
+
+def _hash_lines(a: list[str], b: list[str]) -> tuple[list[int], list[int]]:
+    """같은 줄에 같은 정수 ID를 붙입니다. 이후 비교는 문자열 대신 정수로 합니다."""
+    ids: dict[str, int] = {}
+    a_ids = [ids.setdefault(line, len(ids)) for line in a]
+    b_ids = [ids.setdefault(line, len(ids)) for line in b]
+    return a_ids, b_ids
+
+
+def _unique_anchors(a: list[int], a_lo: int, a_hi: int, b: list[int], b_lo: int, b_hi: int) -> list[tuple[int, int]]:
+    """양쪽 구간에서 한 번씩만 나오는 줄들 중 순서가 맞는 가장 긴 목록을 찾습니다. (patience diff)"""
+    counts: dict[int, list[int]] = {}
+    for i in range(a_lo, a_hi):
+        entry = counts.get(a[i])
+        if entry is None:
+            counts[a[i]] = [1, i, 0, -1]
+        else:
+            entry[0] += 1
+    for j in range(b_lo, b_hi):
+        entry = counts.get(b[j])
+        if entry is not None:
+            entry[2] += 1
+            entry[3] = j
+    pairs = sorted((entry[1], entry[3]) for entry in counts.values() if entry[0] == 1 and entry[2] == 1)
+    if not pairs:
+        return []
+
+    # b 쪽 위치의 최장 증가 부분 수열 (O(n log n))
+    tails: list[int] = []
+    tail_index: list[int] = []
+    previous = [-1] * len(pairs)
+    for index, (_, j) in enumerate(pairs):
+        position = bisect_left(tails, j)
+        if position == len(tails):
+            tails.append(j)
+            tail_index.append(index)
+        else:
+            tails[position] = j
+            tail_index[position] = index
+        previous[index] = tail_index[position - 1] if position else -1
+    anchors = []
+    index = tail_index[-1]
+    while index >= 0:
+        anchors.append(pairs[index])
+        index = previous[index]
+    anchors.reverse()
+    return anchors
+
+
+def _diff_range(a: list[int], a_lo: int, a_hi: int, b: list[int], b_lo: int, b_hi: int, out: list[Opcode]):
+    # 앞뒤로 같은 부분을 먼저 걷어냅니다.
+    start_a, start_b = a_lo, b_lo
+    while a_lo < a_hi and b_lo < b_hi and a[a_lo] == b[b_lo]:
+        a_lo += 1
+        b_lo += 1
+    if a_lo > start_a:
+        out.append(("equal", start_a, a_lo, start_b, b_lo))
+    end_a, end_b = a_hi, b_hi
+    while a_hi > a_lo and b_hi > b_lo and a[a_hi - 1] == b[b_hi - 1]:
+        a_hi -= 1
+        b_hi -= 1
+
+    if a_lo == a_hi or b_lo == b_hi:
+        if a_lo < a_hi:
+            out.append(("delete", a_lo, a_hi, b_lo, b_lo))
+        elif b_lo < b_hi:
+            out.append(("insert", a_lo, a_lo, b_lo, b_hi))
+    else:
+        anchors = _unique_anchors(a, a_lo, a_hi, b, b_lo, b_hi)
+        if anchors:
+            # 고유한 줄을 기준으로 구간을 나눠 각각 다시 비교합니다.
+            i, j = a_lo, b_lo
+            for anchor_a, anchor_b in anchors:
+                _diff_range(a, i, anchor_a, b, j, anchor_b, out)
+                out.append(("equal", anchor_a, anchor_a + 1, anchor_b, anchor_b + 1))
+                i, j = anchor_a + 1, anchor_b + 1
+            _diff_range(a, i, a_hi, b, j, b_hi, out)
+        elif (a_hi - a_lo) * (b_hi - b_lo) <= MAX_FALLBACK_COST:
+            matcher = difflib.SequenceMatcher(None, a[a_lo:a_hi], b[b_lo:b_hi], autojunk=False)
+            for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+                out.append((tag, a_lo + i1, a_lo + i2, b_lo + j1, b_lo + j2))
+        else:
+            out.append(("replace", a_lo, a_hi, b_lo, b_hi))
+
+    if a_hi < end_a:
+        out.append(("equal", a_hi, end_a, b_hi, end_b))
+
+
+def diff_opcodes(a: list[str], b: list[str]) -> list[Opcode]:
+    """두 줄 목록의 difflib 형식 opcode를 만듭니다.
+
+    줄을 정수 ID로 바꾼 뒤 앞뒤 공통부분 제거 → 고유한 줄 기준 분할(patience) → 작은 구간만 difflib
+    순서로 비교하므로 수 MB 바디에서도 거의 선형 시간에 끝납니다.
+    """
+    a_ids, b_ids = _hash_lines(a, b)
+    raw: list[Opcode] = []
+    _diff_range(a_ids, 0, len(a_ids), b_ids, 0, len(b_ids), raw)
+    # 이웃한 같은 종류의 opcode를 합칩니다.
+    merged: list[Opcode] = []
+    for opcode in raw:
+        if opcode[1] == opcode[2] and opcode[3] == opcode[4]:
+            continue
+        if merged and merged[-1][0] == opcode[0] and merged[-1][2] == opcode[1] and merged[-1][4] == opcode[3]:
+            merged[-1] = (opcode[0], merged[-1][1], opcode[2], merged[-1][3], opcode[4])
+        else:
+            merged.append(opcode)
+    return merged
+
+
+def _grouped_opcodes(opcodes: list[Opcode], context: int) -> list[list[Opcode]]:
+    """difflib.SequenceMatcher.get_grouped_opcodes와 같은 방식으로 바뀐 부분을 context줄씩 묶습니다."""
+    if not opcodes or (len(opcodes) == 1 and opcodes[0][0] == "equal"):
+        return []
+    opcodes = list(opcodes)
+    if opcodes[0][0] == "equal":
+        _, i1, i2, j1, j2 = opcodes[0]
+        opcodes[0] = ("equal", max(i1, i2 - context), i2, max(j1, j2 - context), j2)
+    if opcodes[-1][0] == "equal":
+        _, i1, i2, j1, j2 = opcodes[-1]
+        opcodes[-1] = ("equal", i1, min(i2, i1 + context), j1, min(j2, j1 + context))
+    groups: list[list[Opcode]] = []
+    group: list[Opcode] = []
+    for tag, i1, i2, j1, j2 in opcodes:
+        # 긴 equal 구간은 앞뒤 context줄만 남기고 거기서 묶음을 나눕니다.
+        if tag == "equal" and i2 - i1 > context * 2:
+            group.append((tag, i1, min(i2, i1 + context), j1, min(j2, j1 + context)))
+            groups.append(group)
+            group = []
+            i1, j1 = max(i1, i2 - context), max(j1, j2 - context)
+        group.append((tag, i1, i2, j1, j2))
+    if group and not (len(group) == 1 and group[0][0] == "equal"):
+        groups.append(group)
+    return groups
+
+
+@dataclass
+class TextDiff:
+    """줄 단위 비교 결과입니다."""
+    opcodes: list[Opcode]
+    a_lines: list[str]
+    b_lines: list[str]
+
+    @property
+    def removed(self) -> int:
+        return sum(i2 - i1 for tag, i1, i2, _, _ in self.opcodes if tag in ("delete", "replace"))
+
+    @property
+    def added(self) -> int:
+        return sum(j2 - j1 for tag, _, _, j1, j2 in self.opcodes if tag in ("insert", "replace"))
+
+    def unified(self, context: int = DIFF_CONTEXT_LINES, hunk_headers: bool = True,
+                max_lines: int = MAX_OUTPUT_LINES) -> list[str]:
+        """바뀐 부분과 앞뒤 context줄만 unified diff 형식으로 돌려줍니다.
+
+        큰 교체 구간 하나도 max_lines를 넘지 않도록 opcode마다 남은 줄 수만큼만 잘라 넣습니다.
+        """
+        lines = []
+
+        def emit(prefix: str, source: list[str], lo: int, hi: int) -> bool:
+            room = max(0, max_lines - len(lines))
+            lines.extend(f"{prefix}{line}" for line in source[lo:min(hi, lo + room)])
+            return hi - lo <= room
+
+        for group in _grouped_opcodes(self.opcodes, context):
+            first, last = group[0], group[-1]
+            if len(lines) >= max_lines:
+                lines.append(f"... (출력 줄 수 제한({MAX_OUTPUT_LINES:,}줄)을 넘어 생략)")
+                break
+            if hunk_headers:
+                lines.append(f"@@ -{first[1] + 1},{last[2] - first[1]} +{first[3] + 1},{last[4] - first[3]} @@")
+            for tag, i1, i2, j1, j2 in group:
+                if tag == "equal":
+                    complete = emit(" ", self.a_lines, i1, i2)
+                else:
+                    complete = emit("-", self.a_lines, i1, i2) and emit("+", self.b_lines, j1, j2)
+                if not complete:
+                    lines.append(f"... (출력 줄 수 제한({MAX_OUTPUT_LINES:,}줄)을 넘어 생략)")
+                    return lines
+        return lines
+
+
+def line_diff(a_text: str, b_text: str) -> TextDiff:
+    a_lines = split_chunks(a_text)
+    b_lines = split_chunks(b_text)
+    return TextDiff(diff_opcodes(a_lines, b_lines), a_lines, b_lines)
+
+
+@dataclass(slots=True)
+class JsonChange:
+    """JSON 값 하나의 변경입니다. kind는 added, removed, changed 중 하나입니다."""
+    path: str
+    kind: str
+    old: object = None
+    new: object = None
+
+
+def _child_path(path: str, key) -> str:
+    if isinstance(key, int):
+        return f"{path}[{key}]"
+    if re.fullmatch(r"[A-Za-z_][A-Za-z0-9_]*", key):
+        return f"{path}.{key}"
+    return f"{path}[{json.dumps(key, ensure_ascii=False)}]"
+
+
+def _element_keys(values: list) -> list[str]:
+    return [json.dumps(value, sort_keys=True, ensure_ascii=False) for value in values]
+
+
+def json_diff(a, b, path: str = "$", limit: int = MAX_JSON_CHANGES) -> list[JsonChange]:
+    """두 JSON 값을 키 경로 단위로 비교합니다. 같은 하위 트리는 == 한 번(C 구현)으로 건너뜁니다.
+
+    배열은 원소를 직렬화한 값으로 먼저 정렬 비교(diff_opcodes)해서, 중간에 원소 하나가 끼어들어도
+    뒤 원소 전체가 변경으로 보이지 않게 합니다. 추가는 리플레이 쪽 인덱스, 삭제는 원본 쪽 인덱스로
+    표시하고, 바뀐 원소는 리플레이 쪽 인덱스 경로에서 다시 비교합니다.
+    """
+    changes: list[JsonChange] = []
+    stack = [(path, a, b)]
+    while stack and len(changes) < limit:
+        path, old, new = stack.pop()
+        if old == new and type(old) is type(new):
+            continue
+        if isinstance(old, dict) and isinstance(new, dict):
+            children = []
+            for key in old:
+                if key not in new:
+                    changes.append(JsonChange(_child_path(path, key), "removed", old=old[key]))
+                else:
+                    children.append((_child_path(path, key), old[key], new[key]))
+            for key in new:
+                if key not in old:
+                    changes.append(JsonChange(_child_path(path, key), "added", new=new[key]))
+            stack.extend(reversed(children))
+        elif isinstance(old, list) and isinstance(new, list):
+            children = []
+            for tag, i1, i2, j1, j2 in diff_opcodes(_element_keys(old), _element_keys(new)):
+                if tag == "equal":
+                    continue
+                paired = min(i2 - i1, j2 - j1) if tag == "replace" else 0
+                children.extend((_child_path(path, j1 + offset), old[i1 + offset], new[j1 + offset])
+                                for offset in range(paired))
+                for index in range(i1 + paired, i2):
+                    changes.append(JsonChange(_child_path(path, index), "removed", old=old[index]))
+                for index in range(j1 + paired, j2):
+                    changes.append(JsonChange(_child_path(path, index), "added", new=new[index]))
+            stack.extend(reversed(children))
+        else:
+            changes.append(JsonChange(path, "changed", old=old, new=new))
+    return changes[:limit]
+
+
+def _short(value, limit: int = 200) -> str:
+    text = json.dumps(value, ensure_ascii=False)
+    return text if len(text) <= limit else text[:limit] + "…"
+
+
+def _try_json(content: bytes):
+    if not content or len(content) > JSON_DIFF_MAX_SIZE or content.lstrip()[:1] not in (b"{", b"["):
+        return None
+    try:
+        return json.loads(content)
+    except ValueError:
+        return None
+
+
+@dataclass
+class ResponseDiff:
+    """원본과 리플레이 응답의 비교 결과입니다. lines는 화면에 그대로 보여줄 줄 목록입니다.
+
+    줄 앞의 표시: '+' 리플레이에만 있음, '-' 원본에만 있음, '~' JSON 값 변경, '@' 위치/구역 표시
+    """
+    mode: str  # "json", "text", "binary", "identical"
+    summary: str
+    lines: list[str] = field(default_factory=list)
+
+
+def _header_lines(status: str, headers) -> list[str]:
+    # 순서만 다른 헤더는 같은 것으로 보도록 정렬해서 비교합니다.
+    return [f"Status: {status}"] + sorted(f"{name}: {value}" for name, value in headers)
+
+
+def diff_responses(original_status: str, original_headers, original_body: bytes, original_charset: str,
+                   replay_status: str, replay_headers, replay_body: bytes, replay_charset: str,
+                   structural: bool = True) -> ResponseDiff:
+    """상태/헤더는 줄 단위로, 바디는 JSON이면 키 경로 단위(structural)로, 아니면 줄 단위로 비교합니다."""
+    old_headers = _header_lines(original_status, original_headers)
+    new_headers = _header_lines(replay_status, replay_headers)
+    header_diff = TextDiff(diff_opcodes(old_headers, new_headers), old_headers, new_headers)
+    lines = []
+    if header_diff.added or header_diff.removed:
+        lines.append("@ 상태/헤더")
+        lines.extend(header_diff.unified(context=0, hunk_headers=False, max_lines=MAX_OUTPUT_LINES // 2))
+    header_summary = f"헤더 -{header_diff.removed} +{header_diff.added}"
+
+    if original_body == replay_body:
+        return ResponseDiff("identical" if not lines else "text",
+                            f"바디 동일 ({len(original_body):,} bytes), {header_summary}", lines)
+
+    if structural:
+        old_json, new_json = _try_json(original_body), _try_json(replay_body)
+        if old_json is not None and new_json is not None:
+            changes = json_diff(old_json, new_json)
+            lines.append("@ 바디 (JSON)")
+            for change in changes:
+                if change.kind == "added":
+                    lines.append(f"+ {change.path} = {_short(change.new)}")
+                elif change.kind == "removed":
+                    lines.append(f"- {change.path} = {_short(change.old)}")
+                else:
+                    lines.append(f"~ {change.path}: {_short(change.old)} → {_short(change.new)}")
+            if len(changes) >= MAX_JSON_CHANGES:
+                lines.append(f"... (변경이 {MAX_JSON_CHANGES:,}개를 넘어 생략)")
+            counts = {kind: sum(1 for change in changes if change.kind == kind)
+                      for kind in ("added", "removed", "changed")}
+            return ResponseDiff("json", f"JSON 추가 {counts['added']}, 삭제 {counts['removed']}, "
+                                        f"변경 {counts['changed']}, {header_summary}", lines)
+
+    if b"\x00" in original_body[:1024] or b"\x00" in replay_body[:1024]:
+        return ResponseDiff("binary", f"바이너리 바디 다름 ({len(original_body):,} → {len(replay_body):,} bytes), "
+                                      f"{header_summary}", lines)
+
+    text_diff = line_diff(_decode(original_body, original_charset), _decode(replay_body, replay_charset))
+    lines.append("@ 바디")
+    # 헤더 구역과 합쳐도 MAX_OUTPUT_LINES를 넘지 않도록 남은 줄 수만 씁니다.
+    lines.extend(text_diff.unified(max_lines=MAX_OUTPUT_LINES - len(lines)))
+    return ResponseDiff("text", f"바디 -{text_diff.removed} +{text_diff.added}줄, {header_summary}", lines)
+
+
+def _decode(content: bytes, charset: str) -> str:
+    try:
+        return content.decode(charset, errors="replace")
+    except LookupError:
+        return content.decode("utf-8", errors="replace")
+
+
+def diff_details(original: "FlowDetails", replay: "FlowDetails", structural: bool = True) -> ResponseDiff:
+    """저장소의 두 Flow 상세 정보(원본, 리플레이)의 응답을 비교합니다. 바디는 압축 해제 후 비교합니다."""
+    return diff_responses(
+        original.flow.status_code, original.response_headers, original.response_body.content(),
+        original.response_body.charset,
+        replay.flow.status_code, replay.response_headers, replay.response_body.content(),
+        replay.response_body.charset, structural)
+
+
+class DiffCache:
+    """(원본 ID, 리플레이 ID, structural)별 비교 결과를 최근 것부터 size개까지 보관합니다. (스레드 안전)"""
+
+    def __init__(self, size: int = 32):
+        self.size = size
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[tuple, ResponseDiff] = OrderedDict()
+
+    def get(self, key: tuple) -> ResponseDiff | None:
+        with self._lock:
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+            return result
+
+    def put(self, key: tuple, result: ResponseDiff):
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
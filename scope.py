@@ -0,0 +1,138 @@
+import re
+from dataclasses import dataclass
+
+# 제외 패턴 앞에 붙이는 표시 ("-*.cdn.example.com" 또는 "!https://example.com/logout*")
+EXCLUDE_PREFIXES = ('-', '!')
+
+
+@dataclass(frozen=True, slots=True)
+class ScopePattern:
+    """Scope 패턴 하나를 scheme/host/port/path로 나눈 결과입니다. (None이면 아무 값이나 허용)"""
+    text: str
+    scheme: str | None
+    host: str
+    port: int | None
+    path_regex: re.Pattern | None
+
+    def matches(self, scheme: str, port: int, path: str) -> bool:
+        """host가 이미 맞은 상태에서 나머지 부분을 확인합니다."""
+        if self.scheme is not None and self.scheme != scheme:
+            return False
+        if self.port is not None and self.port != port:
+            return False
+        return self.path_regex is None or self.path_regex.match(path) is not None
+
+    @property
+    def whole_host(self) -> bool:
+        """scheme/path 제한 없이 host 전체를 가리키는 패턴인지 (TLS 통과 대상으로 쓸 수 있는지)"""
+        return self.scheme is None and self.path_regex is None
+
+
+def _wildcard_regex(pattern: str) -> str:
+    return re.escape(pattern).replace('\\*', '.*')
+
+
+def parse_pattern(text: str) -> ScopePattern:
+    """'https://*.example.com/api/*', '*.example.com', 'example.com:8443' 형태의 패턴을 해석합니다.
+
+    scheme이 없으면 http/https 모두, 경로가 없거나 '/*'면 모든 경로를 허용합니다.
+    """
+    scheme = None
+    rest = text
+    if '://' in rest:
+        scheme, rest = rest.split('://', 1)
+        scheme = None if scheme in ('', '*') else scheme.lower()
+    slash = rest.find('/')
+    authority, path = (rest, '') if slash < 0 else (rest[:slash], rest[slash:])
+    host, port = authority.lower(), None
+    if re.search(r':\d+$', host):
+        host, port_text = host.rsplit(':', 1)
+        port = int(port_text)
+    if not host:
+        raise ValueError(f"host가 없는 Scope 패턴입니다: {text}")
+    path_regex = None if path in ('', '/*', '*') else re.compile(f"^{_wildcard_regex(path)}$")
+    return ScopePattern(text, scheme, host, port, path_regex)
+
+
+class _HostIndex:
+    """host로 후보 패턴을 바로 찾는 색인입니다.
+
+    - 정확한 host: dict
+    - '*.example.com': 접미사 dict (host의 라벨 수만큼만 조회)
+    - '*' 또는 그 밖의 와일드카드: 정규식 목록 (드물게 쓰이므로 순차 검사)
+    """
+
+    def __init__(self, patterns: list[ScopePattern]):
+        self.exact: dict[str, list[ScopePattern]] = {}
+        self.suffix: dict[str, list[ScopePattern]] = {}
+        self.other: list[tuple[re.Pattern, ScopePattern]] = []
+        for pattern in patterns:
+            host = pattern.host
+            if '*' not in host:
+                self.exact.setdefault(host, []).append(pattern)
+            elif host.startswith('*.') and '*' not in host[2:]:
+                self.suffix.setdefault(host[1:], []).append(pattern)
+            else:
+                self.other.append((re.compile(f"^{_wildcard_regex(host)}$"), pattern))
+
+    def candidates(self, host: str) -> list[ScopePattern]:
+        found = list(self.exact.get(host, ()))
+        dot = host.find('.')
+        while dot >= 0:
+            found.extend(self.suffix.get(host[dot:], ()))
+            dot = host.find('.', dot + 1)
+        found.extend(pattern for regex, pattern in self.other if regex.match(host))
+        return found
+
+    def __bool__(self):
+        return bool(self.exact or self.suffix or self.other)
+
+
+class CompiledScope:
+    """포함/제외 Scope 패턴 여러 개를 host 색인으로 컴파일한 matcher입니다.
+
+    포함 패턴이 없으면 제외 패턴에 걸리지 않는 모든 요청이 Scope 안입니다.
+    패턴은 공백, 쉼표, 줄바꿈으로 구분하고 제외 패턴은 '-' 또는 '!'로 시작합니다.
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+        self.includes: list[ScopePattern] = []
+        self.excludes: list[ScopePattern] = []
+        for token in re.split(r'[\s,]+', text.strip()):
+            if not token:
+                continue
+            if token.startswith(EXCLUDE_PREFIXES):
+                if token[1:]:
+                    self.excludes.append(parse_pattern(token[1:]))
+            else:
+                self.includes.append(parse_pattern(token))
+        self._include_index = _HostIndex(self.includes)
+        self._exclude_index = _HostIndex(self.excludes)
+
+    def __bool__(self):
+        return bool(self.includes or self.excludes)
+
+    def matches(self, scheme: str, host: str, port: int, path: str) -> bool:
+        """요청 하나가 Scope 안인지 확인합니다. (path는 쿼리 포함)"""
+        host = host.lower().rstrip('.')
+        if self.includes and not any(pattern.matches(scheme, port, path)
+                                     for pattern in self._include_index.candidates(host)):
+            return False
+        return not any(pattern.matches(scheme, port, path) for pattern in self._exclude_index.candidates(host))
+
+    def passthrough_options(self) -> dict[str, list[str]]:
+        """Scope 밖 host를 복호화 없이 통과시키는 mitmproxy allow_hosts/ignore_hosts 값을 만듭니다.
+
+        mitmproxy는 'host:port' 문자열(SNI, Host 헤더, 주소)에 정규식을 re.search로 적용합니다.
+        포함 패턴의 host는 allow_hosts로, host 전체를 제외하는 패턴은 ignore_hosts로 보냅니다.
+        서버 IP도 비교 대상이므로 IP 주소 패턴은 같은 IP를 쓰는 다른 host까지 가로채게 됩니다.
+        """
+        def host_regex(pattern: ScopePattern) -> str:
+            port = str(pattern.port) if pattern.port is not None else r'\d+'
+            return f"^{_wildcard_regex(pattern.host)}:{port}$"
+
+        return {
+            "allow_hosts": sorted({host_regex(pattern) for pattern in self.includes}),
+            "ignore_hosts": sorted({host_regex(pattern) for pattern in self.excludes if pattern.whole_host}),
+        }
@@ -276,6 +276,31 @@
             responsesContainer.scrollTop = responsesContainer.scrollHeight;
         };
         
+        // 스트리밍 중인 result 텍스트는 한 단계(div)에 이어 붙이고, finishAiResponseStep()으로 마무리합니다.
+        window.appendAiResponseChunk = (text) => {
+            let streamingStep = responsesContainer.querySelector('.ai-response-step[data-streaming]');
+            if (!streamingStep) {
+                const responseAreas = responsesContainer.querySelectorAll('.ai-response-area');
+                if (responseAreas.length === 0) {
+                    window.startAiResponse();
+                }
+                const lastResponseArea = responsesContainer.querySelector('.ai-response-area:last-child');
+                streamingStep = document.createElement('div');
+                streamingStep.className = 'ai-response-step';
+                streamingStep.dataset.streaming = 'true';
+                lastResponseArea.appendChild(streamingStep);
+            }
+            streamingStep.textContent += text;
+            responsesContainer.scrollTop = responsesContainer.scrollHeight;
+        };
+
+        window.finishAiResponseStep = () => {
+            const streamingStep = responsesContainer.querySelector('.ai-response-step[data-streaming]');
+            if (streamingStep) {
+                delete streamingStep.dataset.streaming;
+            }
+        };
+        
         window.appendAiDebugInfo = (text) => {
             const lastResponseArea = document.querySelector('.ai-response-area:last-child');
             if (!lastResponseArea) return;
@@ -0,0 +1,214 @@
+import queue
+import re
+import shlex
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from collections import defaultdict
+from urllib.parse import urlsplit
+
+from flow_store import FlowStore
+from proxy import FlowData
+
+TOKEN_RE = re.compile(r"[a-z0-9_][a-z0-9_.-]{1,63}")
+# 바디는 앞부분만 색인합니다. (대용량 바디 하나가 인덱스를 부풀리지 않도록)
+MAX_INDEXED_BODY = 256 * 1024
+# 필드 이름 없이 검색하면 이 필드들을 모두 찾습니다.
+DEFAULT_FIELDS = ("url", "host", "header", "body")
+FIELD_ALIASES = {"type": "ct", "content-type": "ct", "headers": "header", "path": "url"}
+
+
+def tokenize(text: str) -> set[str]:
+    """소문자 토큰 집합을 반환합니다. 점/하이픈으로 이어진 토큰은 전체와 부분 모두 색인합니다."""
+    tokens = set()
+    for token in TOKEN_RE.findall(text.lower()):
+        token = token.strip('.-')
+        if not token:
+            continue
+        tokens.add(token)
+        if '.' in token or '-' in token:
+            tokens.update(part for part in re.split(r"[.-]", token) if part)
+    return tokens
+
+
+def _contains(posting: array, doc_id: int) -> bool:
+    """postings는 문서 ID 오름차순이므로 이진 탐색으로 포함 여부를 확인합니다."""
+    i = bisect_left(posting, doc_id)
+    return i < len(posting) and posting[i] == doc_id
+
+
+def _intersect(candidates: list[int], posting: array, keep: bool = True) -> list[int]:
+    """candidates 중 posting에 있는(keep=False면 없는) 문서만 남깁니다.
+
+    후보가 적으면 이진 탐색을, 비슷한 크기면 set 멤버십 검사를 사용합니다.
+    """
+    if len(candidates) * 20 < len(posting):
+        return [d for d in candidates if _contains(posting, d) == keep]
+    members = set(posting)
+    if keep:
+        return [d for d in candidates if d in members]
+    return [d for d in candidates if d not in members]
+
+
+class SearchIndex:
+    """History 검색용 역색인입니다.
+
+    문서 ID는 History 테이블의 원본 행 번호이고, 각 (필드, 토큰)의 postings는 오름차순
+    array로 유지되므로 교집합을 이진 탐색으로 빠르게 계산합니다. 색인은 워커 스레드가
+    저장소에서 헤더/바디를 읽어 점진적으로 만듭니다.
+
+    쿼리 문법: host:api.x.com status:5xx method:post header:authorization body:"token"
+    url:login type:json -status:200 (필드 없는 단어는 url/host/header/body 전체에서 찾음)
+    """
+
+    def __init__(self, flow_store: FlowStore, on_indexed=None):
+        self.flow_store = flow_store
+        self.on_indexed = on_indexed
+        self._postings: dict[str, dict[str, array]] = defaultdict(dict)
+        self._lock = threading.Lock()
+        self._queue = queue.SimpleQueue()
+        self.indexed_count = 0
+        # 워커가 처리한(색인에 실패한 것 포함) 가장 큰 문서 ID. 제외 조건만 있는 검색의 전체 집합입니다.
+        self.max_doc_id = -1
+        self._worker = threading.Thread(target=self._run, name="SearchIndex", daemon=True)
+        self._worker.start()
+
+    def submit(self, doc_id: int, flow_data: FlowData):
+        """색인할 Flow를 워커에 넘깁니다. doc_id는 증가하는 순서로 넘어와야 합니다."""
+        self._queue.put((doc_id, flow_data))
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            # 쌓여 있는 항목을 한 번에 처리하고 알림은 배치당 한 번만 보냅니다.
+            while len(batch) < 1000:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            for doc_id, flow_data in batch:
+                try:
+                    self._index_flow(doc_id, flow_data)
+                except Exception as e:
+                    print(f"검색 색인 중 오류 ({flow_data.flow_id}): {e}")
+                with self._lock:
+                    self.max_doc_id = max(self.max_doc_id, doc_id)
+            if self.on_indexed is not None:
+                self.on_indexed()
+
+    def _index_flow(self, doc_id: int, flow_data: FlowData):
+        fields: dict[str, set[str]] = {
+            "method": {flow_data.method.lower()},
+            "status": {flow_data.status_code.lower()},
+            "url": tokenize(flow_data.url),
+            "ct": tokenize(flow_data.content_type),
+        }
+        if flow_data.status_code.isdigit():
+            fields["status"].add(f"{flow_data.status_code[0]}xx")
+        host = urlsplit(flow_data.url).hostname or ""
+        fields["host"] = {host} | tokenize(host)
+
+        details = self.flow_store.get_details(flow_data.flow_id, cache=False)
+        if details is not None:
+            header_tokens = set()
+            for name, value in details.request_headers + details.response_headers:
+                header_tokens.add(name.lower())
+                header_tokens.update(tokenize(value))
+            fields["header"] = header_tokens
+
+            body_tokens = set()
+            for handle in (details.request_body, details.response_body):
+                # 앞부분만 읽고 풀어서 대용량(spool) 바디도 MAX_INDEXED_BODY만큼만 메모리를 씁니다.
+                text = handle.text_head(MAX_INDEXED_BODY) if handle.raw_size else None
+                if text:
+                    body_tokens.update(tokenize(text))
+            fields["body"] = body_tokens
+
+        with self._lock:
+            for field, tokens in fields.items():
+                field_postings = self._postings[field]
+                for token in tokens:
+                    posting = field_postings.get(token)
+                    if posting is None:
+                        field_postings[token] = array('I', [doc_id])
+                    elif posting[-1] != doc_id:
+                        posting.append(doc_id)
+            self.indexed_count += 1
+
+    def _term_postings(self, field: str, value: str) -> list[array]:
+        """(필드, 값)에 대해 AND로 결합해야 하는 postings 목록을 반환합니다."""
+        value = value.lower()
+        field_postings = self._postings.get(field, {})
+        if field in ("method", "status"):
+            return [field_postings.get(value, array('I'))]
+        if field == "host" and value.startswith("*."):
+            # 와일드카드 호스트는 host 어휘(작음)를 훑어 합집합을 만듭니다.
+            suffix = value[1:]
+            docs = sorted({d for host, posting in field_postings.items()
+                           if host.endswith(suffix) for d in posting})
+            return [array('I', docs)]
+        if field == "host" and value in field_postings:
+            return [field_postings[value]]
+        tokens = tokenize(value)
+        if not tokens:
+            return [array('I')]
+        return [field_postings.get(token, array('I')) for token in tokens]
+
+    def _term_docs(self, field: str | None, value: str) -> list[array]:
+        if field is not None:
+            return self._term_postings(field, value)
+        # 필드가 없으면 기본 필드들의 합집합
+        union = set()
+        for default_field in DEFAULT_FIELDS:
+            postings = sorted(self._term_postings(default_field, value), key=len)
+            docs = list(postings[0])
+            for posting in postings[1:]:
+                docs = _intersect(docs, posting)
+            union.update(docs)
+        return [array('I', sorted(union))]
+
+    def search(self, query: str) -> tuple[list[int], float]:
+        """쿼리에 맞는 문서 ID(행 번호) 목록과 검색 시간(ms)을 반환합니다."""
+        start = time.perf_counter()
+        try:
+            terms = shlex.split(query)
+        except ValueError:
+            terms = query.split()
+
+        include: list[array] = []
+        exclude: list[list[array]] = []
+        with self._lock:
+            for term in terms:
+                negate = term.startswith('-') and len(term) > 1
+                if negate:
+                    term = term[1:]
+                field, sep, value = term.partition(':')
+                if sep:
+                    field = FIELD_ALIASES.get(field.lower(), field.lower())
+                else:
+                    field, value = None, term
+                postings = self._term_docs(field, value)
+                if negate:
+                    exclude.append(postings)
+                else:
+                    include.extend(postings)
+
+            if include:
+                include.sort(key=len)
+                candidates = list(include[0])
+                for posting in include[1:]:
+                    candidates = _intersect(candidates, posting)
+                    if not candidates:
+                        break
+            else:
+                candidates = list(range(self.max_doc_id + 1))
+
+            for postings in exclude:
+                # 제외 조건이 여러 토큰이면 모든 토큰을 가진 문서만 제외합니다.
+                matched = list(postings[0])
+                for posting in postings[1:]:
+                    matched = _intersect(matched, posting)
+                candidates = _intersect(candidates, array('I', matched), keep=False)
+
+        return candidates, (time.perf_counter() - start) * 1000
@@ -0,0 +1,100 @@
+import time
+
+from PySide6.QtCore import QTimer, Qt
+from PySide6.QtWidgets import (
+    QWidget, QVBoxLayout, QLabel, QTableWidget, QTableWidgetItem, QHeaderView, QAbstractItemView
+)
+
+from metrics import Metrics, histogram_quantile
+
+
+class StatsWidget(QWidget):
+    """파이프라인 단계별 지연 시간과 카운터를 보여주는 Stats 탭입니다.
+
+    탭이 보이는 동안에만 REFRESH_INTERVAL_MS마다 스냅샷을 읽어 갱신하고, 속도(/s)는
+    직전 갱신과의 개수 차이로 계산합니다.
+    """
+
+    REFRESH_INTERVAL_MS = 1000
+    LATENCY_HEADERS = ["Stage", "Label", "Count", "Rate (/s)", "Avg (ms)", "p50 (ms)", "p95 (ms)", "p99 (ms)"]
+    COUNTER_HEADERS = ["Counter", "Label", "Value", "Rate (/s)"]
+
+    def __init__(self, metrics: Metrics, metrics_url: str | None = None, parent=None):
+        super().__init__(parent)
+        self.metrics = metrics
+        self._previous: dict[tuple[str, str], int] = {}
+        self._previous_at = time.monotonic()
+
+        layout = QVBoxLayout(self)
+        self.endpoint_label = QLabel(f"Prometheus: {metrics_url}" if metrics_url else "Prometheus 엔드포인트 꺼짐")
+        self.endpoint_label.setTextInteractionFlags(Qt.TextSelectableByMouse)
+        layout.addWidget(self.endpoint_label)
+
+        self.latency_table = self._make_table(self.LATENCY_HEADERS)
+        layout.addWidget(self.latency_table, 3)
+        self.counter_table = self._make_table(self.COUNTER_HEADERS)
+        layout.addWidget(self.counter_table, 2)
+
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setInterval(self.REFRESH_INTERVAL_MS)
+        self.refresh_timer.timeout.connect(self.refresh)
+
+    @staticmethod
+    def _make_table(headers: list[str]) -> QTableWidget:
+        table = QTableWidget(0, len(headers))
+        table.setHorizontalHeaderLabels(headers)
+        table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        table.verticalHeader().setVisible(False)
+        table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        table.horizontalHeader().setStretchLastSection(True)
+        return table
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.refresh()
+        self.refresh_timer.start()
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self.refresh_timer.stop()
+
+    def refresh(self):
+        snapshot = self.metrics.combined()
+        now = time.monotonic()
+        interval = max(now - self._previous_at, 1e-9)
+        latency_rows = []
+        counter_rows = []
+        current: dict[tuple[str, str], int] = {}
+        for name, metric in sorted(snapshot.items()):
+            if not metric["series"]:
+                # 아직 기록이 없는 단계도 표에 보이도록 빈 행을 둡니다.
+                if metric["kind"] == "histogram":
+                    latency_rows.append([name, "", "0", "0.0", "-", "-", "-", "-"])
+                else:
+                    counter_rows.append([name, "", "0", "0.0"])
+            for value, data in sorted(metric["series"].items()):
+                count = data["count"] if metric["kind"] == "histogram" else data
+                current[(name, value)] = count
+                rate = (count - self._previous.get((name, value), count)) / interval
+                if metric["kind"] == "counter":
+                    counter_rows.append([name, value, f"{count:,}", f"{rate:.1f}"])
+                    continue
+                bounds = metric["bucket_bounds"]
+                average = data["sum"] / count if count else 0.0
+                latency_rows.append([name, value, f"{count:,}", f"{rate:.1f}", f"{average * 1000:.3f}"] + [
+                    f"{histogram_quantile(q, bounds, data['buckets']) * 1000:.3f}" for q in (0.5, 0.95, 0.99)])
+        self._previous = current
+        self._previous_at = now
+        self._fill(self.latency_table, latency_rows)
+        self._fill(self.counter_table, counter_rows)
+
+    @staticmethod
+    def _fill(table: QTableWidget, rows: list[list[str]]):
+        table.setRowCount(len(rows))
+        for row, values in enumerate(rows):
+            for column, text in enumerate(values):
+                item = QTableWidgetItem(text)
+                if column >= 2:
+                    item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                table.setItem(row, column, item)
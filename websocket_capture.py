@@ -0,0 +1,212 @@
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+
+# 연결 하나당 보관하는 최대 메시지 수 (링 버퍼, 넘치면 오래된 메시지부터 버림)
+DEFAULT_WEBSOCKET_CAPACITY = 5000
+# 메시지 하나에서 보관하는 최대 바이트. 큰 바이너리 프레임이 버퍼 메모리를 차지하지 않도록 자릅니다.
+MAX_STORED_MESSAGE_SIZE = 256 * 1024
+# 기억하는 최대 연결 수. 넘치면 닫힌 연결부터 메시지와 함께 버립니다.
+MAX_WEBSOCKET_CONNECTIONS = 200
+# 프록시에서 메시지를 모아 GUI로 보내는 간격 (초). 초당 수천 건이어도 배치는 초당 20개입니다.
+WEBSOCKET_FLUSH_INTERVAL = 0.05
+
+
+@dataclass(slots=True)
+class WebSocketMessage:
+    """캡처한 WebSocket 메시지 하나입니다. content는 MAX_STORED_MESSAGE_SIZE까지만 보관합니다."""
+    flow_id: str
+    # 연결 안에서의 순번 (1부터). 버퍼에서 밀려난 메시지가 있어도 번호는 그대로입니다.
+    seq: int
+    from_client: bool
+    is_text: bool
+    content: bytes
+    # 잘리기 전의 원래 크기
+    size: int
+    timestamp: float
+    injected: bool = False
+
+    @property
+    def truncated(self) -> bool:
+        return self.size > len(self.content)
+
+    def text(self) -> str:
+        return self.content.decode('utf-8', errors='replace')
+
+    def preview(self, limit: int = 200) -> str:
+        """테이블에 보여줄 한 줄 요약입니다. 바이너리는 hex로 표시합니다."""
+        if self.is_text:
+            return self.content[:limit * 4].decode('utf-8', errors='replace')[:limit].replace("\n", " ")
+        return self.content[:limit // 3].hex(" ")
+
+
+@dataclass(slots=True)
+class WebSocketConnection:
+    """WebSocket 연결(업그레이드한 Flow) 하나의 상태와 메시지 통계입니다."""
+    flow_id: str
+    url: str
+    opened_at: float
+    closed_at: float | None = None
+    close_code: int | None = None
+    close_reason: str = ""
+    # 프록시가 본 전체 메시지 수와 링 버퍼에서 밀려나 버린 수
+    total: int = 0
+    dropped: int = 0
+
+    @property
+    def is_open(self) -> bool:
+        return self.closed_at is None
+
+
+@dataclass(slots=True)
+class WebSocketBatch:
+    """프록시가 WEBSOCKET_FLUSH_INTERVAL마다 GUI로 보내는 변경분입니다.
+
+    connections에는 이번 간격 동안 열리거나 닫히거나 메시지가 오간 연결의 최신 상태가 들어 있습니다.
+    """
+    connections: list[WebSocketConnection] = field(default_factory=list)
+    messages: list[WebSocketMessage] = field(default_factory=list)
+
+
+class WebSocketCollector:
+    """프록시 이벤트 루프에서 메시지를 연결별 링 버퍼에 모았다가 배치 하나로 꺼냅니다.
+
+    GUI가 따라오지 못해도 한 간격 동안 연결당 capacity개를 넘게 쌓지 않습니다.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_WEBSOCKET_CAPACITY):
+        self.capacity = max(1, capacity)
+        self._connections: dict[str, WebSocketConnection] = {}
+        self._pending: dict[str, deque[WebSocketMessage]] = {}
+        self._changed: dict[str, WebSocketConnection] = {}
+
+    def set_capacity(self, capacity: int):
+        self.capacity = max(1, capacity)
+        for flow_id, pending in self._pending.items():
+            self._pending[flow_id] = deque(pending, maxlen=self.capacity)
+
+    def open(self, flow_id: str, url: str, timestamp: float):
+        connection = WebSocketConnection(flow_id, url, timestamp)
+        self._connections[flow_id] = connection
+        self._changed[flow_id] = connection
+
+    def add(self, flow_id: str, from_client: bool, is_text: bool, content: bytes, timestamp: float,
+            injected: bool = False) -> bool:
+        """메시지를 보관합니다. 열린 연결이 아니면 False를 반환합니다."""
+        connection = self._connections.get(flow_id)
+        if connection is None:
+            return False
+        connection.total += 1
+        pending = self._pending.get(flow_id)
+        if pending is None:
+            pending = self._pending[flow_id] = deque(maxlen=self.capacity)
+        elif len(pending) == self.capacity:
+            connection.dropped += 1
+        pending.append(WebSocketMessage(flow_id, connection.total, from_client, is_text,
+                                        content[:MAX_STORED_MESSAGE_SIZE], len(content), timestamp, injected))
+        self._changed[flow_id] = connection
+        return True
+
+    def close(self, flow_id: str, timestamp: float, code: int | None, reason: str):
+        connection = self._connections.pop(flow_id, None)
+        if connection is None:
+            return
+        connection.closed_at = timestamp
+        connection.close_code = code
+        connection.close_reason = reason
+        self._changed[flow_id] = connection
+
+    def flush(self) -> WebSocketBatch | None:
+        """모아 둔 변경분을 배치로 꺼냅니다. 변경이 없으면 None을 반환합니다."""
+        if not self._changed:
+            return None
+        batch = WebSocketBatch()
+        for flow_id, connection in self._changed.items():
+            # 연결 상태는 계속 바뀌므로 보내는 시점의 값을 복사해 넘깁니다.
+            batch.connections.append(WebSocketConnection(
+                connection.flow_id, connection.url, connection.opened_at, connection.closed_at,
+                connection.close_code, connection.close_reason, connection.total, connection.dropped))
+            pending = self._pending.pop(flow_id, None)
+            if pending:
+                batch.messages.extend(pending)
+        self._changed = {}
+        return batch
+
+
+class WebSocketBuffer:
+    """GUI 쪽에서 연결별 메시지를 보관하는 링 버퍼 묶음입니다.
+
+    put()은 FlowFeed와 같은 인터페이스라 프록시 애드온의 큐로 바로 쓸 수도 있고, 모든 메서드는
+    잠금으로 보호되어 다른 스레드에서 읽어도 됩니다.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_WEBSOCKET_CAPACITY,
+                 max_connections: int = MAX_WEBSOCKET_CONNECTIONS):
+        self.capacity = max(1, capacity)
+        self.max_connections = max_connections
+        self._lock = threading.Lock()
+        self._connections: dict[str, WebSocketConnection] = {}
+        self._messages: dict[str, deque[WebSocketMessage]] = {}
+        # GUI 버퍼에서 밀려난 메시지 수 (프록시에서 이미 버린 수는 connection.dropped)
+        self._evicted: dict[str, int] = {}
+
+    def put(self, batch: WebSocketBatch):
+        self.apply(batch)
+
+    def apply(self, batch: WebSocketBatch) -> set[str]:
+        """배치를 반영하고 변경된 연결의 Flow ID를 반환합니다."""
+        with self._lock:
+            for connection in batch.connections:
+                self._connections[connection.flow_id] = connection
+            for message in batch.messages:
+                messages = self._messages.get(message.flow_id)
+                if messages is None:
+                    messages = self._messages[message.flow_id] = deque(maxlen=self.capacity)
+                elif len(messages) == self.capacity:
+                    self._evicted[message.flow_id] = self._evicted.get(message.flow_id, 0) + 1
+                messages.append(message)
+            self._evict_connections()
+            return {connection.flow_id for connection in batch.connections}
+
+    def _evict_connections(self):
+        excess = len(self._connections) - self.max_connections
+        if excess <= 0:
+            return
+        # 오래된(먼저 들어온) 닫힌 연결부터 버리고, 모두 열려 있으면 그대로 둡니다.
+        for flow_id in [flow_id for flow_id, connection in self._connections.items()
+                        if not connection.is_open][:excess]:
+            self._connections.pop(flow_id)
+            self._messages.pop(flow_id, None)
+            self._evicted.pop(flow_id, None)
+
+    def set_capacity(self, capacity: int):
+        with self._lock:
+            self.capacity = max(1, capacity)
+            for flow_id, messages in self._messages.items():
+                if len(messages) > self.capacity:
+                    self._evicted[flow_id] = self._evicted.get(flow_id, 0) + len(messages) - self.capacity
+                self._messages[flow_id] = deque(messages, maxlen=self.capacity)
+
+    def connections(self) -> list[WebSocketConnection]:
+        with self._lock:
+            return list(self._connections.values())
+
+    def connection(self, flow_id: str) -> WebSocketConnection | None:
+        with self._lock:
+            return self._connections.get(flow_id)
+
+    def messages(self, flow_id: str) -> list[WebSocketMessage]:
+        with self._lock:
+            return list(self._messages.get(flow_id, ()))
+
+    def dropped(self, flow_id: str) -> int:
+        """프록시와 GUI 버퍼에서 밀려나 더 이상 볼 수 없는 메시지 수입니다."""
+        with self._lock:
+            connection = self._connections.get(flow_id)
+            return (connection.dropped if connection else 0) + self._evicted.get(flow_id, 0)
+
+    def clear(self):
+        with self._lock:
+            self._connections.clear()
+            self._messages.clear()
+            self._evicted.clear()
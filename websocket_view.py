@@ -0,0 +1,404 @@
+import time
+
+from PySide6.QtCore import QAbstractTableModel, QModelIndex, Qt, QTimer, Signal
+from PySide6.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QSplitter, QPlainTextEdit, QPushButton, QLabel, QLineEdit,
+    QComboBox, QSpinBox, QTableView, QHeaderView, QAbstractItemView
+)
+
+from channel import AsyncChannel, FlowFeed
+from websocket_capture import WebSocketBuffer, WebSocketConnection, WebSocketMessage, DEFAULT_WEBSOCKET_CAPACITY
+
+DIRECTIONS = ("All", "Client → Server", "Server → Client")
+FRAME_TYPES = ("Text", "Binary (hex)")
+
+
+class WebSocketConnectionsModel(QAbstractTableModel):
+    """WebSocket 연결 목록 모델입니다. 새 연결은 행 추가로, 상태 변화는 dataChanged로 반영합니다."""
+
+    HEADERS = ["URL", "State", "Messages", "Dropped"]
+
+    def __init__(self, buffer: WebSocketBuffer, parent=None):
+        super().__init__(parent)
+        self.buffer = buffer
+        self._connections: list[WebSocketConnection] = []
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._connections)
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        connection = self._connections[index.row()]
+        if role == Qt.ToolTipRole:
+            return f"Flow ID: {connection.flow_id}"
+        if role != Qt.DisplayRole:
+            return None
+        column = index.column()
+        if column == 0:
+            return connection.url
+        if column == 1:
+            if connection.is_open:
+                return "Open"
+            return f"Closed ({connection.close_code})" if connection.close_code is not None else "Closed"
+        if column == 2:
+            return f"{connection.total:,}"
+        if column == 3:
+            return f"{self.buffer.dropped(connection.flow_id):,}"
+        return None
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role: int = Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return None
+
+    def flow_id_at(self, row: int) -> str | None:
+        return self._connections[row].flow_id if 0 <= row < len(self._connections) else None
+
+    def row_of(self, flow_id: str) -> int:
+        for row, connection in enumerate(self._connections):
+            if connection.flow_id == flow_id:
+                return row
+        return -1
+
+    def refresh(self) -> bool:
+        """버퍼의 연결 목록을 반영합니다. 행이 지워져 모델을 다시 만들었으면 True를 반환합니다."""
+        connections = self.buffer.connections()
+        known = len(self._connections)
+        if [c.flow_id for c in connections[:known]] != [c.flow_id for c in self._connections]:
+            self.beginResetModel()
+            self._connections = connections
+            self.endResetModel()
+            return True
+        if len(connections) > known:
+            self.beginInsertRows(QModelIndex(), known, len(connections) - 1)
+            self._connections = connections
+            self.endInsertRows()
+        else:
+            self._connections = connections
+        if known:
+            self.dataChanged.emit(self.index(0, 0), self.index(known - 1, len(self.HEADERS) - 1))
+        return False
+
+    def clear(self):
+        self.beginResetModel()
+        self._connections = []
+        self.endResetModel()
+
+
+class WebSocketMessagesModel(QAbstractTableModel):
+    """선택한 연결에서 필터에 맞는 메시지만 보여주는 모델입니다.
+
+    링 버퍼에서 밀려난 메시지는 위에서 지우고 새 메시지는 아래에 붙이므로, 갱신할 때 전체를 다시
+    만들지 않습니다. 필터나 연결이 바뀔 때만 reset()으로 처음부터 채웁니다.
+    """
+
+    HEADERS = ["#", "Direction", "Type", "Length", "Time", "Preview"]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._messages: list[WebSocketMessage] = []
+        self._last_seq = 0
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._messages)
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole):
+        if not index.isValid() or role != Qt.DisplayRole:
+            return None
+        message = self._messages[index.row()]
+        column = index.column()
+        if column == 0:
+            return str(message.seq)
+        if column == 1:
+            direction = "→ Server" if message.from_client else "← Server"
+            return f"{direction} (injected)" if message.injected else direction
+        if column == 2:
+            return "Text" if message.is_text else "Binary"
+        if column == 3:
+            return f"{message.size:,}"
+        if column == 4:
+            milliseconds = int(message.timestamp * 1000) % 1000
+            return f"{time.strftime('%H:%M:%S', time.localtime(message.timestamp))}.{milliseconds:03d}"
+        if column == 5:
+            return message.preview()
+        return None
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role: int = Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return None
+
+    def message_at(self, row: int) -> WebSocketMessage | None:
+        return self._messages[row] if 0 <= row < len(self._messages) else None
+
+    def reset(self, messages: list[WebSocketMessage], matches):
+        self.beginResetModel()
+        self._messages = [message for message in messages if matches(message)]
+        self._last_seq = messages[-1].seq if messages else 0
+        self.endResetModel()
+
+    def sync(self, messages: list[WebSocketMessage], matches):
+        """버퍼의 현재 메시지(순번 순)와 맞춥니다. 밀려난 행은 지우고 새 메시지만 필터를 거쳐 붙입니다."""
+        if not messages:
+            if self._messages:
+                self.reset(messages, matches)
+            return
+        first_seq = messages[0].seq
+        stale = 0
+        while stale < len(self._messages) and self._messages[stale].seq < first_seq:
+            stale += 1
+        if stale:
+            self.beginRemoveRows(QModelIndex(), 0, stale - 1)
+            del self._messages[:stale]
+            self.endRemoveRows()
+        new = []
+        for message in reversed(messages):
+            if message.seq <= self._last_seq:
+                break
+            if matches(message):
+                new.append(message)
+        self._last_seq = messages[-1].seq
+        if new:
+            new.reverse()
+            start = len(self._messages)
+            self.beginInsertRows(QModelIndex(), start, start + len(new) - 1)
+            self._messages.extend(new)
+            self.endInsertRows()
+
+
+class WebSocketWidget(QWidget):
+    """WebSocket 연결과 메시지를 보고, 메시지를 수정해 다시 보내는 탭입니다.
+
+    프록시가 보낸 배치를 연결별 링 버퍼에 넣고, 화면은 탭이 보일 때만 REFRESH_INTERVAL마다 갱신합니다.
+    """
+
+    # 프록시 스레드에서 배치를 넣으면 GUI 스레드에서 drain_batches가 실행됩니다.
+    batches_available = Signal()
+
+    REFRESH_INTERVAL = 200
+
+    def __init__(self, websocket_queue: FlowFeed | None, command_queue: AsyncChannel,
+                 capacity: int = DEFAULT_WEBSOCKET_CAPACITY, parent=None):
+        super().__init__(parent)
+        self.websocket_queue = websocket_queue
+        self.command_queue = command_queue
+        self.buffer = WebSocketBuffer(capacity)
+        self.current_flow_id: str | None = None
+        self.dirty = False
+
+        layout = QVBoxLayout(self)
+        top_layout = QHBoxLayout()
+        top_layout.addWidget(QLabel("Filter:"))
+        self.filter_input = QLineEdit()
+        self.filter_input.setPlaceholderText("메시지 내용에 포함된 문자열 (대소문자 무시)")
+        top_layout.addWidget(self.filter_input)
+        self.direction_combo = QComboBox()
+        self.direction_combo.addItems(DIRECTIONS)
+        top_layout.addWidget(self.direction_combo)
+        top_layout.addWidget(QLabel("Buffer:"))
+        self.capacity_input = QSpinBox()
+        self.capacity_input.setRange(100, 1_000_000)
+        self.capacity_input.setSingleStep(1000)
+        self.capacity_input.setValue(self.buffer.capacity)
+        self.capacity_input.setSuffix(" msgs/conn")
+        self.capacity_input.setToolTip("연결 하나당 보관하는 최대 메시지 수입니다. 넘치면 오래된 메시지부터 버립니다.")
+        top_layout.addWidget(self.capacity_input)
+        self.clear_button = QPushButton("Clear")
+        top_layout.addWidget(self.clear_button)
+        layout.addLayout(top_layout)
+
+        splitter = QSplitter(Qt.Horizontal)
+        layout.addWidget(splitter)
+
+        self.connections_model = WebSocketConnectionsModel(self.buffer, self)
+        self.connections_table = self._make_table(self.connections_model)
+        self.connections_table.setColumnWidth(0, 300)
+        splitter.addWidget(self.connections_table)
+
+        messages_splitter = QSplitter(Qt.Vertical)
+        splitter.addWidget(messages_splitter)
+        self.messages_model = WebSocketMessagesModel(self)
+        self.messages_table = self._make_table(self.messages_model)
+        for column, width in enumerate((60, 110, 60, 80, 100)):
+            self.messages_table.setColumnWidth(column, width)
+        messages_splitter.addWidget(self.messages_table)
+
+        editor_widget = QWidget()
+        editor_layout = QVBoxLayout(editor_widget)
+        editor_layout.setContentsMargins(0, 0, 0, 0)
+        self.message_label = QLabel("메시지를 선택하면 내용을 수정해 다시 보낼 수 있습니다.")
+        editor_layout.addWidget(self.message_label)
+        self.message_edit = QPlainTextEdit()
+        editor_layout.addWidget(self.message_edit)
+        send_layout = QHBoxLayout()
+        self.frame_type_combo = QComboBox()
+        self.frame_type_combo.addItems(FRAME_TYPES)
+        self.send_server_button = QPushButton("Send to Server")
+        self.send_client_button = QPushButton("Send to Client")
+        send_layout.addWidget(self.frame_type_combo)
+        send_layout.addStretch()
+        send_layout.addWidget(self.send_server_button)
+        send_layout.addWidget(self.send_client_button)
+        editor_layout.addLayout(send_layout)
+        messages_splitter.addWidget(editor_widget)
+        messages_splitter.setStretchFactor(0, 3)
+        messages_splitter.setStretchFactor(1, 2)
+        splitter.setStretchFactor(0, 1)
+        splitter.setStretchFactor(1, 3)
+
+        # 배치가 아무리 자주 와도 화면 갱신은 이 타이머 주기로 한 번씩만 합니다.
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setSingleShot(True)
+        self.refresh_timer.setInterval(self.REFRESH_INTERVAL)
+        self.refresh_timer.timeout.connect(self.refresh)
+
+        self.filter_input.returnPressed.connect(self.reload_messages)
+        self.direction_combo.currentIndexChanged.connect(lambda _: self.reload_messages())
+        self.capacity_input.editingFinished.connect(self.on_capacity_changed)
+        self.clear_button.clicked.connect(self.on_clear_clicked)
+        self.connections_table.selectionModel().selectionChanged.connect(self.on_connection_selected)
+        self.messages_table.selectionModel().selectionChanged.connect(self.on_message_selected)
+        self.send_server_button.clicked.connect(lambda: self.send_message(to_client=False))
+        self.send_client_button.clicked.connect(lambda: self.send_message(to_client=True))
+        self.update_send_buttons()
+
+        if capacity != DEFAULT_WEBSOCKET_CAPACITY:
+            self.command_queue.put(('set_websocket_capacity', self.buffer.capacity))
+        if self.websocket_queue is not None:
+            self.batches_available.connect(self.drain_batches)
+            self.websocket_queue.set_notify(self.batches_available.emit)
+
+    @staticmethod
+    def _make_table(model: QAbstractTableModel) -> QTableView:
+        table = QTableView()
+        table.setModel(model)
+        table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        table.setSelectionMode(QAbstractItemView.SingleSelection)
+        table.verticalHeader().setVisible(False)
+        table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        table.verticalHeader().setDefaultSectionSize(22)
+        table.horizontalHeader().setStretchLastSection(True)
+        return table
+
+    def drain_batches(self):
+        """큐에 쌓인 배치를 모두 링 버퍼에 반영하고 화면 갱신을 예약합니다."""
+        self.websocket_queue.acknowledge()
+        while not self.websocket_queue.empty():
+            self.buffer.apply(self.websocket_queue.get_nowait())
+            self.dirty = True
+        if self.dirty and self.isVisible() and not self.refresh_timer.isActive():
+            self.refresh_timer.start()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if self.dirty:
+            self.refresh()
+
+    def refresh(self):
+        self.dirty = False
+        if self.connections_model.refresh() and self.current_flow_id is not None:
+            # 오래된 연결이 버려져 모델을 다시 만들었으면 보고 있던 연결을 다시 선택합니다.
+            row = self.connections_model.row_of(self.current_flow_id)
+            if row >= 0:
+                self.connections_table.selectRow(row)
+            else:
+                self.select_connection(None)
+        if self.current_flow_id is None:
+            return
+        scroll_bar = self.messages_table.verticalScrollBar()
+        at_bottom = scroll_bar.value() >= scroll_bar.maximum()
+        self.messages_model.sync(self.buffer.messages(self.current_flow_id), self.message_filter())
+        if at_bottom:
+            self.messages_table.scrollToBottom()
+        self.update_send_buttons()
+
+    def message_filter(self):
+        query = self.filter_input.text().strip().lower()
+        direction = self.direction_combo.currentIndex()
+        query_bytes = query.encode('utf-8')
+
+        def matches(message: WebSocketMessage) -> bool:
+            if direction == 1 and not message.from_client:
+                return False
+            if direction == 2 and message.from_client:
+                return False
+            if not query:
+                return True
+            if message.is_text:
+                return query in message.text().lower()
+            return query_bytes in message.content.lower() or query in message.content.hex()
+        return matches
+
+    def reload_messages(self):
+        messages = self.buffer.messages(self.current_flow_id) if self.current_flow_id else []
+        self.messages_model.reset(messages, self.message_filter())
+        self.messages_table.scrollToBottom()
+
+    def on_connection_selected(self):
+        rows = self.connections_table.selectionModel().selectedRows()
+        self.select_connection(self.connections_model.flow_id_at(rows[0].row()) if rows else None)
+
+    def select_connection(self, flow_id: str | None):
+        if flow_id == self.current_flow_id:
+            return
+        self.current_flow_id = flow_id
+        self.reload_messages()
+        self.update_send_buttons()
+
+    def on_message_selected(self):
+        rows = self.messages_table.selectionModel().selectedRows()
+        message = self.messages_model.message_at(rows[0].row()) if rows else None
+        if message is None:
+            return
+        direction = "클라이언트 → 서버" if message.from_client else "서버 → 클라이언트"
+        info = f"#{message.seq} {direction}, {message.size:,} bytes"
+        if message.truncated:
+            info += f" (보관 한도로 앞 {len(message.content):,} bytes만 남아 있습니다)"
+        self.message_label.setText(info)
+        self.frame_type_combo.setCurrentIndex(0 if message.is_text else 1)
+        self.message_edit.setPlainText(message.text() if message.is_text else message.content.hex(" "))
+
+    def update_send_buttons(self):
+        connection = self.buffer.connection(self.current_flow_id) if self.current_flow_id else None
+        enabled = connection is not None and connection.is_open
+        self.send_server_button.setEnabled(enabled)
+        self.send_client_button.setEnabled(enabled)
+
+    def send_message(self, to_client: bool):
+        """편집기의 내용을 선택한 연결에 주입합니다. 주입한 메시지도 (injected)로 목록에 다시 나타납니다."""
+        if self.current_flow_id is None:
+            return
+        is_text = self.frame_type_combo.currentIndex() == 0
+        text = self.message_edit.toPlainText()
+        if is_text:
+            content = text.encode('utf-8')
+        else:
+            try:
+                content = bytes.fromhex("".join(text.split()))
+            except ValueError:
+                self.message_label.setText("오류: Binary 메시지는 hex 문자열로 입력해야 합니다.")
+                return
+        self.command_queue.put(('websocket_send', self.current_flow_id, to_client, content, is_text))
+
+    def on_capacity_changed(self):
+        capacity = self.capacity_input.value()
+        if capacity == self.buffer.capacity:
+            return
+        self.buffer.set_capacity(capacity)
+        self.command_queue.put(('set_websocket_capacity', capacity))
+        self.reload_messages()
+
+    def on_clear_clicked(self):
+        self.buffer.clear()
+        self.current_flow_id = None
+        self.connections_model.clear()
+        self.messages_model.reset([], self.message_filter())
+        self.message_label.setText("메시지를 선택하면 내용을 수정해 다시 보낼 수 있습니다.")
+        self.update_send_buttons()